@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评估流程基准测试
+启动模拟模型服务器，生成合成数据集，在进程内运行 run_evaluation_task，
+统计吞吐（pairs/sec）、单元延迟P50/P99、峰值RSS与数据库写入耗时（会话提交与文本表写入），并将结果保存到 benchmarks/results/，
+便于在不同提交之间对比回归。
+
+用法:
+    python benchmarks/bench_evaluation.py --size 1000 --translators 2 --latency lognormal:0.05,0.6
+    python benchmarks/bench_evaluation.py --compare results/A.json results/B.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / 'results'
+
+sys.path.insert(0, str(BENCH_DIR))
+from mock_model_server import start_mock_server
+from synthetic_dataset import write_dataset
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(ROOT), text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def build_config(path, translator_ports, evaluator_port, local):
+    """写入指向模拟服务器的临时配置文件"""
+    models = {}
+    for index, port in enumerate(translator_ports):
+        key = f"mock-{index + 1}" if not local else f"local-mock-{index + 1}"
+        models[key] = {
+            'name': f"模拟模型{index + 1}",
+            'api_key': 'local' if local else 'mock-key',
+            'base_url': f"http://127.0.0.1:{port}",
+            'model_id': f"mock-model-{index + 1}",
+            'temperature': 0.7,
+            'max_tokens': 256,
+            'top_p': 0.9,
+            'frequency_penalty': 0,
+            'presence_penalty': 0,
+            'penalty_score': 1,
+            'enable_thinking': False,
+            'stream': False
+        }
+    config = {
+        'translation_models': models,
+        'evaluation_model': {
+            'name': '模拟评估模型',
+            'api_key': 'mock-key',
+            'base_url': f"http://127.0.0.1:{evaluator_port}",
+            'model_id': 'mock-evaluator',
+            'temperature': 0.3,
+            'max_tokens': 1000,
+            'top_p': 0.8,
+            'frequency_penalty': 0,
+            'presence_penalty': 0,
+            'penalty_score': 1,
+            'enable_thinking': False,
+            'stream': False
+        },
+        'batch_size': 10
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return list(models)
+
+
+def run_benchmark(args):
+    workdir = Path(tempfile.mkdtemp(prefix='bench_eval_'))
+    os.environ['DATABASE_URL'] = f"sqlite:///{workdir / 'bench.db'}"
+
+    # 启动模拟服务器
+    translator_ports = [free_port() for _ in range(args.translators)]
+    evaluator_port = free_port()
+    servers = [start_mock_server(port, latency=args.latency, error_rate=args.error_rate, model_id=f"mock-{port}")
+               for port in translator_ports]
+    servers.append(start_mock_server(evaluator_port, role='evaluator', latency=args.eval_latency,
+                                     error_rate=args.error_rate))
+
+    dataset_path = write_dataset(args.size, workdir, seed=args.seed)
+    config_path = workdir / 'translation_config.json'
+    model_keys = build_config(config_path, translator_ports, evaluator_port, args.local)
+
+    # 导入并装配应用（不调用 initialize_system，避免读取真实配置与启动真实本地模型）
+    sys.path.insert(0, str(ROOT / 'web_app'))
+    os.chdir(str(workdir))
+    (workdir / 'results').mkdir(exist_ok=True)
+    import app as webapp
+    from translation_evaluation_config import TranslationEvaluationConfig
+    from translation_data_manager import TranslationDataManager
+    from evaluation_engine import EvaluationEngine
+
+    webapp.shared_state.configure(str(workdir / 'shared_state.db'))
+    webapp.config_manager = TranslationEvaluationConfig(str(config_path))
+    webapp.config_manager.load_config()
+    webapp.data_manager = TranslationDataManager()
+    for key in model_keys:
+        model_config = webapp.config_manager.translation_models[key]
+        webapp.model_lifecycle.register(key, model_config.model_id, managed=False)
+    webapp.configure_local_models(str(config_path))
+
+    # 计时探针：翻译、评估单元延迟与数据库写入耗时（会话提交 + 文本表写入，后者使用独立的 engine.begin() 事务）
+    unit_latencies = []
+    db_write_seconds = [0.0]
+    original_translate = webapp.translate_pair
+    original_evaluate = EvaluationEngine.evaluate_single
+    original_intern = webapp.intern_result_texts
+
+    def timed_translate(model_key, pair):
+        start = time.perf_counter()
+        try:
+            return original_translate(model_key, pair)
+        finally:
+            unit_latencies.append(('translate', time.perf_counter() - start))
+
+    def timed_evaluate(self, *a, **kw):
+        start = time.perf_counter()
+        try:
+            return original_evaluate(self, *a, **kw)
+        finally:
+            unit_latencies.append(('evaluate', time.perf_counter() - start))
+
+    def timed_intern(rows):
+        start = time.perf_counter()
+        try:
+            return original_intern(rows)
+        finally:
+            db_write_seconds[0] += time.perf_counter() - start
+
+    webapp.translate_pair = timed_translate
+    webapp.intern_result_texts = timed_intern
+    EvaluationEngine.evaluate_single = timed_evaluate
+
+    with webapp.app.app_context():
+        webapp.db.create_all()
+        original_commit = webapp.db.session.commit
+
+        def timed_commit():
+            start = time.perf_counter()
+            try:
+                return original_commit()
+            finally:
+                db_write_seconds[0] += time.perf_counter() - start
+
+        task_id = f"bench-{int(time.time())}"
+        webapp.db.session.add(webapp.EvaluationTask(id=task_id, name='benchmark', status='pending',
+                                                    data_file=str(dataset_path), total_pairs=args.size))
+        original_commit()
+        webapp.db.session.commit = timed_commit
+
+    start = time.perf_counter()
+    webapp.run_evaluation_task(task_id, str(dataset_path), model_keys)
+    elapsed = time.perf_counter() - start
+
+    with webapp.app.app_context():
+        task = webapp.EvaluationTask.query.get(task_id)
+        status = task.status
+        results_count = webapp.TranslationResult.query.filter_by(task_id=task_id).count()
+
+    for server in servers:
+        server.shutdown()
+
+    translate = [t for kind, t in unit_latencies if kind == 'translate']
+    evaluate = [t for kind, t in unit_latencies if kind == 'evaluate']
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'label': args.label,
+        'params': {
+            'size': args.size,
+            'translators': args.translators,
+            'latency': args.latency,
+            'eval_latency': args.eval_latency,
+            'error_rate': args.error_rate,
+            'local': args.local,
+            'seed': args.seed
+        },
+        'metrics': {
+            'task_status': status,
+            'results_count': results_count,
+            'elapsed_seconds': round(elapsed, 3),
+            'pairs_per_sec': round(args.size / elapsed, 3) if elapsed else 0,
+            'units_per_sec': round(results_count / elapsed, 3) if elapsed else 0,
+            'translate_p50_ms': round(percentile(translate, 50) * 1000, 2),
+            'translate_p99_ms': round(percentile(translate, 99) * 1000, 2),
+            'evaluate_p50_ms': round(percentile(evaluate, 50) * 1000, 2),
+            'evaluate_p99_ms': round(percentile(evaluate, 99) * 1000, 2),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'db_write_seconds': round(db_write_seconds[0], 3)
+        }
+    }
+
+
+def save_result(result):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    label = f"_{result['label']}" if result['label'] else ''
+    path = RESULTS_DIR / f"{stamp}_{result['commit']}{label}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare(path_a, path_b):
+    """对比两次运行的指标"""
+    with open(path_a, 'r', encoding='utf-8') as f:
+        a = json.load(f)
+    with open(path_b, 'r', encoding='utf-8') as f:
+        b = json.load(f)
+    print(f"{'指标':<20}{a['commit']:>14}{b['commit']:>14}{'变化':>10}")
+    for key, value_a in a['metrics'].items():
+        value_b = b['metrics'].get(key)
+        if isinstance(value_a, (int, float)) and isinstance(value_b, (int, float)):
+            delta = f"{(value_b - value_a) / value_a * 100:+.1f}%" if value_a else 'n/a'
+            print(f"{key:<20}{value_a:>14}{value_b:>14}{delta:>10}")
+        else:
+            print(f"{key:<20}{str(value_a):>14}{str(value_b):>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='评估流程基准测试（模拟模型服务器）')
+    parser.add_argument('--size', type=int, default=1000, help='合成数据集条数（如 1000/10000/100000）')
+    parser.add_argument('--translators', type=int, default=2, help='模拟翻译模型数量')
+    parser.add_argument('--latency', default='lognormal:0.02,0.5', help='翻译模型延迟分布')
+    parser.add_argument('--eval-latency', default='lognormal:0.05,0.5', help='评估模型延迟分布')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--local', action='store_true', help='按本地模型配置（经过副本池/对冲路由）')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='', help='结果文件标签')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='对比两个结果文件')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = run_benchmark(args)
+    path = save_result(result)
+    print(json.dumps(result['metrics'], ensure_ascii=False, indent=2))
+    print(f"💾 结果已保存: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动预算检查
+基于 python -X importtime 统计 web_app/app.py 的导入耗时，检查重量级模块是否被提前导入，
+并可选测量 run.py 启动到首个请求成功响应的时间（time-to-first-request）。
+
+用法:
+    python benchmarks/import_time.py            # 仅检查导入预算
+    python benchmarks/import_time.py --ttfr     # 同时测量首个请求时间
+超出预算时以非零状态退出，可直接用于回归检查。
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WEB_APP = ROOT / 'web_app'
+BUDGET_FILE = Path(__file__).resolve().parent / 'import_budget.json'
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 {模块名: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        modules[parts[2].strip()] = (self_us, cumulative_us)
+    return modules
+
+
+def measure_import(module='app'):
+    """在子进程中导入模块，返回 (总耗时ms, 模块耗时表)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=str(WEB_APP), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    total_ms = modules.get(module, (0, 0))[1] / 1000.0
+    return total_ms, modules
+
+
+def measure_time_to_first_request(url='http://127.0.0.1:5001/api/models/readiness', timeout=60):
+    """启动 run.py，返回首个请求成功响应所需的秒数"""
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, 'run.py'], cwd=str(WEB_APP),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.time() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"run.py 提前退出，返回码 {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.time() - start
+            except OSError:
+                time.sleep(0.1)
+        raise TimeoutError(f"{timeout}s 内未收到响应")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查 web_app 冷启动预算')
+    parser.add_argument('--ttfr', action='store_true', help='测量 run.py 的 time-to-first-request')
+    parser.add_argument('--top', type=int, default=15, help='显示耗时最多的模块数量')
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE, 'r', encoding='utf-8') as f:
+        budget = json.load(f)
+
+    failures = []
+    total_ms, modules = measure_import()
+    print(f"📦 import app: {total_ms:.1f} ms (预算 {budget['app_import_ms']} ms)")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda kv: -kv[1][0])[:args.top]:
+        print(f"   {self_us / 1000:8.1f} ms  {name}")
+    if total_ms > budget['app_import_ms']:
+        failures.append(f"导入耗时 {total_ms:.1f} ms 超出预算 {budget['app_import_ms']} ms")
+
+    eager = sorted({name.split('.')[0] for name in modules} & set(budget['forbidden_modules']))
+    if eager:
+        failures.append(f"以下重量级模块在导入时被加载: {', '.join(eager)}")
+
+    if args.ttfr:
+        seconds = measure_time_to_first_request()
+        print(f"🌐 time-to-first-request: {seconds:.2f} s (预算 {budget['time_to_first_request_s']} s)")
+        if seconds > budget['time_to_first_request_s']:
+            failures.append(f"首个请求耗时 {seconds:.2f} s 超出预算 {budget['time_to_first_request_s']} s")
+
+    if failures:
+        print("❌ 冷启动预算检查失败:")
+        for failure in failures:
+            print(f"   • {failure}")
+        sys.exit(1)
+    print("✅ 冷启动预算检查通过")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟模型服务器
+兼容 OpenAI chat/completions 接口，可注入延迟分布与错误率，用于在没有真实密钥和本地模型时压测评估流程。
+
+用法:
+    python benchmarks/mock_model_server.py --port 9081 --latency lognormal:0.2,0.5 --error-rate 0.01
+    python benchmarks/mock_model_server.py --port 9090 --role evaluator
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 翻译角色返回的示例译文
+SAMPLE_TRANSLATIONS = [
+    "飞行前检查起落架收放系统的液压压力。",
+    "本章定义了飞机的尺寸和区域。",
+    "尺寸和区域(Ref. ATA 06-10)，",
+    "拆下接近面板以检查部件。",
+    "确认所有断路器处于闭合位置。",
+]
+
+
+def parse_latency(spec):
+    """解析延迟分布描述，返回无参采样函数（单位：秒）
+
+    支持 fixed:0.1、uniform:0.05,0.3、lognormal:中位数,sigma、
+    以及 mixture:0.95@fixed:0.1;0.05@fixed:3（长尾混合）。
+    """
+    kind, _, params = spec.partition(':')
+    if kind == 'mixture':
+        components = []
+        for part in params.split(';'):
+            weight, _, sub_spec = part.partition('@')
+            components.append((float(weight), parse_latency(sub_spec)))
+        weights = [w for w, _ in components]
+        samplers = [s for _, s in components]
+        return lambda: random.choices(samplers, weights=weights)[0]()
+    values = [float(v) for v in params.split(',') if v]
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'lognormal':
+        import math
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"不支持的延迟分布: {spec}")
+
+
+class MockModelState:
+    """服务器配置与统计"""
+
+    def __init__(self, role='translator', latency='fixed:0.05', error_rate=0.0, model_id='mock-model'):
+        self.role = role
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.model_id = model_id
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def completion_text(self, messages):
+        if self.role == 'evaluator':
+            scores = {key: round(random.uniform(2.5, 5.0), 1) for key in ('accuracy', 'fluency', 'terminology')}
+            scores['overall'] = round(scores['accuracy'] * 0.4 + scores['fluency'] * 0.3 + scores['terminology'] * 0.3, 2)
+            return json.dumps({
+                'accuracy_score': scores['accuracy'],
+                'fluency_score': scores['fluency'],
+                'terminology_score': scores['terminology'],
+                'overall_score': scores['overall'],
+                'comments': '模拟评估结果'
+            }, ensure_ascii=False)
+        return random.choice(SAMPLE_TRANSLATIONS)
+
+
+class MockModelHandler(BaseHTTPRequestHandler):
+    """处理 /health 与任意 chat/completions 风格的 POST 请求"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path.rstrip('/').endswith('/health'):
+            self._send_json(200, {'status': 'ok', 'model_loaded': True, 'model': state.model_id,
+                                  'requests': state.requests, 'errors': state.errors})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            payload = {}
+
+        time.sleep(max(0.0, state.sample_latency()))
+        with state.lock:
+            state.requests += 1
+            failed = random.random() < state.error_rate
+            if failed:
+                state.errors += 1
+        if failed:
+            self._send_json(500, {'error': {'message': '模拟服务器错误', 'type': 'server_error'}})
+            return
+
+        text = state.completion_text(payload.get('messages', []))
+        if payload.get('stream'):
+            self._send_stream(text)
+            return
+        self._send_json(200, {
+            'id': f"chatcmpl-mock-{state.requests}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', state.model_id),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 32, 'completion_tokens': len(text), 'total_tokens': 32 + len(text)}
+        })
+
+    def _send_stream(self, text):
+        """以SSE格式逐字返回"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for char in text:
+            chunk = {'choices': [{'index': 0, 'delta': {'content': char}, 'finish_reason': None}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+def start_mock_server(port, host='127.0.0.1', **state_kwargs):
+    """在后台线程中启动模拟服务器，返回 server 对象（调用 shutdown() 停止）"""
+    server = ThreadingHTTPServer((host, port), MockModelHandler)
+    server.daemon_threads = True
+    server.state = MockModelState(**state_kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI兼容的模拟模型服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--role', choices=['translator', 'evaluator'], default='translator')
+    parser.add_argument('--latency', default='fixed:0.05', help='延迟分布，如 lognormal:0.2,0.5')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--model-id', default='mock-model')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), MockModelHandler)
+    server.daemon_threads = True
+    server.state = MockModelState(role=args.role, latency=args.latency,
+                                  error_rate=args.error_rate, model_id=args.model_id)
+    print(f"🤖 模拟模型服务器 ({args.role}) 监听 http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成评估数据集生成器
+生成与 data/a320_cleaned_translation_sample_20.json 结构一致的数据集（默认 1k/10k/100k 条），
+包含航空手册中常见的重复片段与仅数值/参考号不同的近似片段。
+
+用法:
+    python benchmarks/synthetic_dataset.py --sizes 1000 10000 100000 --output-dir benchmarks/datasets
+"""
+
+import json
+import random
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# (英文模板, 中文模板, 类别, 难度)
+TEMPLATES = [
+    ("This chapter defines:", "本章定义：", "general_maintenance", "easy"),
+    ("Dimensions and areas (Ref. ATA {ata}),", "尺寸和区域(Ref. ATA {ata})，", "general_maintenance", "medium"),
+    ("Access Provisions (Ref. ATA {ata}).", "接近准备(Ref. ATA {ata})。", "access_maintenance", "medium"),
+    ("Overall Length: {mm} mm ({ft} ft.)", "总长： {mm} mm ({ft} ft.)", "general_maintenance", "medium"),
+    ("Width: {mm} mm ({inch} in.)", "宽度：{mm} mm ({inch} in.)", "general_maintenance", "medium"),
+    ("Landing gear", "起落架", "landing_gear", "easy"),
+    ("Check the hydraulic pressure in the landing gear retraction system before flight.",
+     "飞行前检查起落架收放系统的液压压力。", "landing_gear", "medium"),
+    ("Remove the access panel {panel} and make sure that the part number {pn} is installed.",
+     "拆下接近面板{panel}，确认已安装件号为{pn}的部件。", "access_maintenance", "medium"),
+    ("WARNING: MAKE SURE THAT THE SAFETY DEVICES ARE INSTALLED ON THE LANDING GEAR BEFORE YOU DO WORK "
+     "IN THE WHEEL WELLS. IF YOU DO NOT OBEY THIS WARNING, YOU CAN CAUSE INJURY TO PERSONS AND DAMAGE TO EQUIPMENT.",
+     "警告：在轮舱内工作前，确保起落架上安装了安全装置。如不遵守此警告，可能导致人员受伤和设备损坏。",
+     "safety", "hard"),
+    ("Make sure that the torque of the bolts is {torque} N.m and that the safety wire is correctly installed "
+     "in accordance with the Standard Practices (Ref. ATA {ata}). Then do a visual inspection of the area "
+     "for cracks, corrosion and other damage.",
+     "确保螺栓力矩为{torque} N.m，并按照标准施工程序(Ref. ATA {ata})正确安装保险丝。然后对该区域进行目视检查，"
+     "查看是否有裂纹、腐蚀和其他损伤。", "maintenance_procedure", "hard"),
+]
+
+
+def render_pair(index, prefix, rng):
+    """随机选择模板并填充数值/参考号，生成一条翻译对"""
+    source, target, category, difficulty = rng.choice(TEMPLATES)
+    mm = rng.randint(1000, 50000)
+    values = {
+        'ata': f"{rng.randint(5, 80):02d}-{rng.randint(0, 9) * 10:02d}",
+        'mm': mm,
+        'ft': f"{mm / 304.8:.4f}",
+        'inch': f"{mm / 25.4:.4f}",
+        'panel': f"{rng.randint(100, 899)}{rng.choice('ABCDEFGH')}{rng.choice('LR')}",
+        'pn': f"D{rng.randint(10000000, 99999999)}",
+        'torque': rng.randint(5, 120),
+    }
+    return {
+        'id': f"{prefix}_{index:06d}",
+        'source_text': source.format(**values),
+        'reference_translation': target.format(**values),
+        'source_lang': 'en',
+        'target_lang': 'zh',
+        'category': category,
+        'difficulty': difficulty,
+        'context': 'A320飞机维修手册'
+    }
+
+
+def generate_dataset(size, seed=42, prefix='synthetic'):
+    """生成指定条数的数据集（字典形式）"""
+    rng = random.Random(seed)
+    pairs = [render_pair(i + 1, prefix, rng) for i in range(size)]
+    return {
+        'metadata': {
+            'description': f"合成A320维修手册英中翻译评估数据 - {size}条（基准测试用）",
+            'source': 'benchmarks/synthetic_dataset.py',
+            'language_pair': 'en-zh',
+            'domain': 'aviation_maintenance',
+            'aircraft_model': 'A320',
+            'created_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_pairs': size,
+            'seed': seed
+        },
+        'translation_pairs': pairs
+    }
+
+
+def write_dataset(size, output_dir, seed=42):
+    """生成数据集并写入文件，返回文件路径"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"synthetic_{size}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(generate_dataset(size, seed=seed), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成评估数据集')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--output-dir', default=str(Path(__file__).resolve().parent / 'datasets'))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(f"📄 {write_dataset(size, args.output_dir, seed=args.seed)}")
+
+
+if __name__ == '__main__':
+    main()
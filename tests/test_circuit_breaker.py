@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""熔断器状态机"""
+
+import pytest
+
+from web_app.utils import circuit_breaker as cb
+from web_app.utils.task_control import TaskTerminated
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cb.time, 'time', clock.time)
+    return clock
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = cb.CircuitBreaker('m', failure_threshold=3, min_requests=100)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == cb.STATE_CLOSED
+    breaker.record(False)
+    assert breaker.state == cb.STATE_OPEN
+    assert not breaker.allow()
+    assert breaker.skipped == 1
+
+
+def test_opens_on_window_error_rate(clock):
+    breaker = cb.CircuitBreaker('m', failure_threshold=100, error_rate=0.5, window=10, min_requests=4)
+    for success in (True, False, True, False):
+        breaker.record(success)
+    assert breaker.state == cb.STATE_OPEN
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = cb.CircuitBreaker('m', failure_threshold=1, open_seconds=30, half_open_probes=1)
+    breaker.record(False)
+    clock.now += 31
+    assert breaker.allow()
+    assert breaker.state == cb.STATE_HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == cb.STATE_CLOSED
+
+
+def test_half_open_probe_failure_doubles_cooldown(clock):
+    breaker = cb.CircuitBreaker('m', failure_threshold=1, open_seconds=30, max_open_seconds=100)
+    breaker.record(False)
+    for expected in (60, 100):
+        clock.now += breaker.cooldown + 1
+        assert breaker.allow()
+        breaker.record(False)
+        assert breaker.state == cb.STATE_OPEN
+        assert breaker.cooldown == expected
+        assert breaker.retry_in() == pytest.approx(expected)
+
+
+def test_health_check_opens_and_recovers(clock):
+    breaker = cb.CircuitBreaker('m')
+    breaker.update_health(False)
+    assert breaker.state == cb.STATE_OPEN
+    breaker.update_health(True)
+    assert breaker.state == cb.STATE_CLOSED
+
+
+def test_health_recovery_does_not_close_failure_trip(clock):
+    breaker = cb.CircuitBreaker('m', failure_threshold=1)
+    breaker.record(False)
+    breaker.update_health(True)
+    assert breaker.state == cb.STATE_OPEN
+
+
+def test_registry_call_counts_error_results_and_skips_when_open(clock):
+    registry = cb.CircuitBreakerRegistry(failure_threshold=2, min_requests=100)
+
+    class Failed:
+        error_message = 'timeout'
+
+    registry.call('m', lambda: Failed())
+    registry.call('m', lambda: Failed())
+    with pytest.raises(cb.CircuitOpenError):
+        registry.call('m', lambda: 'never called')
+
+
+def test_registry_terminated_call_releases_probe(clock):
+    registry = cb.CircuitBreakerRegistry(failure_threshold=1, open_seconds=10)
+    registry.call('m', lambda: type('R', (), {'error_message': 'x'})())
+    clock.now += 11
+
+    def terminated():
+        raise TaskTerminated('stop')
+
+    with pytest.raises(TaskTerminated):
+        registry.call('m', terminated)
+    breaker = registry.get('m')
+    assert breaker.state == cb.STATE_HALF_OPEN
+    assert breaker.allow()
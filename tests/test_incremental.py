@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""增量重评估：清单比对"""
+
+from web_app.utils.incremental import diff_manifests
+
+
+def manifest(pairs, models, evaluator='e1'):
+    return {'pairs': pairs, 'models': models, 'evaluator': evaluator}
+
+
+def test_unchanged_units_are_reused():
+    baseline = manifest({'p1': 'a', 'p2': 'b'}, {'m1': 'c1'})
+    plan = diff_manifests(baseline, baseline, ['m1'], {('p1', 'm1'), ('p2', 'm1')}, 'base')
+    assert plan.reuse == {('p1', 'm1'), ('p2', 'm1')}
+    assert plan.run == {}
+
+
+def test_changed_added_and_unavailable_pairs_run():
+    baseline = manifest({'p1': 'a', 'p2': 'b', 'p3': 'c', 'gone': 'x'}, {'m1': 'c1'})
+    current = manifest({'p1': 'a', 'p2': 'B', 'p3': 'c', 'p4': 'd'}, {'m1': 'c1'})
+    plan = diff_manifests(current, baseline, ['m1'], {('p1', 'm1'), ('p2', 'm1')})
+    assert plan.reuse == {('p1', 'm1')}
+    assert plan.run == {'p2': ['m1'], 'p3': ['m1'], 'p4': ['m1']}
+    assert plan.changes['pairs_added'] == 1
+    assert plan.changes['pairs_changed'] == 1
+    assert plan.changes['pairs_removed'] == 1
+
+
+def test_model_changes_only_rerun_that_model():
+    baseline = manifest({'p1': 'a'}, {'m1': 'c1', 'm2': 'c2'})
+    current = manifest({'p1': 'a'}, {'m1': 'c1', 'm2': 'c2-new', 'm3': 'c3'})
+    available = {('p1', 'm1'), ('p1', 'm2')}
+    plan = diff_manifests(current, baseline, ['m1', 'm2', 'm3'], available)
+    assert plan.reuse == {('p1', 'm1')}
+    assert plan.run == {'p1': ['m2', 'm3']}
+    assert plan.changes['models_added'] == ['m3']
+    assert plan.changes['models_changed'] == ['m2']
+
+
+def test_evaluator_change_reruns_everything():
+    baseline = manifest({'p1': 'a'}, {'m1': 'c1'})
+    current = manifest({'p1': 'a'}, {'m1': 'c1'}, evaluator='e2')
+    plan = diff_manifests(current, baseline, ['m1'], {('p1', 'm1')})
+    assert plan.reuse == set()
+    assert plan.run == {'p1': ['m1']}
+    assert plan.changes['evaluator_changed']
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""本地预筛选：编辑距离、chrF 与语言检查"""
+
+import pytest
+
+from web_app.utils.prescreen import chrf, edit_distance, ter, language_checks, PrescreenPolicy
+
+
+def reference_edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize('a, b', [
+    ('', ''),
+    ('abc', ''),
+    ('', 'abc'),
+    ('kitten', 'sitting'),
+    ('flaw', 'lawn'),
+    ('intention', 'execution'),
+    ('abcdef', 'fedcba'),
+    ('aaaa', 'aa'),
+])
+def test_edit_distance_matches_dynamic_programming(a, b):
+    assert edit_distance(list(a), list(b)) == reference_edit_distance(a, b)
+
+
+def test_ter_is_normalized_by_reference_length():
+    assert ter(['a', 'b', 'c', 'd'], ['a', 'b', 'c', 'd']) == 0.0
+    assert ter(['a', 'x', 'c', 'd'], ['a', 'b', 'c', 'd']) == 25.0
+    assert ter([], []) == 0.0
+    assert ter(['a'], []) == 100.0
+
+
+def test_chrf_bounds_and_ordering():
+    reference = '检查起落架舱门是否关闭'
+    assert chrf(reference, reference) == 100.0
+    assert chrf('', reference) == 0.0
+    assert chrf('完全无关的文本', reference) < chrf('检查起落架舱门', reference) < 100.0
+
+
+def test_chrf_ignores_whitespace():
+    assert chrf('起落 架', '起落架') == 100.0
+
+
+def test_language_checks():
+    assert language_checks('Remove the panel', '  ') == 'empty'
+    assert language_checks('Remove the panel', 'remove  the panel') == 'untranslated'
+    assert language_checks('Remove the panel', 'Retirer le panneau') == 'wrong_language'
+    assert language_checks('Remove the panel', '拆下面板') is None
+
+
+def test_language_checks_allow_copy_through_references():
+    assert language_checks('P/N 123-456', 'P/N 123-456', reference='P/N 123-456') is None
+    assert language_checks('Remove the panel', 'Remove the panel', reference='拆下面板') == 'untranslated'
+
+
+def test_policy_decides_rules_in_order():
+    policy = PrescreenPolicy(enabled=True, min_chrf=20, min_placeholder_hit_rate=1.0)
+    metrics = {'language_check': None, 'chrf': 50, 'placeholders': {'expected': 2, 'hit_rate': 0.5}}
+    assert policy.decide(metrics) == 'missing_placeholders'
+    assert policy.decide(dict(metrics, chrf=10)) == 'low_chrf'
+    assert policy.decide(dict(metrics, language_check='empty')) == 'empty'
+
+
+class Pair:
+    id = 'p1'
+    source_text = 'Remove the panel'
+    target_text = '拆下面板'
+
+
+class Translation:
+    def __init__(self, text):
+        self.translated_text = text
+        self.model_name = 'm1'
+
+
+def test_screen_skips_metrics_when_disabled_and_keeps_them_only_for_rule_hits():
+    assert PrescreenPolicy(enabled=False).screen(Pair(), Translation('')) is None
+    policy = PrescreenPolicy(enabled=True)
+    assert policy.screen(Pair(), Translation('拆下面板')) is None
+    result = policy.screen(Pair(), Translation(''))
+    assert result.prescreen_reason == 'empty'
+    assert {'chrf', 'bleu', 'ter', 'placeholders'} <= set(result.local_metrics)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""流式提前终止：重复检测、StreamGuard 与 token 用量"""
+
+import json
+import time
+
+from web_app.utils.streaming import (
+    find_repetition, StreamGuard, StreamResult, _consume_stream, stream_chat_completion, ABORT_REPETITION, ABORT_LENGTH
+)
+
+
+def test_find_repetition_detects_tail_loop():
+    text = '检查起落架。' + '重复内容' * 10
+    period, start = find_repetition(text, min_repeats=4, full=True)
+    assert period == 4
+    assert start == len('检查起落架。')
+
+
+def test_find_repetition_ignores_short_or_normal_text():
+    assert find_repetition('abababab', min_repeats=4, min_span=24) is None
+    assert find_repetition('The quick brown fox jumps over the lazy dog.') is None
+
+
+def test_guard_aborts_on_repetition_and_cleans_tail():
+    guard = StreamGuard('Inspect the valve', max_length_ratio=0, check_interval=8)
+    reason = None
+    for _ in range(20):
+        reason = guard.feed('循环片段')
+        if reason:
+            break
+    assert reason == ABORT_REPETITION
+    assert guard.clean_text() == '循环片段'
+
+
+def test_guard_aborts_on_length():
+    guard = StreamGuard('short', max_length_ratio=2.0, min_length=10, min_repeats=0)
+    assert guard.feed('0123456789') is None
+    assert guard.feed('x') == ABORT_LENGTH
+
+
+class FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def sse(payload):
+    return b'data: ' + json.dumps(payload).encode('utf-8')
+
+
+def test_consume_stream_takes_tokens_from_usage_chunk():
+    result = StreamResult()
+    lines = [sse({'choices': [{'delta': {'content': '起落'}}]}),
+             sse({'choices': [{'delta': {'content': '架'}}]}),
+             sse({'choices': [], 'usage': {'prompt_tokens': 12, 'completion_tokens': 7}}),
+             b'data: [DONE]']
+    _consume_stream(FakeResponse(lines), result, None, time.perf_counter())
+    assert result.text == '起落架'
+    assert result.chunks == 2
+    assert result.tokens == 7
+    assert result.prompt_tokens == 12
+
+
+def test_consume_stream_falls_back_to_chunk_count():
+    result = StreamResult()
+    lines = [sse({'choices': [{'delta': {'content': 'a'}}]}), sse({'choices': [{'delta': {'content': 'b'}}]})]
+    _consume_stream(FakeResponse(lines), result, None, time.perf_counter())
+    assert result.tokens == 2
+    assert not result.usage_reported
+
+
+class FakeStreamingPost:
+    """替代 requests.post：记录请求体，返回固定的SSE数据行"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.payload = None
+
+    def __call__(self, url, json=None, **kwargs):
+        self.payload = json
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+class FakeModelConfig:
+    base_url = 'http://127.0.0.1:1/v1'
+    model_id = 'm'
+    api_key = 'local'
+    temperature = 0.7
+    top_p = 0.8
+    max_tokens = 100
+    penalty_score = 1
+    enable_thinking = False
+
+
+def test_stream_request_passes_model_parameters_and_survives_one_token_abort(monkeypatch):
+    import requests
+
+    # 服务端在中途报告 usage=1，之后的数据块触发长度终止（chunks=2, tokens=1）
+    fake = FakeStreamingPost([sse({'choices': [{'delta': {'content': 'abc'}}], 'usage': {'completion_tokens': 1}}),
+                              sse({'choices': [{'delta': {'content': 'x' * 80}}]})])
+    monkeypatch.setattr(requests, 'post', fake)
+    result = stream_chat_completion(FakeModelConfig(), [], StreamGuard('ab', max_length_ratio=2.0, min_length=10))
+    assert fake.payload['penalty_score'] == 1
+    assert fake.payload['enable_thinking'] is False
+    assert 'presence_penalty' not in fake.payload
+    assert result.abort_reason == ABORT_LENGTH
+    assert result.saved_seconds == 0.0
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""术语检查：Aho-Corasick 匹配与重叠处理"""
+
+from web_app.utils.terminology import AhoCorasick, TerminologyChecker, TerminologyStats, tokenize_words
+
+
+def build_automaton(patterns):
+    automaton = AhoCorasick()
+    for index, pattern in enumerate(patterns):
+        automaton.add(pattern, index)
+    automaton.build()
+    return automaton
+
+
+def test_aho_corasick_finds_all_overlapping_matches():
+    automaton = build_automaton(['he', 'she', 'his', 'hers'])
+    matches = sorted((end, pattern_id) for end, pattern_id, _ in automaton.iter_matches('ushers'))
+    assert matches == [(3, 0), (3, 1), (5, 3)]
+
+
+def test_aho_corasick_matches_word_sequences():
+    automaton = build_automaton([('landing', 'gear'), ('gear',), ('landing', 'gear', 'door')])
+    words = tokenize_words('Close the landing gear door.')
+    found = {(pattern_id, length) for _, pattern_id, length in automaton.iter_matches(words)}
+    assert found == {(0, 2), (1, 1), (2, 3)}
+
+
+def test_find_terms_keeps_longest_non_overlapping_match():
+    checker = TerminologyChecker()
+    checker.build([('landing gear', '起落架'), ('gear', '齿轮'), ('landing gear door', '起落架舱门'),
+                   ('door', '门')])
+    found = [checker.terms[pattern_id][0] for pattern_id in checker.find_terms('Open landing gear door and gear')]
+    assert found == ['landing gear door', 'gear']
+
+
+def test_find_terms_requires_whole_words():
+    checker = TerminologyChecker()
+    checker.build([('gear', '齿轮')])
+    assert checker.find_terms('gearbox gears') == []
+
+
+def test_build_merges_duplicate_terms_and_split_targets():
+    checker = TerminologyChecker()
+    checker.build([('Hydraulic', '液压|液压的'), ('hydraulic', ['液力']), ('', '空'), ('valve', [])])
+    assert len(checker) == 1
+    assert checker.terms[0][1] == ['液压', '液压的', '液力']
+
+
+def test_check_reports_hits_and_misses():
+    checker = TerminologyChecker()
+    checker.build([('landing gear', '起落架'), ('hydraulic pump', ['液压泵'])])
+    result = checker.check('Inspect the landing gear and hydraulic pump', '检查起落架和油泵')
+    assert result['hits'] == ['landing gear']
+    assert result['missing'] == ['hydraulic pump']
+    assert result['hit_rate'] == 0.5
+    assert checker.check('No terms here', '')['hit_rate'] == 1.0
+
+
+def test_stats_summary_counts_shared_results():
+    stats = TerminologyStats()
+    stats.update({'hits': ['landing gear'], 'missing': ['hydraulic pump']}, count=3)
+    summary = stats.summary()
+    assert summary['occurrences'] == 6
+    assert summary['hit_rate'] == 0.5
+    assert [item['term'] for item in summary['most_missed']] == ['hydraulic pump']
+
+
+def test_glossary_digest_tracks_content():
+    checker = TerminologyChecker()
+    assert checker.digest is None
+    checker.build([('landing gear', '起落架')])
+    first = checker.digest
+    checker.build([('landing gear', '起落架')])
+    assert checker.digest == first
+    checker.build([('landing gear', '起落架|着陆装置')])
+    assert checker.digest != first
+
+
+def test_check_batch_matches_per_pair_checks_in_one_scan():
+    checker = TerminologyChecker()
+    checker.build([('landing gear', '起落架'), ('gear door', '舱门'), ('hydraulic pump', '液压泵')])
+    items = [('Inspect the landing', '检查'), ('gear door and hydraulic pump', '舱门和油泵'),
+             ('Inspect the landing', '检查着陆'), ('landing gear', '起落架')]
+    stats = checker.check_batch(items, counts=[1, 2, 1, 3])
+    expected = TerminologyStats()
+    for (source, candidate), count in zip(items, [1, 2, 1, 3]):
+        expected.update(checker.check(source, candidate), count=count)
+    assert stats.terms == expected.terms
+    # 术语不会跨越相邻两条原文匹配（"landing" + "gear door"）
+    assert stats.terms['landing gear'] == {'occurrences': 3, 'hits': 3}
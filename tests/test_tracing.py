@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""模型调用span按HTTP区间拆分阶段"""
+
+import time
+
+from web_app.utils.tracing import Tracer
+
+
+def exported(tracer):
+    return {span.name: span for span in tracer._buffer}
+
+
+def test_phased_splits_around_http_spans():
+    tracer = Tracer(enabled=True)
+    with tracer.phased('translate_single', model='m'):
+        time.sleep(0.002)
+        with tracer.span('http.wait'):
+            time.sleep(0.002)
+        time.sleep(0.002)
+    spans = exported(tracer)
+    parent, http = spans['translate_single'], spans['http.wait']
+    build, parse = spans['prompt.build'], spans['response.parse']
+    assert build.parent_id == parse.parent_id == http.parent_id == parent.span_id
+    assert build.start_ns == parent.start_ns and build.end_ns == http.start_ns
+    assert parse.start_ns == http.end_ns and parse.end_ns <= parent.end_ns
+
+
+def test_phased_without_http_records_single_span():
+    tracer = Tracer(enabled=True)
+    with tracer.phased('evaluate_single'):
+        pass
+    assert set(exported(tracer)) == {'evaluate_single'}
+    disabled = Tracer()
+    with disabled.phased('evaluate_single') as span:
+        span.set_attribute('x', 1)
+    assert disabled._buffer == []
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""翻译记忆：占位符模板、占位符替换与近似检索"""
+
+from web_app.utils.translation_memory import (
+    extract_placeholders, substitute_placeholders, TranslationMemoryIndex
+)
+
+
+def test_extract_placeholders_masks_references_part_numbers_and_numbers():
+    template, tokens = extract_placeholders('Refer to ATA 32-10-00 and replace P/N 65-4411 at 25 psi')
+    assert tokens == ['ATA 32-10-00', '65-4411', '25']
+    assert template == 'refer to # and replace p/n # at # psi'
+
+
+def test_substitute_placeholders_replaces_in_order():
+    translation = '参见ATA 32-10-00，在25 psi下更换件号65-4411'
+    adapted = substitute_placeholders(translation, ['ATA 32-10-00', '65-4411', '25'],
+                                      ['ATA 29-11-00', '65-4412', '30'])
+    assert adapted == '参见ATA 29-11-00，在30 psi下更换件号65-4412'
+
+
+def test_substitute_placeholders_swaps_values_without_collision():
+    assert substitute_placeholders('从10调到20', ['10', '20'], ['20', '10']) == '从20调到10'
+
+
+def test_substitute_placeholders_prefers_longer_tokens():
+    assert substitute_placeholders('面板06-10与06', ['06-10', '06'], ['07-11', '08']) == '面板07-11与08'
+
+
+def test_substitute_placeholders_rejects_unsafe_substitution():
+    assert substitute_placeholders('译文', ['10'], ['10', '20']) is None
+    assert substitute_placeholders('没有数值的译文', ['10'], ['20']) is None
+
+
+def test_find_reusable_adapts_placeholders():
+    index = TranslationMemoryIndex()
+    index.add('Torque the bolt to 25 Nm', 'm1', '将螺栓拧紧至25 Nm', 4.5)
+    translation, neighbor = index.find_reusable('Torque the bolt to 30 Nm', 'm1', threshold=0.9)
+    assert translation == '将螺栓拧紧至30 Nm'
+    assert neighbor['same_template']
+    assert index.find_reusable('Torque the bolt to 30 Nm', 'other-model', threshold=0.9) is None
+
+
+def test_index_keeps_best_score_and_ignores_low_scores():
+    index = TranslationMemoryIndex(min_score=3.0)
+    index.add('Close the door', 'm1', '关门', 4.0)
+    index.add('Close the door', 'm1', '关上门', 3.5)
+    index.add('Open the door', 'm1', '开门', 2.0)
+    assert len(index) == 1
+    assert index.query('Close the door', k=1)[0]['translations']['m1']['translated_text'] == '关门'
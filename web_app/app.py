@@ -9,59 +9,82 @@ import sys
 import json
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-# 添加Qwen API客户端支持
-sys.path.append(str(Path(__file__).parent.parent))
-from qwen_api_client import QwenAPIClient
+from urllib.parse import urlencode
 
-from flask import Flask, render_template, request, jsonify, session, flash, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.utils import secure_filename
-import asyncio
-from threading import Thread
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait, FIRST_COMPLETED
+from collections import deque
 import uuid
+import copy
+import hashlib
+from contextlib import contextmanager
 
 # 添加父目录到路径，以便导入核心模块
+# 注意：翻译/评估引擎等重量级核心模块在首次使用时才导入，以缩短冷启动时间
 sys.path.append(str(Path(__file__).parent.parent))
 
-from translation_evaluation_config import TranslationEvaluationConfig, ModelConfig
-from translation_data_manager import TranslationDataManager, TranslationPair
-from translation_engine import SpecializedTranslationEngine
-from evaluation_engine import EvaluationEngine
-from local_model_manager import local_model_manager, initialize_local_models
-
 # 导入新的监控工具
 from web_app.utils.performance_monitor import performance_monitor
+from web_app.utils.metric_sampler import parse_resolutions
+from web_app.utils.hedging import hedging_policy
+from web_app.utils.replica_pool import replica_pools
+from web_app.utils.model_lifecycle import model_lifecycle
+from web_app.utils.dedup import group_duplicate_pairs, dedup_stats, normalize_text
+from web_app.utils.translation_memory import translation_memory, ReusedTranslation
+from web_app.utils.prescreen import prescreen_policy
+from web_app.utils.scheduler import LengthAwareScheduler
+from web_app.utils.progress import task_progress
+from web_app.utils.sharding import shard_coordinator
+from web_app.utils.shared_state import shared_state
+from web_app.utils.task_control import task_controls, bind_task_control, TaskTerminated
+from web_app.utils.circuit_breaker import circuit_breakers, CircuitOpenError
+from web_app.utils.load_test import load_tester, DEFAULT_LEVELS
+from web_app.utils.http_cache import response_cache, make_etag, not_modified, TERMINAL_STATUSES
+from web_app.utils.tracing import tracer, sampling_profiler
+from web_app.utils.score_analytics import score_analytics, item_key, METRICS
+from web_app.utils.text_store import text_interner, compress_text, decompress_text
+from web_app.utils.incremental import build_manifest, diff_manifests, pair_fingerprint, config_fingerprint
+from web_app.utils.terminology import terminology_checker, TerminologyStats
+from web_app.utils.streaming import (
+    streaming_policy, StreamingTranslationEngine, StreamTaskStats
+)
 from utils.log_manager import log_manager
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'aviation-translation-evaluation-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///aviation_translation.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///aviation_translation.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
 
 db = SQLAlchemy(app)
+# 超过最小长度的 JSON/HTML 响应按 Accept-Encoding 压缩（见 utils/http_cache.py）
+app.after_request(response_cache.compress_response)
 
 # 全局变量存储系统组件
 translation_system = None
 config_manager = None
+config_path = None  # 模型配置文件路径，其修改时间作为 /api/models 与主页的缓存版本
 data_manager = None
 translation_engine = None
 evaluation_engine = None
 
-# 任务状态存储和控制
-active_tasks = {}
-task_control_flags = {}  # 任务控制标志：{task_id: {'paused': bool, 'terminated': bool}}
+# 任务控制标志（暂停/终止）、实时进度、日志与性能统计保存在共享状态中（见 utils/shared_state.py），
+# gunicorn 多进程部署时任一进程收到的控制请求都能作用于其他进程中运行的任务；
+# 本进程运行的任务通过 utils/task_control.py 中的条件变量即时响应暂停/终止
 
 class EvaluationTask(db.Model):
     """评估任务数据模型"""
     id = db.Column(db.String(36), primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # 任务列表按创建时间倒序分页
     completed_at = db.Column(db.DateTime)
     data_file = db.Column(db.String(500))
     results_file = db.Column(db.String(500))
@@ -69,24 +92,137 @@ class EvaluationTask(db.Model):
     total_pairs = db.Column(db.Integer, default=0)
     error_message = db.Column(db.Text)
 
+class TextBlob(db.Model):
+    """去重文本：按内容SHA1寻址，结果表通过id引用（同一文本在各模型、各次重跑之间只存一份）"""
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(40), nullable=False, unique=True)
+    text = db.Column(db.Text, nullable=False)
+
+# 结果表中以 TextBlob id 保存的文本字段
+TEXT_FIELDS = ('source_text', 'target_text', 'translated_text')
+
 class TranslationResult(db.Model):
-    """翻译结果数据模型"""
+    """翻译结果数据模型（文本存放在 TextBlob 中，evaluation_details 压缩保存）"""
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.String(36), db.ForeignKey('evaluation_task.id'), nullable=False)
     pair_id = db.Column(db.String(100), nullable=False)
+    source_text_id = db.Column(db.Integer, db.ForeignKey('text_blob.id'), nullable=False)
+    target_text_id = db.Column(db.Integer, db.ForeignKey('text_blob.id'), nullable=False)
+    model_name = db.Column(db.String(100), nullable=False)
+    translated_text_id = db.Column(db.Integer, db.ForeignKey('text_blob.id'))
+    accuracy_score = db.Column(db.Float)
+    fluency_score = db.Column(db.Float)
+    terminology_score = db.Column(db.Float)
+    overall_score = db.Column(db.Float)
+    evaluation_details_blob = db.Column(db.LargeBinary)  # 压缩后的JSON格式详细评估信息
+    
+    source_blob = db.relationship(TextBlob, foreign_keys=[source_text_id])
+    target_blob = db.relationship(TextBlob, foreign_keys=[target_text_id])
+    translated_blob = db.relationship(TextBlob, foreign_keys=[translated_text_id])
+    
+    # 每个任务中每条翻译对×模型只有一行：分布式结果回传按此唯一约束 INSERT ... ON CONFLICT 幂等写入
+    __table_args__ = (db.UniqueConstraint('task_id', 'pair_id', 'model_name', name='uq_translation_result_task_pair_model'),)
+    
+    @classmethod
+    def from_row(cls, row, text_ids):
+        """由 outcome_rows 生成的字段字典创建结果，text_ids 为 intern_result_texts 的返回值"""
+        result = cls()
+        result.assign(row, text_ids)
+        return result
+    
+    def assign(self, row, text_ids):
+        # 写入时的文本保留在实例上，本次会话内读取无需再查询文本表
+        texts = self.__dict__.setdefault('_texts', {})
+        for key, value in row.items():
+            if key in TEXT_FIELDS:
+                setattr(self, f"{key}_id", text_ids.get(value))
+                texts[key] = value
+            elif key == 'evaluation_details':
+                self.evaluation_details_blob = compress_text(value)
+            else:
+                setattr(self, key, value)
+    
+    def _text(self, field):
+        texts = self.__dict__.get('_texts')
+        if texts and field in texts:
+            return texts[field]
+        blob = getattr(self, field.replace('_text', '_blob'))
+        return blob.text if blob is not None else None
+    
+    @property
+    def source_text(self):
+        return self._text('source_text')
+    
+    @property
+    def target_text(self):
+        return self._text('target_text')
+    
+    @property
+    def translated_text(self):
+        return self._text('translated_text')
+    
+    @property
+    def evaluation_details(self):
+        return decompress_text(self.evaluation_details_blob)
+    
+    @classmethod
+    def with_texts(cls, query):
+        """批量预加载文本（生成报告、导出明细时使用，避免逐行查询文本表）"""
+        return query.options(db.selectinload(cls.source_blob), db.selectinload(cls.target_blob),
+                             db.selectinload(cls.translated_blob))
+
+class TranslationMemoryEntry(db.Model):
+    """翻译记忆条目：每条唯一原文、每个模型保留得分最高的译文"""
+    id = db.Column(db.Integer, primary_key=True)
+    source_key = db.Column(db.String(40), nullable=False, index=True)  # 规范化原文的SHA1
     source_text = db.Column(db.Text, nullable=False)
-    target_text = db.Column(db.Text, nullable=False)
     model_name = db.Column(db.String(100), nullable=False)
-    translated_text = db.Column(db.Text)
+    translated_text = db.Column(db.Text, nullable=False)
+    overall_score = db.Column(db.Float)
+    task_id = db.Column(db.String(36))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ScoreLabel(db.Model):
+    """评分分析表的维度编码（模型/类别/难度 -> 整数）"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    value = db.Column(db.String(200), nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('kind', 'value', name='uq_score_label_kind_value'),)
+
+class ScoreRecord(db.Model):
+    """评分分析表：TranslationResult 中评分与元数据的紧凑镜像（不含文本，维度为整数编码）"""
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.String(36), nullable=False, index=True)
+    item_key = db.Column(db.BigInteger, nullable=False)  # 规范化原文SHA1的前60位，跨任务对齐同一原文
+    model_id = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, nullable=False)
+    difficulty_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.Float, nullable=False)  # Unix时间戳
     accuracy_score = db.Column(db.Float)
     fluency_score = db.Column(db.Float)
     terminology_score = db.Column(db.Float)
     overall_score = db.Column(db.Float)
-    evaluation_details = db.Column(db.Text)  # JSON格式的详细评估信息
+
+class TaskManifest(db.Model):
+    """任务清单：数据集内容键与模型配置指纹（增量重评估时与基准任务比对）"""
+    task_id = db.Column(db.String(36), db.ForeignKey('evaluation_task.id'), primary_key=True)
+    baseline_task_id = db.Column(db.String(36))
+    pairs_blob = db.Column(db.LargeBinary, nullable=False)  # 压缩后的 {pair_id: 内容键}
+    models = db.Column(db.Text, nullable=False)  # JSON {模型: 配置指纹}
+    evaluator = db.Column(db.String(40))
+    
+    @property
+    def manifest(self):
+        return {
+            'pairs': json.loads(decompress_text(self.pairs_blob)),
+            'models': json.loads(self.models),
+            'evaluator': self.evaluator
+        }
 
 def initialize_system():
     """初始化翻译评估系统"""
-    global translation_system, config_manager, data_manager, translation_engine, evaluation_engine
+    global translation_system, config_manager, config_path, data_manager, translation_engine, evaluation_engine
     
     try:
         # 创建必要的目录
@@ -94,9 +230,13 @@ def initialize_system():
         os.makedirs('results', exist_ok=True)
         os.makedirs('logs', exist_ok=True)
         
+        from translation_evaluation_config import TranslationEvaluationConfig
+        from translation_data_manager import TranslationDataManager
+        
         # 初始化配置管理器
         config_file = Path(__file__).parent.parent / 'translation_config.json'
         config_manager = TranslationEvaluationConfig(str(config_file))
+        config_path = config_file
         if config_file.exists():
             config_manager.load_config()
 
@@ -133,42 +273,118 @@ def initialize_system():
         except Exception as _e:
             logging.warning(f"环境变量覆盖配置失败: {_e}")
         
+        # 跨进程共享状态（SQLite WAL），日志与性能统计同时写入共享存储
+        shared_state.configure(
+            path=os.getenv('SHARED_STATE_DB', os.path.join(app.instance_path, 'shared_state.db')),
+            max_logs=int(os.getenv('SHARED_STATE_MAX_LOGS', '2000'))
+        )
+        log_manager.attach_store(shared_state)
+        performance_monitor.attach_store(shared_state)
+        
+        # 配置本地模型对冲请求策略（默认关闭）
+        hedging_policy.configure(
+            enabled=os.getenv('HEDGING_ENABLED', 'false').lower() == 'true',
+            percentile=float(os.getenv('HEDGING_PERCENTILE', '95')),
+            min_samples=int(os.getenv('HEDGING_MIN_SAMPLES', '20')),
+            max_hedges=int(os.getenv('HEDGING_MAX_CONCURRENT', '4'))
+        )
+        
+        # 翻译记忆只保存评估通过且评分不低于 TM_MIN_SCORE 的译文
+        translation_memory.configure(min_score=float(os.getenv('TM_MIN_SCORE', '3.5')))
+        
+        # 配置本地预筛选规则（默认关闭）：明显失败的译文不再调用评估模型
+        prescreen_policy.configure(
+            enabled=os.getenv('PRESCREEN_ENABLED', 'false').lower() == 'true',
+            min_chrf=float(os.getenv('PRESCREEN_MIN_CHRF', '0')),
+            min_placeholder_hit_rate=float(os.getenv('PRESCREEN_MIN_PLACEHOLDER_HIT_RATE', '0')),
+            min_terminology_hit_rate=float(os.getenv('PRESCREEN_MIN_TERMINOLOGY_HIT_RATE', '0'))
+        )
+        
+        # 流式提前终止（默认关闭）：开启后翻译/评估改用流式客户端，出现重复循环、超长输出或评分JSON已完整时断开
+        streaming_policy.configure(
+            enabled=os.getenv('STREAM_EARLY_ABORT', 'false').lower() == 'true',
+            max_length_ratio=float(os.getenv('STREAM_MAX_LENGTH_RATIO', '4')),
+            min_repeats=int(os.getenv('STREAM_REPETITION_MIN_REPEATS', '4')),
+            include_usage=os.getenv('STREAM_INCLUDE_USAGE', 'true').lower() == 'true'
+        )
+        
+        # 按模型熔断：连续失败或错误率超过阈值、或本地模型健康检查失败时跳过该模型，冷却后半开探测
+        circuit_breakers.configure(
+            enabled=os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true',
+            failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+            error_rate=float(os.getenv('CIRCUIT_ERROR_RATE', '0.5')),
+            window=int(os.getenv('CIRCUIT_WINDOW', '20')),
+            open_seconds=float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+        )
+        
+        # 热路径追踪（默认关闭）：各阶段耗时以 OTLP/JSON 格式写入本地文件或发送到 OTLP 收集器
+        tracer.configure(
+            enabled=os.getenv('TRACING_ENABLED', 'false').lower() == 'true',
+            export_path=os.getenv('TRACING_EXPORT_FILE', os.path.join('logs', 'traces.jsonl')),
+            otlp_endpoint=os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', '')
+        )
+        
+        # 分布式评估（可选）：coordinator 模式下任务切分为分片，由 web_app/worker.py 工作节点拉取执行
+        shard_coordinator.configure(
+            enabled=os.getenv('EVALUATION_MODE', 'local').lower() == 'coordinator',
+            shard_size=int(os.getenv('SHARD_SIZE', '20')),
+            lease_seconds=int(os.getenv('SHARD_LEASE_SECONDS', '300')),
+            token=os.getenv('WORKER_TOKEN', ''),
+            is_paused=task_controls.is_paused
+        )
+        
+        # 读多写少接口的条件请求、已结束任务报告的进程内缓存与响应压缩（gzip，安装 brotli 时优先 br）
+        response_cache.configure(
+            max_bytes=int(float(os.getenv('RESPONSE_CACHE_MB', '64')) * 1024 * 1024),
+            compression=os.getenv('RESPONSE_COMPRESSION', 'true').lower() == 'true',
+            min_compress_bytes=int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+        )
+        
+        # 加载航空术语表（可选），编译为术语自动机供本地术语检查使用
+        glossary_path = os.getenv('TERMINOLOGY_GLOSSARY', '')
+        if glossary_path:
+            try:
+                terminology_checker.load_glossary(glossary_path)
+            except Exception as e:
+                logging.warning(f"加载术语表失败: {e}")
+        
         # 初始化数据管理器
         data_manager = TranslationDataManager()
         
-        # 初始化翻译引擎
-        translation_engine = SpecializedTranslationEngine()
-        
-        # 初始化本地模型
-        initialize_local_models()
+        # 翻译引擎在首次使用时创建（见 get_translation_engine）
+        translation_engine = None
         
         # 初始化评估引擎 (稍后配置)
         evaluation_engine = None
         
-        # 启动性能监控
+        # 启动性能监控：按 METRIC_SAMPLE_INTERVAL 秒采样系统与进程资源，按 METRIC_RESOLUTIONS（步长秒:保留点数）降采样保存
+        performance_monitor.configure(
+            sample_interval=float(os.getenv('METRIC_SAMPLE_INTERVAL', '1')),
+            resolutions=parse_resolutions(os.getenv('METRIC_RESOLUTIONS', '1:600,10:720,60:1440'))
+        )
         performance_monitor.start_monitoring()
-        # 注册两个本地模型端点用于监控
-        performance_monitor.register_local_model('gemma-3-270m', 'http://127.0.0.1:8081')
-        performance_monitor.register_local_model('qwen2.5-0.5b-instruct', 'http://127.0.0.1:8082')
-        performance_monitor.register_local_model('qwen3-0.6b', 'http://127.0.0.1:8084')
-        # 新增：注册 ERNIE-4.5-0.3B-PT 本地服务（MPS）
-        performance_monitor.register_local_model('ernie-4.5-0.3b-pt', 'http://127.0.0.1:8083')
-        
-        # 尝试预启动本地模型（避免首次调用时启动失败）
-        try:
-            from local_model_manager import local_model_manager as _mgr
-            _mgr.start_model("qwen2.5-0.5b-instruct")
-            _mgr.start_model("ernie-4.5-0.3b-pt")
-            _mgr.start_model("gemma-3-270m")
-            _mgr.start_model("qwen3-0.6b")
-        except Exception as _e:
-            logging.warning(f"预启动本地模型失败: {_e}")
+        # 按配置构建本地模型副本池，并注册全部副本端点用于监控
+        configure_local_models(config_file)
+        
+        # 本地模型改为按需启动：任务首次选中时并行启动，空闲超时后自动停止
+        model_lifecycle.configure(
+            idle_timeout=int(os.getenv('LOCAL_MODEL_IDLE_TIMEOUT', '900')),
+            startup_timeout=int(os.getenv('LOCAL_MODEL_STARTUP_TIMEOUT', '180'))
+        )
+        preload = [key.strip() for key in os.getenv('LOCAL_MODELS_PRELOAD', '').split(',') if key.strip()]
+        if preload:
+            model_lifecycle.ensure_started(preload, wait=False)
 
         # 移除示例性能数据，改为仅记录真实调用
         
-        # 创建数据库表
+        # 创建数据库表（旧版结果表先迁移为文本去重存储）
         with app.app_context():
+            migrate_text_storage()
             db.create_all()
+            ensure_result_unique_key()
+            # 旧数据库中表已存在时 create_all 不会补建索引
+            for index in (*TranslationResult.__table__.indexes, *EvaluationTask.__table__.indexes):
+                index.create(db.engine, checkfirst=True)
         
         logging.info("Web系统初始化完成")
         return True
@@ -177,9 +393,192 @@ def initialize_system():
         logging.error(f"系统初始化失败: {e}")
         return False
 
+@contextmanager
+def _migration_lock():
+    """跨进程互斥（gunicorn 各工作进程同时执行 initialize_system 时只有一个进程迁移）"""
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, 'migration.lock'), 'w') as lock_file:
+        try:
+            import fcntl
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        yield
+
+def ensure_result_unique_key():
+    """旧数据库的结果表补建 (task_id, pair_id, model_name) 唯一索引（先删除重复行，保留最新一行）"""
+    import sqlalchemy as sa
+    
+    table = TranslationResult.__table__
+    name = 'uq_translation_result_task_pair_model'
+    
+    def has_unique_key():
+        inspector = sa.inspect(db.engine)
+        return any(item['name'] == name for item in
+                   inspector.get_unique_constraints(table.name) + inspector.get_indexes(table.name))
+    
+    if has_unique_key():
+        return
+    with _migration_lock():
+        if has_unique_key():
+            return
+        latest = sa.select(sa.func.max(table.c.id)).group_by(table.c.task_id, table.c.pair_id, table.c.model_name)
+        with db.engine.begin() as conn:
+            removed = conn.execute(table.delete().where(table.c.id.not_in(latest))).rowcount
+            conn.execute(sa.text('DROP INDEX IF EXISTS ix_translation_result_task_pair_model'))
+            sa.Index(name, table.c.task_id, table.c.pair_id, table.c.model_name, unique=True).create(conn)
+        logging.info(f"结果表已补建唯一索引 {name}（删除重复行 {removed} 条）")
+
+def migrate_text_storage(batch_size=5000):
+    """将内联保存文本的旧版结果表迁移为 TextBlob 引用 + 压缩 evaluation_details，完成后 VACUUM 回收空间
+
+    按 id 分批提交，中途中断后再次启动会从已迁移的最大 id 继续。
+    """
+    import sqlalchemy as sa
+    
+    def needs_migration():
+        inspector = sa.inspect(db.engine)
+        if inspector.has_table('translation_result_legacy'):
+            return True
+        return inspector.has_table('translation_result') and \
+            'source_text' in {column['name'] for column in inspector.get_columns('translation_result')}
+    
+    if not needs_migration():
+        return 0
+    with _migration_lock():
+        if not needs_migration():
+            return 0
+        logging.info("迁移结果表为文本去重存储...")
+        inspector = sa.inspect(db.engine)
+        if not inspector.has_table('translation_result_legacy'):
+            with db.engine.begin() as conn:
+                conn.execute(sa.text('DROP INDEX IF EXISTS ix_translation_result_task_pair_model'))
+                conn.execute(sa.text('ALTER TABLE translation_result RENAME TO translation_result_legacy'))
+        TextBlob.__table__.create(db.engine, checkfirst=True)
+        TranslationResult.__table__.create(db.engine, checkfirst=True)
+        text_interner.configure(db.engine, TextBlob.__table__)
+        legacy = sa.Table('translation_result_legacy', sa.MetaData(), autoload_with=db.engine)
+        target = TranslationResult.__table__
+        with db.engine.connect() as conn:
+            last_id = conn.execute(sa.select(sa.func.max(target.c.id))).scalar() or 0
+        migrated = 0
+        while True:
+            with db.engine.connect() as conn:
+                rows = conn.execute(legacy.select().where(legacy.c.id > last_id)
+                                    .order_by(legacy.c.id).limit(batch_size)).mappings().all()
+            if not rows:
+                break
+            text_ids = text_interner.intern(row[field] for row in rows for field in TEXT_FIELDS)
+            with db.engine.begin() as conn:
+                conn.execute(target.insert(), [{
+                    'id': row['id'],
+                    'task_id': row['task_id'],
+                    'pair_id': row['pair_id'],
+                    'source_text_id': text_ids[row['source_text']],
+                    'target_text_id': text_ids[row['target_text']],
+                    'model_name': row['model_name'],
+                    'translated_text_id': text_ids.get(row['translated_text']),
+                    'accuracy_score': row['accuracy_score'],
+                    'fluency_score': row['fluency_score'],
+                    'terminology_score': row['terminology_score'],
+                    'overall_score': row['overall_score'],
+                    'evaluation_details_blob': compress_text(row['evaluation_details'])
+                } for row in rows])
+            last_id = rows[-1]['id']
+            migrated += len(rows)
+        with db.engine.begin() as conn:
+            conn.execute(sa.text('DROP TABLE translation_result_legacy'))
+        if db.engine.dialect.name == 'sqlite':
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(sa.text('VACUUM'))
+        logging.info(f"结果表迁移完成，共 {migrated} 条")
+        return migrated
+
+def intern_result_texts(rows):
+    """将结果字段字典中的文本写入文本表，返回 {文本: 文本id}（需在应用上下文中调用）"""
+    if text_interner.engine is None:
+        text_interner.configure(db.engine, TextBlob.__table__)
+    return text_interner.intern(row.get(field) for row in rows for field in TEXT_FIELDS)
+
+def configure_local_models(config_file):
+    """登记本地模型，并根据配置文件中的 replica_pools 建立副本池
+
+    未配置副本的本地模型使用其 base_url 作为唯一副本。模型此时不会启动。
+    """
+    pools_config = {}
+    try:
+        if Path(config_file).exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                pools_config = json.load(f).get('replica_pools', {}) or {}
+    except Exception as e:
+        logging.warning(f"读取副本池配置失败: {e}")
+    
+    for model_key, model_config in config_manager.translation_models.items():
+        if model_config.api_key != 'local':
+            continue
+        model_lifecycle.register(model_key, model_config.model_id)
+        urls = pools_config.get(model_key) or [model_config.base_url]
+        pool = replica_pools.configure_pool(model_key, urls)
+        if not pool:
+            continue
+        for index, replica in enumerate(pool.replicas):
+            name = model_config.model_id if len(pool.replicas) == 1 else f"{model_config.model_id}#{index + 1}"
+            performance_monitor.register_local_model(name, replica.url)
+    replica_pools.start_health_checks()
+
+_engine_lock = Lock()
+
+def get_translation_engine():
+    """获取翻译引擎，首次调用时才导入并创建"""
+    global translation_engine
+    if translation_engine is None:
+        with _engine_lock:
+            if translation_engine is None and streaming_policy.enabled:
+                translation_engine = StreamingTranslationEngine(streaming_policy, performance_monitor)
+            elif translation_engine is None:
+                from translation_engine import SpecializedTranslationEngine
+                translation_engine = SpecializedTranslationEngine()
+    return translation_engine
+
+def configure_translation_models(selected_models):
+    """向翻译引擎注册选中的模型；本地模型的每个副本以独立标识注册"""
+    for model_key in selected_models:
+        if model_key not in config_manager.translation_models:
+            continue
+        model_config = config_manager.translation_models[model_key]
+        engine = get_translation_engine()
+        engine.add_model(model_key, model_config)
+        pool = replica_pools.get(model_key)
+        if pool:
+            for replica in pool.replicas:
+                replica_config = copy.copy(model_config)
+                replica_config.base_url = replica.url
+                engine.add_model(replica.engine_key, replica_config)
+
+def config_version():
+    """模型配置版本：(配置文件修改时间纳秒数, 修改时间)，文件不存在时为 (0, None)"""
+    try:
+        mtime_ns = os.stat(config_path).st_mtime_ns if config_path else 0
+    except OSError:
+        mtime_ns = 0
+    return mtime_ns, datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc) if mtime_ns else None
+
+def task_version(task):
+    """任务版本（状态、进度、完成时间变化时改变），用作任务相关响应的 ETag"""
+    return make_etag(task.id, task.status, task.progress, task.completed_at.isoformat() if task.completed_at else '')
+
 @app.route('/')
 def index():
-    """主页 - 集成所有功能的单页面应用"""
+    """主页 - 集成所有功能的单页面应用（模型配置与最近任务未变化时返回304，不重新渲染）"""
+    # 获取最近的任务
+    recent_tasks = EvaluationTask.query.order_by(EvaluationTask.created_at.desc()).limit(5).all()
+    template = os.path.join(app.root_path, app.template_folder, 'index.html')
+    server_push = app.config.get('SERVER_PUSH', False)
+    etag = make_etag(config_version()[0], os.stat(template).st_mtime_ns, server_push,
+                     *(task_version(task) for task in recent_tasks))
+    if not_modified(etag):
+        return response_cache.set_validators(app.response_class(status=304), etag, None, 0)
+    
     # 获取可用的翻译模型
     available_models = []
     if config_manager:
@@ -195,29 +594,32 @@ def index():
     if config_manager and config_manager.evaluation_model:
         evaluation_model_configured = bool(config_manager.evaluation_model.api_key)
     
-    # 获取最近的任务
-    recent_tasks = EvaluationTask.query.order_by(EvaluationTask.created_at.desc()).limit(5).all()
-    
-    return render_template('index.html', 
+    response = app.make_response(render_template('index.html',
                          available_models=available_models,
                          evaluation_model_configured=evaluation_model_configured,
-                         recent_tasks=recent_tasks)
+                         recent_tasks=recent_tasks,
+                         server_push=server_push))
+    return response_cache.set_validators(response, etag, None, 0)
 
 @app.route('/api/models', methods=['GET', 'POST'])
 def manage_models():
     """管理翻译模型API"""
     if request.method == 'GET':
-        # 返回模型配置信息
-        models = {}
-        if config_manager:
-            for model_key, model_config in config_manager.translation_models.items():
-                models[model_key] = {
-                    'name': model_config.name,
-                    'configured': bool(model_config.api_key),
-                    'base_url': model_config.base_url,
-                    'model_id': model_config.model_id
-                }
-        return jsonify(models)
+        # 返回模型配置信息（按配置文件修改时间缓存，未变化时返回304）
+        def build():
+            models = {}
+            if config_manager:
+                for model_key, model_config in config_manager.translation_models.items():
+                    models[model_key] = {
+                        'name': model_config.name,
+                        'configured': bool(model_config.api_key),
+                        'base_url': model_config.base_url,
+                        'model_id': model_config.model_id
+                    }
+            return models
+        mtime_ns, last_modified = config_version()
+        return response_cache.json_response(build, etag=make_etag('models', mtime_ns), last_modified=last_modified,
+                                            cache=('models', None))
     
     elif request.method == 'POST':
         # 添加或更新模型配置
@@ -355,6 +757,15 @@ def start_evaluation():
     if not selected_models:
         return jsonify({'error': '请至少选择一个翻译模型'}), 400
     
+    # 增量重评估：只执行相对基准任务新增或变化的（翻译对, 模型）单元
+    baseline_task_id = data.get('baseline_task_id')
+    if baseline_task_id:
+        baseline = EvaluationTask.query.get(baseline_task_id)
+        if not baseline:
+            return jsonify({'error': '基准任务不存在'}), 400
+        if baseline.status in ('pending', 'running', 'paused'):
+            return jsonify({'error': '基准任务尚未结束'}), 400
+    
     # 检查评估模型是否配置
     if not config_manager or not config_manager.evaluation_model or not config_manager.evaluation_model.api_key:
         return jsonify({'error': '评估模型未配置，请先配置评估模型'}), 400
@@ -378,7 +789,8 @@ def start_evaluation():
         db.session.commit()
         
         # 启动后台评估任务
-        thread = Thread(target=run_evaluation_task, args=(task_id, filepath, selected_models, data_selection))
+        thread = Thread(target=run_evaluation_task, args=(task_id, filepath, selected_models, data_selection,
+                                                          baseline_task_id))
         thread.daemon = True
         thread.start()
         
@@ -417,135 +829,660 @@ def apply_data_selection(translation_pairs, data_selection):
     
     return translation_pairs
 
-def run_evaluation_task(task_id, filepath, selected_models, data_selection=None):
-    """运行评估任务的后台函数"""
+def is_local_model(model_key):
+    """判断是否为本地模型（本地模型统一使用 api_key='local'）"""
+    model_config = config_manager.translation_models.get(model_key) if config_manager else None
+    return bool(model_config) and model_config.api_key == 'local'
+
+def translate_pair(model_key, pair):
+    """翻译单条数据；本地模型在启用对冲策略时超过P95延迟会发送对冲请求"""
+    pool = replica_pools.get(model_key)
+    if not is_local_model(model_key) or not pool:
+        with tracer.phased('translate_single', model=model_key):
+            return get_translation_engine().translate_single(model_key, pair)
+    
+    model_lifecycle.touch(model_key)
+    routed = {}
+    # 对冲请求在其他线程中执行，需要重新绑定父span（任务控制由对冲策略按调用绑定）
+    parent_span = tracer.current()
+    
+    def call_replica(exclude=None):
+        # 按最少未完成请求选择副本，结束后回报成功/失败用于摘除判断
+        replica = pool.acquire(exclude=exclude)
+        routed.setdefault('primary', replica.url)
+        try:
+            with tracer.attach(parent_span), tracer.phased('translate_single', model=model_key, replica=replica.url):
+                result = get_translation_engine().translate_single(replica.engine_key, pair)
+        except TaskTerminated:
+            # 任务终止或对冲落败被取消，不计为副本失败
+            pool.release(replica, success=None)
+            raise
+        except Exception:
+            pool.release(replica, success=False)
+            raise
+        pool.release(replica, success=not getattr(result, 'error_message', None))
+        return result
+    
+    # 对冲请求优先发往其他副本，没有可用副本时在同一服务上重试
+    return hedging_policy.execute(
+        model_key,
+        call_replica,
+        hedge_fn=lambda: call_replica(exclude=routed.get('primary'))
+    )
+
+def estimate_model_speed(model_key):
+    """模型的历史平均生成速度（tokens/s），没有记录时返回None"""
+    model_config = config_manager.translation_models.get(model_key) if config_manager else None
+    stats = performance_monitor.translation_stats
+    for name in (model_key, getattr(model_config, 'model_id', None)):
+        for category in ('local_models', 'api_models'):
+            entry = stats[category].get(name)
+            if entry and entry.get('avg_tokens_per_sec'):
+                return entry['avg_tokens_per_sec']
+    return None
+
+def source_key(text):
+    """翻译记忆中原文的内容键"""
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+def ensure_translation_memory_loaded():
+    """首次使用时从数据库加载翻译记忆索引（需在应用上下文中调用）"""
+    if not translation_memory.loaded:
+        entries = db.session.query(
+            TranslationMemoryEntry.source_text,
+            TranslationMemoryEntry.model_name,
+            TranslationMemoryEntry.translated_text,
+            TranslationMemoryEntry.overall_score
+        ).yield_per(1000)
+        translation_memory.load(entries)
+    return translation_memory
+
+def memory_candidate(result):
+    """结果是否可以写入翻译记忆：评估模型正常给分（非预筛选规则给分、无评估错误）且评分达到 TM_MIN_SCORE"""
+    if not result.translated_text or not translation_memory.accepts(result.overall_score):
+        return False
+    try:
+        details = json.loads(result.evaluation_details or '{}')
+    except ValueError:
+        return False
+    return not details.get('prescreen_reason') and not details.get('error_message')
+
+def update_translation_memory(task_id, results):
+    """任务完成后将新译文写入翻译记忆（持久化并增量更新索引）
+
+    只有达到最低评分的译文才会写入或替换已有条目，同一原文同一模型保留得分最高的译文。
+    """
+    best = {}
+    for result in results:
+        if not memory_candidate(result):
+            continue
+        key = (source_key(result.source_text), result.model_name)
+        if key not in best or (result.overall_score or 0) > (best[key].overall_score or 0):
+            best[key] = result
+    if not best:
+        return 0
+    
+    existing = {}
+    keys = list({k[0] for k in best})
+    for start in range(0, len(keys), 500):
+        for entry in TranslationMemoryEntry.query.filter(TranslationMemoryEntry.source_key.in_(keys[start:start + 500])):
+            existing[(entry.source_key, entry.model_name)] = entry
+    
+    for (key, model_name), result in best.items():
+        entry = existing.get((key, model_name))
+        if entry is None:
+            db.session.add(TranslationMemoryEntry(
+                source_key=key,
+                source_text=result.source_text,
+                model_name=model_name,
+                translated_text=result.translated_text,
+                overall_score=result.overall_score,
+                task_id=task_id
+            ))
+        elif result.overall_score >= (entry.overall_score or 0):
+            entry.translated_text = result.translated_text
+            entry.overall_score = result.overall_score
+            entry.task_id = task_id
+            entry.updated_at = datetime.utcnow()
+        else:
+            continue
+        translation_memory.add(result.source_text, model_name, result.translated_text, result.overall_score)
+    db.session.commit()
+    return len(best)
+
+def score_label_ids(kind, values):
+    """返回维度标签的整数编码，缺失的标签先写入 ScoreLabel"""
+    values = set(values)
+    ids = {label.value: label.id for label in ScoreLabel.query.filter(ScoreLabel.kind == kind,
+                                                                       ScoreLabel.value.in_(values))}
+    missing = values - set(ids)
+    if missing:
+        try:
+            db.session.add_all(ScoreLabel(kind=kind, value=value) for value in missing)
+            db.session.commit()
+        except Exception:
+            # 其他进程同时写入了相同标签
+            db.session.rollback()
+        ids = {label.value: label.id for label in ScoreLabel.query.filter(ScoreLabel.kind == kind,
+                                                                           ScoreLabel.value.in_(values))}
+    return ids
+
+def record_task_scores(task_id, results, pair_meta=None, created_at=None):
+    """将任务的评分镜像到分析表；pair_meta 为 {pair_id: (类别, 难度)}"""
+    pair_meta = pair_meta or {}
+    created_at = created_at or time.time()
+    entries = []
+    for result in results:
+        category, difficulty = pair_meta.get(result.pair_id, (None, None))
+        entries.append((result, category or 'unknown', difficulty or 'unknown'))
+    if not entries:
+        return 0
+    models = score_label_ids('model', (result.model_name for result, _, _ in entries))
+    categories = score_label_ids('category', (category for _, category, _ in entries))
+    difficulties = score_label_ids('difficulty', (difficulty for _, _, difficulty in entries))
+    keys = {}
+    rows = []
+    for result, category, difficulty in entries:
+        if result.source_text not in keys:
+            keys[result.source_text] = item_key(source_key(result.source_text))
+        rows.append({
+            'task_id': task_id,
+            'item_key': keys[result.source_text],
+            'model_id': models[result.model_name],
+            'category_id': categories[category],
+            'difficulty_id': difficulties[difficulty],
+            'created_at': created_at,
+            'accuracy_score': result.accuracy_score,
+            'fluency_score': result.fluency_score,
+            'terminology_score': result.terminology_score,
+            'overall_score': result.overall_score
+        })
+    db.session.execute(ScoreRecord.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+def refresh_score_analytics():
+    """增量加载分析表中的新行到内存列式副本（需在应用上下文中调用）"""
+    columns = (ScoreRecord.id, ScoreRecord.task_id, ScoreRecord.item_key, ScoreRecord.model_id,
+               ScoreRecord.category_id, ScoreRecord.difficulty_id, ScoreRecord.created_at,
+               ScoreRecord.accuracy_score, ScoreRecord.fluency_score, ScoreRecord.terminology_score,
+               ScoreRecord.overall_score)
+    
+    def fetch_rows(after_id, limit):
+        return db.session.query(*columns).filter(ScoreRecord.id > after_id).order_by(ScoreRecord.id).limit(limit).all()
+    
+    def fetch_labels():
+        return db.session.query(ScoreLabel.id, ScoreLabel.kind, ScoreLabel.value).all()
+    
+    return score_analytics.refresh(fetch_rows, fetch_labels)
+
+def create_evaluation_engine():
+    """按配置创建评估引擎（流式提前终止只作用于翻译，评估始终使用核心评估引擎）"""
+    from evaluation_engine import EvaluationEngine
+    if not config_manager.evaluation_model:
+        raise Exception("评估模型未配置")
+    # 确保传递正确的ModelConfig对象（配置为字典时转换）
+    eval_config = config_manager.evaluation_model
+    if not hasattr(eval_config, '__dict__'):
+        from translation_evaluation_config import ModelConfig
+        eval_config = ModelConfig(**eval_config)
+    return EvaluationEngine(eval_config)
+
+def evaluate_group(group, selected_models, evaluation_engine, tm_threshold=0, progress=None, control=None,
+                   terminology_stats=None):
+    """翻译并评估一组原文相同的翻译对（不访问数据库），返回 (各模型结果, 错误)
+
+    各模型相互独立：某个模型出错或已熔断时只跳过该模型，其余模型照常执行。
+    传入 control 时每次模型调用前检查暂停/终止，终止后正在进行的流式请求会被中断。
+    传入 terminology_stats 时，组内全部译文的术语检查在最后一次批量扫描中完成并累加到其中。
+    """
+    outcomes, error = _translate_and_evaluate(group, selected_models, evaluation_engine, tm_threshold, progress, control)
+    if terminology_stats is not None and len(terminology_checker):
+        with tracer.span('terminology.check_batch'):
+            items, counts = [], []
+            for _, translation_result, _, evaluations in outcomes:
+                for members, _, _ in evaluations:
+                    items.append((members[0].source_text, translation_result.translated_text))
+                    counts.append(len(members))
+            terminology_checker.check_batch(items, terminology_stats, counts)
+    return outcomes, error
+
+def _translate_and_evaluate(group, selected_models, evaluation_engine, tm_threshold, progress, control):
+    pair = group.representative
+    outcomes = []
+    error = None
+    for index, model_key in enumerate(selected_models):
+        try:
+            if control is not None:
+                control.checkpoint()
+            unit_started = time.time()
+            # 执行翻译（返回 TranslationResult 对象），组内共用
+            reusable = translation_memory.find_reusable(pair.source_text, model_key, tm_threshold) if tm_threshold > 0 else None
+            if reusable:
+                translation_result = ReusedTranslation(pair, model_key, *reusable)
+            else:
+                # 熔断打开的模型立即跳过，不再等待连接超时
+                translation_result = circuit_breakers.call(model_key, translate_pair, model_key, pair)
+            
+            evaluations = []
+            for members in group.subgroups.values():
+                # 先做本地预筛选，明显失败的译文按规则给分，其余再调用评估模型
+                with tracer.span('prescreen', model=model_key):
+                    evaluation_result = prescreen_policy.screen(members[0], translation_result)
+                judged = evaluation_result is None
+                if judged:
+                    if control is not None:
+                        control.checkpoint()
+                    # 执行评估（返回 EvaluationResult 对象），参考译文相同的翻译对共用
+                    with tracer.phased('evaluate_single', model=model_key):
+                        evaluation_result = evaluation_engine.evaluate_single(
+                            members[0],
+                            translation_result
+                        )
+                evaluations.append((members, evaluation_result, judged))
+            outcomes.append((model_key, translation_result, bool(reusable), evaluations))
+            # 每完成一个模型即更新进度与该模型的单位耗时
+            if progress is not None:
+                progress.record(model_key, len(group.pairs), time.time() - unit_started)
+        except TaskTerminated as e:
+            if progress is not None:
+                for skipped_model in selected_models[index:]:
+                    progress.skip(skipped_model, len(group.pairs))
+            return outcomes, e
+        except CircuitOpenError:
+            if progress is not None:
+                progress.skip(model_key, len(group.pairs), reason='circuit_open')
+        except Exception as e:
+            if progress is not None:
+                progress.skip(model_key, len(group.pairs), reason='error')
+            error = e
+    return outcomes, error
+
+def outcome_rows(task_id, outcomes):
+    """将一组结果展开为 TranslationResult 字段（每条翻译对×模型一行）"""
+    rows = []
+    for model_key, translation_result, reused, evaluations in outcomes:
+        for members, evaluation_result, judged in evaluations:
+            # 只有被预筛选规则拦截的结果带有 local_metrics（PrescreenEvaluation 的字段），其余行不保存本地指标
+            details = dict(evaluation_result.__dict__)
+            evaluation_details = json.dumps(details, ensure_ascii=False, default=str)
+            for member in members:
+                rows.append({
+                    'task_id': task_id,
+                    'pair_id': member.id,
+                    'source_text': member.source_text,
+                    'target_text': member.target_text,
+                    'model_name': model_key,
+                    'translated_text': translation_result.translated_text,
+                    'accuracy_score': evaluation_result.accuracy_score,
+                    'fluency_score': evaluation_result.fluency_score,
+                    'terminology_score': evaluation_result.terminology_score,
+                    'overall_score': evaluation_result.overall_score,
+                    'evaluation_details': evaluation_details
+                })
+    return rows
+
+RESULT_KEY = ('task_id', 'pair_id', 'model_name')
+
+def upsert_translation_results(rows):
+    """按 (task_id, pair_id, model_name) 幂等写入结果：INSERT ... ON CONFLICT DO UPDATE
+
+    由数据库唯一约束保证多个进程同时回传同一单元时不产生重复行。
+    """
+    if not rows:
+        return 0
+    table = TranslationResult.__table__
+    text_ids = intern_result_texts(rows)
+    # 同一批中重复的单元只保留最后一条（同一条语句不能两次更新同一行）
+    values = {}
+    for row in rows:
+        result = TranslationResult.from_row(row, text_ids)
+        values[tuple(row[key] for key in RESULT_KEY)] = {
+            column.name: getattr(result, column.name) for column in table.columns if column.name != 'id'
+        }
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table)
+        statement = statement.on_duplicate_key_update({
+            name: statement.inserted[name] for name in values[next(iter(values))] if name not in RESULT_KEY})
+    else:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(index_elements=list(RESULT_KEY), set_={
+            name: statement.excluded[name] for name in values[next(iter(values))] if name not in RESULT_KEY})
+    db.session.execute(statement, list(values.values()))
+    db.session.commit()
+    return len(values)
+
+def save_task_manifest(task_id, manifest, baseline_task_id=None):
+    db.session.merge(TaskManifest(
+        task_id=task_id,
+        baseline_task_id=baseline_task_id,
+        pairs_blob=compress_text(json.dumps(manifest['pairs'], ensure_ascii=False)),
+        models=json.dumps(manifest['models'], ensure_ascii=False),
+        evaluator=manifest['evaluator']
+    ))
+    db.session.commit()
+
+def load_task_manifest(task_id, current):
+    """读取任务清单；没有清单的旧任务由其结果推导（模型与评估模型配置视为未变化）"""
+    record = TaskManifest.query.get(task_id)
+    if record is not None:
+        return record.manifest
+    logging.warning(f"基准任务 {task_id} 没有清单，按其结果推导，假定模型配置未变化")
+    results = TranslationResult.query.filter_by(task_id=task_id).options(
+        db.selectinload(TranslationResult.source_blob), db.selectinload(TranslationResult.target_blob)).all()
+    return {
+        'pairs': {result.pair_id: pair_fingerprint(result.source_text, result.target_text) for result in results},
+        'models': {model_key: current['models'].get(model_key) for model_key in {result.model_name for result in results}},
+        'evaluator': current['evaluator']
+    }
+
+def evaluator_settings():
+    """影响评分的全部设置：评估模型配置、预筛选规则与术语表"""
+    return {
+        'model': config_fingerprint(config_manager.evaluation_model),
+        'prescreen': prescreen_policy.settings(),
+        'terminology': terminology_checker.digest
+    }
+
+def translation_settings(model_key):
+    """影响译文的设置：模型配置；开启流式翻译时还包括内置翻译提示词版本与提前终止阈值"""
+    model_config = config_manager.translation_models.get(model_key)
+    streaming = streaming_policy.settings()
+    if streaming is None or model_config is None:
+        return model_config
+    return {'model': config_fingerprint(model_config), 'streaming': streaming}
+
+def plan_incremental_run(task_id, baseline_task_id, translation_pairs, selected_models):
+    """记录本任务清单；指定基准任务时返回增量计划（否则返回None）"""
+    manifest = build_manifest(
+        translation_pairs,
+        {model_key: translation_settings(model_key) for model_key in selected_models},
+        evaluator_settings()
+    )
+    save_task_manifest(task_id, manifest, baseline_task_id)
+    if not baseline_task_id:
+        return None
+    # 基准任务中有译文且正常给分的单元才可复用；缺失、翻译失败、评估出错或评分解析失败（总分为0或空）的单元重新执行
+    available = {(pair_id, model_name) for pair_id, model_name in db.session.query(
+        TranslationResult.pair_id, TranslationResult.model_name
+    ).filter(TranslationResult.task_id == baseline_task_id, TranslationResult.translated_text_id.isnot(None),
+             TranslationResult.overall_score > 0)}
+    return diff_manifests(manifest, load_task_manifest(baseline_task_id, manifest), selected_models,
+                          available, baseline_task_id)
+
+def copy_baseline_results(task_id, baseline_task_id, units, batch_size=5000):
+    """将基准任务中可复用单元的结果复制到本任务（文本只复制 TextBlob 引用）"""
+    if not units:
+        return 0
+    table = TranslationResult.__table__
+    columns = [column.name for column in table.columns if column.name not in ('id', 'task_id')]
+    copies, seen = [], set()
+    for row in db.session.execute(db.select(table).where(table.c.task_id == baseline_task_id)
+                                  .order_by(table.c.id)).mappings():
+        unit = (row['pair_id'], row['model_name'])
+        if unit in units and unit not in seen:
+            seen.add(unit)
+            copies.append({'task_id': task_id, **{column: row[column] for column in columns}})
+    for start in range(0, len(copies), batch_size):
+        db.session.execute(table.insert(), copies[start:start + batch_size])
+    db.session.commit()
+    return len(copies)
+
+def ordered_task_results(task_id, translation_pairs, selected_models):
+    """任务的全部结果，按数据文件中的顺序与模型选择顺序排列"""
+    pair_order = {pair.id: index for index, pair in enumerate(translation_pairs)}
+    model_order = {model_key: index for index, model_key in enumerate(selected_models)}
+    results = TranslationResult.with_texts(TranslationResult.query.filter_by(task_id=task_id)).all()
+    return sorted(results, key=lambda result: (pair_order.get(result.pair_id, len(pair_order)),
+                                               model_order.get(result.model_name, len(model_order))))
+
+def run_evaluation_task(task_id, filepath, selected_models, data_selection=None, baseline_task_id=None):
+    """运行评估任务的后台函数；指定 baseline_task_id 时只执行相对基准任务新增或变化的单元"""
     with app.app_context():
         task = EvaluationTask.query.get(task_id)
         if not task:
             return
         
-        # 初始化任务控制标志
-        task_control_flags[task_id] = {'paused': False, 'terminated': False}
+        # 初始化任务控制（暂停/终止请求即时唤醒本任务的调度线程与工作线程）
+        control = task_controls.start(task_id)
+        acquired_models = []
+        # 终止时仍在执行、无法中断的模型调用（非流式客户端），全部返回后才解除模型占用
+        abandoned = []
+        task_error = None
+        # 整个任务为一个根span，各阶段与工作线程中的评估单元挂在其下
+        task_span = tracer.span('run_evaluation_task', task_id=task_id, models=','.join(selected_models))
+        root_span = task_span.__enter__()
         
         try:
             task.status = 'running'
             db.session.commit()
             
-            # 清空之前的数据，避免ID重复
-            data_manager.translation_pairs.clear()
-            
-            # 加载翻译数据（兼容英->中测试集）
-            data_manager.load_translation_pairs_from_json(filepath)
-            translation_pairs = list(data_manager.translation_pairs.values())
+            with tracer.span('dataset.load', file=os.path.basename(filepath)) as span:
+                # 清空之前的数据，避免ID重复
+                data_manager.translation_pairs.clear()
+                
+                # 加载翻译数据（兼容英->中测试集）
+                data_manager.load_translation_pairs_from_json(filepath)
+                translation_pairs = list(data_manager.translation_pairs.values())
+                span.set_attribute('pairs', len(translation_pairs))
             
             # 根据数据选择参数筛选数据
             if data_selection:
                 translation_pairs = apply_data_selection(translation_pairs, data_selection)
             
-            # 配置翻译引擎
-            for model_key in selected_models:
-                if model_key in config_manager.translation_models:
-                    model_config = config_manager.translation_models[model_key]
-                    translation_engine.add_model(model_key, model_config)
-            
-            # 初始化评估引擎
-            if config_manager.evaluation_model:
-                # 确保传递正确的ModelConfig对象
-                eval_config = config_manager.evaluation_model
-                if hasattr(eval_config, '__dict__'):
-                    # 如果是ModelConfig对象，直接使用
-                    evaluation_engine = EvaluationEngine(eval_config)
-                else:
-                    # 如果是字典，转换为ModelConfig对象
-                    from translation_evaluation_config import ModelConfig
-                    eval_config_dict = eval_config if isinstance(eval_config, dict) else eval_config.__dict__
-                    evaluation_engine = EvaluationEngine(ModelConfig(**eval_config_dict))
+            # 记录任务清单；指定基准任务时比对数据集与模型配置，未变化的单元直接复制基准结果
+            with tracer.span('incremental.plan', baseline=baseline_task_id) as span:
+                incremental = plan_incremental_run(task_id, baseline_task_id, translation_pairs, selected_models)
+                if incremental is not None:
+                    copied = copy_baseline_results(task_id, baseline_task_id, incremental.reuse)
+                    span.set_attribute('units_copied', copied)
+            # 只有需要执行单元的模型才配置引擎、启动本地模型
+            model_units = incremental.model_units() if incremental is not None else None
+            active_models = [model_key for model_key in selected_models if model_key in model_units] \
+                if model_units is not None else selected_models
+            
+            if shard_coordinator.enabled:
+                # 协调者模式下模型调用全部由工作节点完成，本进程不配置引擎、不启动本地模型
+                evaluation_engine = None
             else:
-                raise Exception("评估模型未配置")
+                # 配置翻译引擎
+                configure_translation_models(active_models)
+                
+                # 按需启动选中的本地模型（并行预热，已就绪的直接复用）
+                with tracer.span('models.acquire'):
+                    acquired_models = model_lifecycle.acquire(active_models)
+                
+                # 初始化评估引擎
+                evaluation_engine = create_evaluation_engine()
             
-            # 执行翻译和评估
-            all_results = []
+            # 执行翻译和评估：原文相同的翻译对只翻译一次，参考译文也相同的只评估一次，结果分发到组内每条
             total_pairs = len(translation_pairs)
+            pair_groups = group_duplicate_pairs(translation_pairs)
+            dedup = dedup_stats(total_pairs, pair_groups, len(selected_models))
+            logging.info(f"任务 {task_id} 去重: {total_pairs} 条 -> {dedup['unique_sources']} 条唯一原文 "
+                         f"(去重比例 {dedup['dedup_ratio']:.1%})")
+            if incremental is not None:
+                # 增量模式只执行需要执行的单元，组上记录各自的模型
+                pair_groups = incremental.groups(translation_pairs)
+            # 翻译记忆复用（可选）：相似度不低于阈值且占位符可替换时直接复用历史译文
+            tm_threshold = float(os.getenv('TM_REUSE_THRESHOLD', '0') or 0)
+            tm_stats = {'threshold': tm_threshold, 'reused_translations': 0}
+            if tm_threshold > 0:
+                ensure_translation_memory_loaded()
+            prescreen_stats = {'judge_calls': 0, 'skipped': {}}
+            terminology_stats = TerminologyStats()
+            stream_stats = StreamTaskStats()
             
-            for i, pair in enumerate(translation_pairs):
-                try:
-                    # 检查任务控制标志
-                    control_flags = task_control_flags.get(task_id, {})
-                    
-                    # 检查是否被终止
-                    if control_flags.get('terminated', False):
-                        task.status = 'terminated'
-                        task.error_message = "任务被用户终止"
-                        db.session.commit()
+            def mark_terminated():
+                """终止状态只写入一次"""
+                if task.status != 'terminated':
+                    task.error_message = "任务在暂停期间被终止" if task.status == 'paused' else "任务被用户终止"
+                    task.status = 'terminated'
+                    db.session.commit()
+            
+            def check_task_control():
+                """应用暂停/终止状态，任务被终止时返回False；暂停期间阻塞直到恢复或终止（不轮询）"""
+                if control.terminated:
+                    mark_terminated()
+                    return False
+                if control.paused:
+                    # 状态变化各写入一次数据库：进入暂停、恢复运行
+                    task.status = 'paused'
+                    db.session.commit()
+                    if not control.wait_while_paused():
+                        mark_terminated()
+                        return False
+                    task.status = 'running'
+                    db.session.commit()
+                return True
+            
+            def process_group(group):
+                """在工作线程中执行（不访问数据库）"""
+                with bind_task_control(control), tracer.attach(root_span), \
+                        tracer.span('evaluation.unit', pair_id=group.representative.id, pairs=len(group.pairs)):
+                    return evaluate_group(group, group.models or selected_models, evaluation_engine, tm_threshold,
+                                          progress, control, terminology_stats)
+            
+            def record_outcomes(outcomes):
+                """在主线程中汇总统计并保存结果到数据库"""
+                results = []
+                for model_key, translation_result, reused, evaluations in outcomes:
+                    if reused:
+                        tm_stats['reused_translations'] += 1
+                    else:
+                        stream_stats.update(translation_result)
+                    for members, evaluation_result, judged in evaluations:
+                        if judged:
+                            prescreen_stats['judge_calls'] += 1
+                        else:
+                            reason = evaluation_result.prescreen_reason
+                            prescreen_stats['skipped'][reason] = prescreen_stats['skipped'].get(reason, 0) + 1
+                
+                # 保存结果到数据库
+                with tracer.span('db.add') as span:
+                    rows = outcome_rows(task_id, outcomes)
+                    text_ids = intern_result_texts(rows)
+                    for row in rows:
+                        result = TranslationResult.from_row(row, text_ids)
+                        db.session.add(result)
+                        results.append(result)
+                    span.set_attribute('rows', len(results))
+                return results
+            
+            # 按估计耗时从长到短（LPT）分派给工作线程；工作线程只负责模型调用，数据库写入留在本线程
+            scheduler = LengthAwareScheduler(estimate_model_speed, int(os.getenv('EVALUATION_WORKERS', '1')))
+            with tracer.span('schedule.plan', groups=len(pair_groups)):
+                plan = scheduler.plan(pair_groups, selected_models)
+            progress = task_progress.start(task_id, total_pairs, active_models, plan.workers,
+                                           plan.estimated_makespan, model_units)
+            started_at = time.time()
+            if shard_coordinator.enabled:
+                # 协调者模式：按调度顺序切分分片，由工作节点拉取执行，结果经HTTP回传并幂等写入
+                shard_coordinator.create_job(task_id, [item.group for item in plan.items], selected_models)
+                # 终止时立即取消分片（工作节点下次回传时停止处理），同时唤醒下面的等待
+                control.on_terminate(lambda: shard_coordinator.cancel(task_id))
+                while True:
+                    finished = shard_coordinator.wait(task_id, timeout=1.0)
+                    if not check_task_control():
+                        shard_coordinator.cancel(task_id)
+                        shard_coordinator.finish(task_id)
                         return
-                    
-                    # 检查是否被暂停
-                    while control_flags.get('paused', False):
-                        task.status = 'paused'
-                        db.session.commit()
-                        time.sleep(1)  # 等待1秒后重新检查
-                        control_flags = task_control_flags.get(task_id, {})
-                        
-                        # 在暂停期间也要检查终止
-                        if control_flags.get('terminated', False):
-                            task.status = 'terminated'
-                            task.error_message = "任务在暂停期间被终止"
-                            db.session.commit()
-                            return
-                    
-                    # 恢复运行状态
-                    if task.status == 'paused':
-                        task.status = 'running'
-                        db.session.commit()
-                    
-                    # 更新进度
-                    progress = int((i / total_pairs) * 100)
-                    task.progress = progress
+                    if finished:
+                        break
+                    # 工作节点回传的进度可能由其他Web进程接收，经共享状态转交到本进程
+                    progress.workers = max(1, shard_coordinator.active_threads())
+                    for entry in shared_state.drain_progress(task_id):
+                        if entry.get('model') not in progress.models:
+                            continue
+                        if 'skipped' in entry:
+                            progress.skip(entry['model'], entry.get('units', 1), entry['skipped'])
+                        else:
+                            progress.record(entry['model'], entry.get('units', 1), entry.get('seconds', 0.0))
+                    task.progress = int(progress.fraction * 100)
                     db.session.commit()
-                    
-                    # 对每个选择的模型进行翻译
-                    for model_key in selected_models:
-                        # 执行翻译（返回 TranslationResult 对象）
-                        translation_result = translation_engine.translate_single(
-                            model_key,
-                            pair
-                        )
-                        
-                        # 执行评估（返回 EvaluationResult 对象）
-                        evaluation_result = evaluation_engine.evaluate_single(
-                            pair,
-                            translation_result
-                        )
+                distributed_summary = shard_coordinator.finish(task_id)
+                db.session.expire_all()
+                all_results = TranslationResult.with_texts(
+                    TranslationResult.query.filter_by(task_id=task_id).order_by(TranslationResult.id)
+                ).all()
+            else:
+                schedule_queue = deque(plan.items)
+                results_by_index = {}
+                executor = ThreadPoolExecutor(max_workers=plan.workers)
+                pending = {}
+                try:
+                    while schedule_queue or pending:
+                        # 先取状态变化 Future 再检查状态，检查之后的暂停/终止请求必定唤醒下面的等待
+                        changed = control.changed()
+                        if not check_task_control():
+                            # 流式请求已被中断；非流式调用无法中断，不再等待，结果丢弃（模型在其返回前保持占用）
+                            return
+                        while schedule_queue and len(pending) < plan.workers and not control.paused:
+                            item = schedule_queue.popleft()
+                            pending[executor.submit(process_group, item.group)] = item
                         
-                        # 保存结果到数据库
-                        result = TranslationResult(
-                            task_id=task_id,
-                            pair_id=pair.id,
-                            source_text=pair.source_text,
-                            target_text=pair.target_text,
-                            model_name=model_key,
-                            translated_text=translation_result.translated_text,
-                            accuracy_score=evaluation_result.accuracy_score,
-                            fluency_score=evaluation_result.fluency_score,
-                            terminology_score=evaluation_result.terminology_score,
-                            overall_score=evaluation_result.overall_score,
-                            evaluation_details=json.dumps(evaluation_result.__dict__, ensure_ascii=False)
-                        )
-                        db.session.add(result)
-                        all_results.append(result)
+                        # 暂停/终止请求也会唤醒等待，状态立即写入
+                        done, _ = wait([*pending, changed], return_when=FIRST_COMPLETED)
+                        for future in done:
+                            if future not in pending:
+                                continue
+                            item = pending.pop(future)
+                            outcomes, error = future.result()
+                            results_by_index[item.index] = record_outcomes(outcomes)
+                            if error is not None:
+                                logging.error(f"处理翻译对 {item.group.representative.id} 时出错: {error}")
+                            
+                            # 更新进度（按翻译对×模型单元计算）
+                            task.progress = int(progress.fraction * 100)
+                            with tracer.span('db.commit'):
+                                db.session.commit()
+                finally:
+                    executor.shutdown(wait=not control.terminated, cancel_futures=True)
+                    abandoned.extend(future for future in pending if not future.done())
                 
-                except Exception as e:
-                    logging.error(f"处理翻译对 {pair.id} 时出错: {e}")
-                    continue
+                # 结果按数据文件中的顺序排列
+                all_results = [result for index in sorted(results_by_index) for result in results_by_index[index]]
+                distributed_summary = None
+            if incremental is not None:
+                # 合并本次执行与从基准复制的结果
+                all_results = ordered_task_results(task_id, translation_pairs, selected_models)
+            schedule_summary = plan.summary()
+            schedule_summary['actual_seconds'] = round(time.time() - started_at, 2)
             
             # 保存最终结果
             results_filename = f"evaluation_results_{task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             results_filepath = os.path.join('results', results_filename)
             
             # 生成结果报告
-            report_data = generate_evaluation_report(all_results, selected_models)
-            with open(results_filepath, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, ensure_ascii=False, indent=2)
+            with tracer.span('report.write', results=len(all_results)):
+                report_data = generate_evaluation_report(all_results, selected_models, dedup)
+                report_data['summary']['translation_memory'] = tm_stats
+                report_data['summary']['prescreen'] = prescreen_stats
+                report_data['summary']['scheduling'] = schedule_summary
+                if distributed_summary:
+                    report_data['summary']['distributed'] = distributed_summary
+                if incremental is not None:
+                    report_data['summary']['incremental'] = incremental.summary()
+                # 因熔断或出错而跳过的单元（按模型），以及各模型熔断器的当前状态
+                skipped = {model_key: info['skipped'] for model_key, info in progress.snapshot()['models'].items()
+                           if info['skipped']}
+                if skipped:
+                    breakers = circuit_breakers.get_status()
+                    report_data['summary']['skipped_units'] = {
+                        model_key: {**counts, 'circuit': breakers.get(model_key)} for model_key, counts in skipped.items()
+                    }
+                if streaming_policy.enabled:
+                    report_data['summary']['streaming'] = stream_stats.summary()
+                if len(terminology_checker):
+                    report_data['summary']['terminology'] = terminology_stats.summary()
+                with open(results_filepath, 'w', encoding='utf-8') as f:
+                    json.dump(report_data, f, ensure_ascii=False, indent=2)
             
             # 更新任务状态
             task.status = 'completed'
@@ -554,8 +1491,27 @@ def run_evaluation_task(task_id, filepath, selected_models, data_selection=None)
             task.results_file = results_filepath
             db.session.commit()
             
+            # 增量更新翻译记忆
+            try:
+                with tracer.span('translation_memory.update'):
+                    update_translation_memory(task_id, all_results)
+            except Exception as e:
+                logging.warning(f"更新翻译记忆失败: {e}")
+            
+            # 评分镜像到分析表（跨任务统计不再扫描含文本的结果表）
+            try:
+                with tracer.span('score_analytics.record'):
+                    record_task_scores(task_id, all_results, {
+                        pair.id: (getattr(pair, 'category', None), getattr(pair, 'difficulty', None))
+                        for pair in translation_pairs
+                    })
+            except Exception as e:
+                db.session.rollback()
+                logging.warning(f"写入评分分析表失败: {e}")
+            
         except Exception as e:
             # 任务失败
+            task_error = e
             task.status = 'failed'
             task.error_message = str(e)
             db.session.commit()
@@ -565,14 +1521,25 @@ def run_evaluation_task(task_id, filepath, selected_models, data_selection=None)
             logging.error(f"评估任务 {task_id} 失败: {e}")
             logging.error(f"详细错误信息: {error_details}")
             print(f"[DEBUG] 评估任务失败详情: {error_details}")
+        finally:
+            model_lifecycle.release_after(acquired_models, abandoned + control.detached_calls())
+            task_progress.finish(task_id)
+            task_controls.finish(task_id)
+            root_span.set_attribute('status', task.status)
+            # 异常已在上面处理，仍传给根span以记录错误状态
+            if task_error is not None:
+                task_span.__exit__(type(task_error), task_error, task_error.__traceback__)
+            else:
+                task_span.__exit__(None, None, None)
 
-def generate_evaluation_report(results, models):
+def generate_evaluation_report(results, models, dedup=None):
     """生成评估报告"""
     report = {
         'summary': {
             'total_pairs': len(set(r.pair_id for r in results)),
             'models_tested': models,
-            'evaluation_time': datetime.now().isoformat()
+            'evaluation_time': datetime.now().isoformat(),
+            'deduplication': dedup or {}
         },
         'model_performance': {},
         'detailed_results': []
@@ -615,11 +1582,20 @@ def generate_evaluation_report(results, models):
 
 @app.route('/api/tasks/<task_id>')
 def get_task_status(task_id):
-    """获取任务状态"""
+    """获取任务状态（已结束任务的响应按任务版本缓存，客户端可条件请求）"""
     task = EvaluationTask.query.get_or_404(task_id)
-    
-    # 获取任务的翻译结果
-    results = TranslationResult.query.filter_by(task_id=task_id).all()
+    if task.status in TERMINAL_STATUSES:
+        return response_cache.json_response(lambda: build_task_status(task), etag=task_version(task),
+                                            last_modified=task.completed_at, cache=('task_status', task_id))
+    return jsonify(build_task_status(task))
+
+def build_task_status(task):
+    task_id = task.id
+    # 获取任务的翻译结果（只需模型与评分列）
+    results = db.session.query(
+        TranslationResult.model_name, TranslationResult.accuracy_score, TranslationResult.fluency_score,
+        TranslationResult.terminology_score, TranslationResult.overall_score
+    ).filter_by(task_id=task_id).all()
     
     task_data = {
         'id': task.id,
@@ -633,6 +1609,12 @@ def get_task_status(task_id):
         'results_count': len(results)
     }
     
+    # 运行中任务附带实时吞吐与剩余时间预测
+    live = task_progress.snapshot(task_id)
+    if live:
+        task_data['live'] = live
+        task_data['progress'] = max(task.progress or 0, int(task_data['live']['progress_percent']))
+    
     # 如果任务完成，包含结果统计
     if task.status == 'completed' and results:
         # 按模型分组结果
@@ -664,7 +1646,7 @@ def get_task_status(task_id):
         
         task_data['model_statistics'] = model_stats
     
-    return jsonify(task_data)
+    return task_data
 
 @app.route('/api/tasks/<task_id>/pause', methods=['POST'])
 def pause_task(task_id):
@@ -674,9 +1656,8 @@ def pause_task(task_id):
     if task.status not in ['running']:
         return jsonify({'error': '只能暂停正在运行的任务'}), 400
     
-    # 设置暂停标志
-    if task_id in task_control_flags:
-        task_control_flags[task_id]['paused'] = True
+    # 设置暂停标志（运行任务的进程立即响应）
+    task_controls.signal(task_id, paused=True)
     
     return jsonify({'success': True, 'message': '任务暂停请求已发送'})
 
@@ -689,8 +1670,7 @@ def resume_task(task_id):
         return jsonify({'error': '只能恢复已暂停的任务'}), 400
     
     # 清除暂停标志
-    if task_id in task_control_flags:
-        task_control_flags[task_id]['paused'] = False
+    task_controls.signal(task_id, paused=False)
     
     return jsonify({'success': True, 'message': '任务恢复请求已发送'})
 
@@ -702,42 +1682,54 @@ def terminate_task(task_id):
     if task.status not in ['running', 'paused']:
         return jsonify({'error': '只能终止正在运行或暂停的任务'}), 400
     
-    # 设置终止标志
-    if task_id in task_control_flags:
-        task_control_flags[task_id]['terminated'] = True
+    # 设置终止标志，正在进行的流式请求随之中断
+    task_controls.signal(task_id, terminated=True)
     
     return jsonify({'success': True, 'message': '任务终止请求已发送'})
 
-@app.route('/api/models/test', methods=['POST'])
-def test_models():
-    """使用示例翻译对测试选中的模型"""
+@app.route('/api/models/readiness')
+def get_models_readiness():
+    """获取各本地模型的就绪状态（stopped/starting/ready/failed）"""
+    models = model_lifecycle.get_status()
+    return jsonify({
+        'server_ready': True,
+        'models': models,
+        'circuit_breakers': circuit_breakers.get_status(),
+        'all_ready': all(info['state'] == 'ready' for info in models.values())
+    })
+
+def latest_data_file():
+    """data 目录中最新的JSON数据文件，没有时返回None"""
+    json_files = list((Path(__file__).parent.parent / "data").glob("*.json"))
+    return max(json_files, key=lambda f: f.stat().st_mtime) if json_files else None
+
+_sample_pair_cache = {'key': None, 'pair': None}
+_sample_pair_lock = Lock()
+
+def get_sample_pair():
+    """模型测试用的示例翻译对：data 目录中最新JSON文件的第一条，文件不变时直接使用缓存
+
+    使用独立的数据管理器解析，不影响运行中任务使用的全局 data_manager。
+    """
     try:
-        data = request.get_json()
-        selected_models = data.get('selected_models', [])
-        
-        if not selected_models:
-            return jsonify({'error': '未选择任何模型'}), 400
-        
-        # 获取示例翻译对（使用数据集中的第一条）
+        latest_file = latest_data_file()
+        key = (str(latest_file), latest_file.stat().st_mtime) if latest_file else None
+    except OSError as e:
+        app.logger.warning(f"查找示例数据失败: {e}")
+        key = None
+    with _sample_pair_lock:
+        if key is not None and _sample_pair_cache['key'] == key:
+            return _sample_pair_cache['pair']
         sample_pair = None
-        try:
-            # 尝试从最近上传的文件获取示例
-            data_manager.translation_pairs.clear()
-            
-            # 查找最近的JSON数据文件
-            data_dir = Path(__file__).parent.parent / "data"
-            json_files = list(data_dir.glob("*.json"))
-            
-            if json_files:
-                # 使用最新的JSON文件
-                latest_file = max(json_files, key=lambda f: f.stat().st_mtime)
-                data_manager.load_translation_pairs_from_json(str(latest_file))
-                
-                if data_manager.translation_pairs:
-                    sample_pair = next(iter(data_manager.translation_pairs.values()))
-        except Exception as e:
-            app.logger.warning(f"加载示例数据失败: {e}")
-        
+        if key is not None:
+            try:
+                from translation_data_manager import TranslationDataManager
+                sample_manager = TranslationDataManager()
+                sample_manager.load_translation_pairs_from_json(key[0])
+                if sample_manager.translation_pairs:
+                    sample_pair = next(iter(sample_manager.translation_pairs.values()))
+            except Exception as e:
+                app.logger.warning(f"加载示例数据失败: {e}")
         # 如果没有找到示例数据，使用内置示例
         if not sample_pair:
             from translation_data_manager import TranslationPair
@@ -751,105 +1743,419 @@ def test_models():
                 difficulty="medium",
                 context="航空维修手册"
             )
+        _sample_pair_cache.update(key=key, pair=sample_pair)
+        return sample_pair
+
+def test_single_model(model_key, sample_pair, timeout):
+    """测试单个模型：按需启动本地模型后翻译示例，翻译超过 timeout 秒视为超时（启动时间不计入）"""
+    try:
+        model_lifecycle.ensure_started([model_key])
+        start_time = time.time()
+        call = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-test')
+        try:
+            translation_result = call.submit(translate_pair, model_key, sample_pair).result(timeout=timeout)
+        finally:
+            # 超时的调用不再等待，线程结束后自动回收
+            call.shutdown(wait=False)
+        processing_time = time.time() - start_time
+    except FutureTimeoutError:
+        return {
+            'model': model_key,
+            'status': 'error',
+            'translated_text': '',
+            'processing_time': round(timeout, 2),
+            'error_message': f'{timeout:g}s 内未返回',
+            'quality_status': '超时'
+        }
+    except Exception as e:
+        return {
+            'model': model_key,
+            'status': 'error',
+            'translated_text': '',
+            'processing_time': 0,
+            'error_message': str(e),
+            'quality_status': '连接失败'
+        }
+    
+    # 简单的质量检查
+    quality_status = "正常"
+    if translation_result.error_message:
+        quality_status = "错误"
+    elif translation_result.translated_text == sample_pair.source_text:
+        quality_status = "未翻译"
+    elif sample_pair.target_lang == "zh" and not any('\u4e00' <= c <= '\u9fff' for c in translation_result.translated_text):
+        quality_status = "语言错误"
+    
+    return {
+        'model': model_key,
+        'status': 'success' if not translation_result.error_message else 'error',
+        'translated_text': translation_result.translated_text,
+        'processing_time': round(processing_time, 2),
+        'error_message': translation_result.error_message,
+        'quality_status': quality_status
+    }
+
+@app.route('/api/models/test', methods=['POST'])
+def test_models():
+    """使用示例翻译对并发测试选中的模型
+
+    请求 stream=true（或 Accept: application/x-ndjson）时以 NDJSON 逐行返回：先返回示例文本，
+    之后每个模型完成即返回一行，总耗时取决于最慢的模型。
+    """
+    try:
+        data = request.get_json()
+        selected_models = data.get('selected_models', [])
         
-        # 配置翻译引擎
-        for model_key in selected_models:
-            if model_key in config_manager.translation_models:
-                model_config = config_manager.translation_models[model_key]
-                translation_engine.add_model(model_key, model_config)
+        if not selected_models:
+            return jsonify({'error': '未选择任何模型'}), 400
         
-        # 测试每个模型
-        test_results = []
-        for model_key in selected_models:
-            try:
-                start_time = time.time()
-                
-                # 执行翻译测试
-                translation_result = translation_engine.translate_single(model_key, sample_pair)
-                
-                processing_time = time.time() - start_time
-                
-                # 简单的质量检查
-                quality_status = "正常"
-                if translation_result.error_message:
-                    quality_status = "错误"
-                elif translation_result.translated_text == sample_pair.source_text:
-                    quality_status = "未翻译"
-                elif sample_pair.target_lang == "zh" and not any('\u4e00' <= c <= '\u9fff' for c in translation_result.translated_text):
-                    quality_status = "语言错误"
-                
-                test_results.append({
-                    'model': model_key,
-                    'status': 'success' if not translation_result.error_message else 'error',
-                    'translated_text': translation_result.translated_text,
-                    'processing_time': round(processing_time, 2),
-                    'error_message': translation_result.error_message,
-                    'quality_status': quality_status
-                })
-                
-            except Exception as e:
-                test_results.append({
-                    'model': model_key,
-                    'status': 'error',
-                    'translated_text': '',
-                    'processing_time': 0,
-                    'error_message': str(e),
-                    'quality_status': '连接失败'
-                })
+        timeout = float(data.get('timeout') or os.getenv('MODEL_TEST_TIMEOUT', '60'))
+        stream = bool(data.get('stream')) or 'application/x-ndjson' in request.headers.get('Accept', '')
+        sample_pair = get_sample_pair()
         
-        return jsonify({
-            'success': True,
-            'sample_text': {
-                'source': sample_pair.source_text,
-                'reference': sample_pair.target_text
-            },
-            'test_results': test_results
-        })
+        # 配置翻译引擎；本地模型在各自的测试线程中按需启动
+        configure_translation_models(selected_models)
+        executor = ThreadPoolExecutor(max_workers=len(selected_models), thread_name_prefix='model-test')
+        futures = [executor.submit(test_single_model, model_key, sample_pair, timeout) for model_key in selected_models]
+        executor.shutdown(wait=False)
+        sample_text = {
+            'source': sample_pair.source_text,
+            'reference': sample_pair.target_text
+        }
+        
+        if not stream:
+            return jsonify({
+                'success': True,
+                'sample_text': sample_text,
+                'test_results': [future.result() for future in futures]
+            })
+        
+        def generate():
+            started = time.time()
+            yield json.dumps({'type': 'sample', 'sample_text': sample_text}, ensure_ascii=False) + '\n'
+            for future in as_completed(futures):
+                yield json.dumps({'type': 'result', **future.result()}, ensure_ascii=False) + '\n'
+            yield json.dumps({'type': 'done', 'elapsed': round(time.time() - started, 2)}) + '\n'
+        
+        return Response(generate(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
         
     except Exception as e:
         app.logger.error(f"模型测试失败: {e}")
         return jsonify({'error': f'模型测试失败: {str(e)}'}), 500
 
+@app.route('/api/models/<model_key>/load_test', methods=['POST'])
+def start_load_test(model_key):
+    """对单个模型按并发级别压测数据集样本（后台运行），返回测试ID"""
+    if not config_manager or model_key not in config_manager.translation_models:
+        return jsonify({'error': f'模型 {model_key} 未配置'}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        levels = [int(level) for level in data.get('levels') or DEFAULT_LEVELS]
+        sample_count = max(1, int(data.get('samples', 32)))
+        requests_per_level = int(data['requests_per_level']) if data.get('requests_per_level') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'levels、samples、requests_per_level 必须为整数'}), 400
+    if not levels or min(levels) < 1 or max(levels) > 256:
+        return jsonify({'error': '并发级别必须在 1-256 之间'}), 400
+    
+    filepath = data.get('filepath') or latest_data_file()
+    samples = []
+    if filepath:
+        if not os.path.exists(filepath):
+            return jsonify({'error': '数据文件不存在'}), 400
+        from translation_data_manager import TranslationDataManager
+        sample_manager = TranslationDataManager()
+        try:
+            sample_manager.load_translation_pairs_from_json(str(filepath))
+        except Exception as e:
+            return jsonify({'error': f'数据文件解析失败: {str(e)}'}), 400
+        samples = list(sample_manager.translation_pairs.values())[:sample_count]
+        if not samples:
+            return jsonify({'error': '数据文件中没有翻译对'}), 400
+    if not samples:
+        samples = [get_sample_pair()]
+    
+    configure_translation_models([model_key])
+    try:
+        run = load_tester.start(
+            model_key,
+            lambda pair: translate_pair(model_key, pair),
+            samples,
+            levels,
+            requests_per_level,
+            prepare=lambda: model_lifecycle.ensure_started([model_key])
+        )
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'success': True, 'run_id': run.run_id, 'levels': run.levels, 'samples': len(samples)}), 202
+
+@app.route('/api/models/load_tests')
+def list_load_tests():
+    """最近的负载测试（可按 model 过滤）"""
+    return jsonify({'runs': load_tester.list(request.args.get('model'), request.args.get('limit', 20, type=int))})
+
+@app.route('/api/models/load_tests/<run_id>')
+def get_load_test(run_id):
+    """负载测试结果：各并发级别的吞吐、P50/P95延迟、错误率与饱和点"""
+    run = load_tester.get(run_id)
+    if run is None:
+        return jsonify({'error': '负载测试不存在'}), 404
+    return jsonify(run)
+
 @app.route('/api/tasks/<task_id>/results')
 def get_task_results(task_id):
-    """获取任务的详细结果"""
+    """获取任务的详细结果（已结束任务的结果不再变化，序列化结果按任务版本缓存）"""
     task = EvaluationTask.query.get_or_404(task_id)
-    results = TranslationResult.query.filter_by(task_id=task_id).all()
     
-    results_data = []
-    for result in results:
-        results_data.append({
-            'pair_id': result.pair_id,
-            'source_text': result.source_text,
-            'target_text': result.target_text,
-            'model_name': result.model_name,
-            'translated_text': result.translated_text,
-            'accuracy_score': result.accuracy_score,
-            'fluency_score': result.fluency_score,
-            'terminology_score': result.terminology_score,
-            'overall_score': result.overall_score
-        })
+    def build():
+        results = TranslationResult.with_texts(TranslationResult.query.filter_by(task_id=task_id)).all()
+        
+        results_data = []
+        for result in results:
+            results_data.append({
+                'pair_id': result.pair_id,
+                'source_text': result.source_text,
+                'target_text': result.target_text,
+                'model_name': result.model_name,
+                'translated_text': result.translated_text,
+                'accuracy_score': result.accuracy_score,
+                'fluency_score': result.fluency_score,
+                'terminology_score': result.terminology_score,
+                'overall_score': result.overall_score
+            })
+        return results_data
     
-    return jsonify(results_data)
+    if task.status in TERMINAL_STATUSES:
+        return response_cache.json_response(build, etag=task_version(task), last_modified=task.completed_at,
+                                            cache=('task_results', task_id))
+    # 运行中的任务结果持续增加，只按响应体摘要支持条件请求
+    return response_cache.json_response(build)
 
 @app.route('/api/tasks')
 def get_all_tasks():
-    """获取所有任务列表"""
-    tasks = EvaluationTask.query.order_by(EvaluationTask.created_at.desc()).all()
+    """获取任务列表（按创建时间倒序分页：?limit=50&offset=0&status=completed）
+
+    总数在 X-Total-Count 响应头中，下一页/上一页地址在 Link 响应头中。
+    """
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    query = EvaluationTask.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter_by(status=status)
+    total = query.count()
+    tasks = query.order_by(EvaluationTask.created_at.desc()).offset(offset).limit(limit).all()
+    
+    def build():
+        tasks_data = []
+        for task in tasks:
+            tasks_data.append({
+                'id': task.id,
+                'name': task.name,
+                'status': task.status,
+                'progress': task.progress,
+                'created_at': task.created_at.isoformat() if task.created_at else None,
+                'completed_at': task.completed_at.isoformat() if task.completed_at else None,
+                'total_pairs': task.total_pairs
+            })
+        return tasks_data
     
-    tasks_data = []
+    etag = make_etag(total, offset, limit, status, *(task_version(task) for task in tasks))
+    response = response_cache.json_response(build, etag=etag)
+    response.headers['X-Total-Count'] = str(total)
+    links = []
+    page_url = lambda page_offset: request.base_url + '?' + urlencode(
+        {key: value for key, value in (('limit', limit), ('offset', page_offset), ('status', status)) if value})
+    if offset + limit < total:
+        links.append(f'<{page_url(offset + limit)}>; rel="next"')
+    if offset > 0:
+        links.append(f'<{page_url(max(0, offset - limit))}>; rel="prev"')
+    if links:
+        response.headers['Link'] = ', '.join(links)
+    return response
+
+@app.route('/api/translation_memory/search')
+def search_translation_memory():
+    """检索翻译记忆中与给定原文最相近的条目"""
+    text = request.args.get('text', '')
+    if not text:
+        return jsonify({'error': '缺少text参数'}), 400
+    k = request.args.get('k', 5, type=int)
+    model_name = request.args.get('model') or None
+    min_similarity = request.args.get('min_similarity', 0.0, type=float)
+    
+    start = time.perf_counter()
+    neighbors = ensure_translation_memory_loaded().query(text, k=k, model_name=model_name, min_similarity=min_similarity)
+    return jsonify({
+        'neighbors': neighbors,
+        'index_size': len(translation_memory),
+        'query_ms': round((time.perf_counter() - start) * 1000, 3)
+    })
+
+def _analytics_query():
+    """解析分析接口的公共参数，刷新内存列式副本；参数无效时返回错误信息"""
+    metric = request.args.get('metric', 'overall')
+    if metric not in METRICS:
+        return None, None, f"metric 只能是 {', '.join(METRICS)}"
+    group_by = request.args.get('group_by')
+    if group_by not in (None, '', 'model', 'category', 'difficulty'):
+        return None, None, 'group_by 只能是 model、category 或 difficulty'
+    filters = {
+        'model': request.args.get('model') or None,
+        'category': request.args.get('category') or None,
+        'difficulty': request.args.get('difficulty') or None,
+        'task_id': request.args.get('task_id') or None,
+        'since': request.args.get('since', type=float),
+        'until': request.args.get('until', type=float)
+    }
+    refresh_score_analytics()
+    return metric, filters, None
+
+def _analytics_response(payload, start):
+    payload['rows'] = len(score_analytics)
+    payload['query_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return jsonify(payload)
+
+@app.route('/api/analytics/histogram')
+def analytics_histogram():
+    """评分分布直方图（可按 model/category/difficulty 分组）"""
+    start = time.perf_counter()
+    metric, filters, error = _analytics_query()
+    if error:
+        return jsonify({'error': error}), 400
+    bins = min(max(request.args.get('bins', 20, type=int), 1), 200)
+    return _analytics_response(
+        score_analytics.histogram(metric, bins, group_by=request.args.get('group_by') or None, **filters), start)
+
+@app.route('/api/analytics/percentiles')
+def analytics_percentiles():
+    """各组评分的均值、标准差与分位数"""
+    start = time.perf_counter()
+    metric, filters, error = _analytics_query()
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        q = [float(value) for value in request.args.get('q', '5,25,50,75,95').split(',') if value.strip()]
+    except ValueError:
+        return jsonify({'error': 'q 应为逗号分隔的百分位数'}), 400
+    if not q or any(value < 0 or value > 100 for value in q):
+        return jsonify({'error': 'q 应在 0-100 之间'}), 400
+    return _analytics_response(
+        score_analytics.percentiles(metric, q, request.args.get('group_by', 'model') or None, **filters), start)
+
+@app.route('/api/analytics/deltas')
+def analytics_deltas():
+    """各模型相对基准模型在相同原文上的分差与胜/平/负比例"""
+    start = time.perf_counter()
+    metric, filters, error = _analytics_query()
+    if error:
+        return jsonify({'error': error}), 400
+    return _analytics_response(score_analytics.model_deltas(metric, request.args.get('baseline'), **filters), start)
+
+@app.route('/api/analytics/trends')
+def analytics_trends():
+    """按 hour/day/week 统计各组平均分随时间的变化"""
+    start = time.perf_counter()
+    metric, filters, error = _analytics_query()
+    if error:
+        return jsonify({'error': error}), 400
+    return _analytics_response(score_analytics.trend(metric, request.args.get('bucket', 'day'),
+                                                     request.args.get('group_by', 'model') or None, **filters), start)
+
+@app.route('/api/analytics/rebuild', methods=['POST'])
+def rebuild_score_analytics():
+    """为分析表上线前已完成的任务补写评分记录（类别/难度从任务数据文件读取）"""
+    recorded = {task_id for (task_id,) in db.session.query(ScoreRecord.task_id).distinct()}
+    tasks = [task for task in EvaluationTask.query.filter_by(status='completed') if task.id not in recorded]
+    rows = 0
     for task in tasks:
-        tasks_data.append({
-            'id': task.id,
-            'name': task.name,
-            'status': task.status,
-            'progress': task.progress,
-            'created_at': task.created_at.isoformat() if task.created_at else None,
-            'completed_at': task.completed_at.isoformat() if task.completed_at else None,
-            'total_pairs': task.total_pairs
-        })
+        pair_meta = {}
+        if task.data_file and os.path.exists(task.data_file):
+            try:
+                with open(task.data_file, 'r', encoding='utf-8') as f:
+                    pair_meta = {pair.get('id'): (pair.get('category'), pair.get('difficulty'))
+                                 for pair in json.load(f).get('translation_pairs', [])}
+            except Exception as e:
+                logging.warning(f"读取任务 {task.id} 的数据文件失败: {e}")
+        results = TranslationResult.query.filter_by(task_id=task.id).options(
+            db.selectinload(TranslationResult.source_blob)).all()
+        completed_at = (task.completed_at or task.created_at or datetime.utcnow()).replace(tzinfo=timezone.utc).timestamp()
+        rows += record_task_scores(task.id, results, pair_meta, completed_at)
+    return jsonify({'tasks': len(tasks), 'rows': rows})
+
+def _worker_request():
+    """解析工作节点请求体并校验共享令牌，令牌无效时返回None"""
+    if not shard_coordinator.authorized(request.headers.get('X-Worker-Token', '')):
+        return None
+    return request.get_json(silent=True) or {}
+
+# 工作节点可回传的结果字段（task_id 以分片所属任务为准）
+RESULT_FIELDS = ('pair_id', 'source_text', 'target_text', 'model_name', 'translated_text', 'accuracy_score',
+                 'fluency_score', 'terminology_score', 'overall_score', 'evaluation_details')
+
+@app.route('/api/workers/register', methods=['POST'])
+def register_worker():
+    """工作节点注册"""
+    data = _worker_request()
+    if data is None:
+        return jsonify({'error': '工作节点令牌无效'}), 403
+    worker_id = shard_coordinator.register_worker(data.get('worker_id'), data.get('info'))
+    return jsonify({'worker_id': worker_id, 'lease_seconds': shard_coordinator.lease_seconds})
+
+@app.route('/api/shards/lease', methods=['POST'])
+def lease_shard():
+    """工作节点拉取分片；暂无可分派的分片时返回204"""
+    data = _worker_request()
+    if data is None:
+        return jsonify({'error': '工作节点令牌无效'}), 403
+    shard = shard_coordinator.lease(data.get('worker_id'))
+    if shard is None:
+        return '', 204
+    return jsonify(shard)
+
+@app.route('/api/shards/<shard_id>/results', methods=['POST'])
+def upload_shard_results(shard_id):
+    """工作节点分批回传结果，按 (task_id, pair_id, model_name) 幂等写入"""
+    data = _worker_request()
+    if data is None:
+        return jsonify({'error': '工作节点令牌无效'}), 403
+    shard = shard_coordinator.get_shard(shard_id, data.get('worker_id'))
+    if shard is None:
+        return jsonify({'error': '分片租约无效或任务已取消'}), 409
+    
+    # 只接受该分片内的翻译对与模型，其他单元的结果不写入
+    pair_ids = {str(pair.get('id')) for pair in shard.pairs}
+    models = set(shard.models)
+    rows, rejected = [], 0
+    for item in data.get('results', []):
+        if str(item.get('pair_id')) not in pair_ids or item.get('model_name') not in models:
+            rejected += 1
+            continue
+        row = {key: item.get(key) for key in RESULT_FIELDS}
+        row['task_id'] = shard.task_id
+        rows.append(row)
+    if rejected:
+        logging.warning(f"分片 {shard_id} 回传了 {rejected} 条不属于该分片的结果，已忽略")
+    upserted = upsert_translation_results(rows)
     
-    return jsonify(tasks_data)
+    # 进度交给运行该任务的进程（可能不是本进程）汇总
+    shared_state.push_progress(shard.task_id, data.get('progress', []))
+    return jsonify({'upserted': upserted, 'rejected': rejected})
+
+@app.route('/api/shards/<shard_id>/complete', methods=['POST'])
+def complete_shard(shard_id):
+    """工作节点报告分片完成"""
+    data = _worker_request()
+    if data is None:
+        return jsonify({'error': '工作节点令牌无效'}), 403
+    if not shard_coordinator.complete(shard_id, data.get('worker_id'), data.get('error')):
+        return jsonify({'error': '分片租约无效或任务已取消'}), 409
+    return jsonify({'success': True})
+
+@app.route('/api/workers')
+def get_workers():
+    """查看已注册的工作节点与分片进度"""
+    return jsonify(shard_coordinator.get_status())
 
 @app.route('/api/logs')
 def get_logs():
@@ -869,8 +2175,11 @@ def get_translation_logs(task_id):
 
 @app.route('/api/performance')
 def get_performance_stats():
-    """获取性能统计"""
-    stats = performance_monitor.get_current_stats()
+    """获取性能统计；?since=<上次响应的 history.cursor> 时只返回新增采样点，?resolution=1|10|60 选择分辨率"""
+    stats = performance_monitor.get_current_stats(since=request.args.get('since', type=float),
+                                                  resolution=request.args.get('resolution', type=float))
+    stats['replica_pools'] = replica_pools.get_status()
+    stats['response_cache'] = response_cache.get_status()
     return jsonify(stats)
 
 @app.route('/api/performance/comparison')
@@ -891,6 +2200,26 @@ def stop_performance_monitoring():
     performance_monitor.stop_monitoring()
     return jsonify({'status': 'stopped'})
 
+@app.route('/api/profile')
+def profile_server():
+    """对本进程采样剖析 seconds 秒，返回折叠栈（可直接生成火焰图）；format=json 时返回热点栈统计"""
+    seconds = request.args.get('seconds', 5, type=float)
+    interval = request.args.get('interval_ms', 10, type=float) / 1000.0
+    include_idle = request.args.get('include_idle', 'false').lower() == 'true'
+    try:
+        stacks, samples = sampling_profiler.capture(seconds, max(interval, 0.001), include_idle)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'pid': os.getpid(),
+            'samples': samples,
+            'top_stacks': [{'stack': stack.split(';'), 'count': count}
+                           for stack, count in stacks.most_common(request.args.get('top', 20, type=int))]
+        })
+    return app.response_class(sampling_profiler.folded(stacks), mimetype='text/plain',
+                              headers={'Content-Disposition': f'attachment; filename=profile_{os.getpid()}.folded'})
+
 @app.route('/api/config/reload', methods=['POST'])
 def reload_config_from_env():
     """从 .env 重载在线模型 API Key 并持久化到配置文件"""
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI 入口（异步服务模式）
+只有下列长连接接口与健康检查在事件循环上异步处理：
+- /api/tasks/<id>/events、/api/logs/events、/api/performance/events：SSE 推送任务进度、日志与性能统计
+- /api/tasks/<id>/wait?since=<版本>：长轮询，任务版本变化或超时后返回
+- /api/models/health：并发探测全部本地模型端点
+- 本地模型副本池的周期健康检查改为在事件循环上并发执行（asyncio 原生连接），不再占用后台线程
+同一主题的所有连接共用一个轮询协程（见 utils/event_hub.py），每个连接只是一个等待事件的协程，
+数千个 SSE/长轮询连接不占用线程。
+
+其余所有页面与 API 都不是异步的：它们经 WSGI 适配在有界线程池（ASGI_WSGI_THREADS）中由 Flask 同步执行，
+并发能力与 gunicorn 线程部署相同；评估任务仍在后台线程中运行。
+
+用法（在 web_app 目录下，需安装 uvicorn 或 hypercorn）:
+    uvicorn asgi:application --host 0.0.0.0 --port 5001
+    hypercorn asgi:application --bind 0.0.0.0:5001
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import asyncio
+import logging
+from pathlib import Path
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加当前目录到路径以便导入app模块
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import app, initialize_system, build_task_status, task_version, EvaluationTask
+from web_app.utils.performance_monitor import performance_monitor
+from web_app.utils.replica_pool import replica_pools
+from web_app.utils.http_cache import TERMINAL_STATUSES
+from web_app.utils.event_hub import EventHub
+from web_app.utils.async_http import probe_all
+from utils.log_manager import log_manager
+
+logger = logging.getLogger(__name__)
+
+
+def _json_bytes(payload):
+    return json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _number(value, default, cast=float, minimum=0, maximum=None):
+    """解析数值查询参数（空值取默认值）；格式错误、NaN 或小于 minimum 时抛出 ValueError"""
+    if value is None or value == '':
+        return default
+    number = cast(value)
+    if math.isnan(number) or number < minimum:
+        raise ValueError(value)
+    return min(number, maximum) if maximum is not None else number
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def _read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return bytes(body)
+
+
+def _wsgi_environ(scope, body):
+    """由 ASGI HTTP scope 构造 WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'CONTENT_LENGTH': str(len(body)),
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsgiApplication:
+    """ASGI 应用：长连接接口在事件循环上处理，其余请求转交 Flask"""
+
+    def __init__(self, flask_app, wsgi_threads=32, poll_interval=1.0, heartbeat_seconds=15.0):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix='asgi-wsgi')
+        self.hub = EventHub(self.executor, poll_interval)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.background = []
+        self.initialized = None
+        self.routes = [
+            (('api', 'tasks', None, 'events'), self.task_events),
+            (('api', 'tasks', None, 'wait'), self.task_wait),
+            (('api', 'logs', 'events'), self.log_events),
+            (('api', 'performance', 'events'), self.performance_events),
+            (('api', 'models', 'health'), self.models_health),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        await self.startup()
+        if scope['method'] == 'GET':
+            segments = tuple(segment for segment in scope['path'].split('/') if segment)
+            for pattern, handler in self.routes:
+                if len(pattern) == len(segments) and all(p is None or p == s for p, s in zip(pattern, segments)):
+                    params = [s for p, s in zip(pattern, segments) if p is None]
+                    query = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+                    return await handler(scope, receive, send, query, *params)
+        await self.call_wsgi(scope, receive, send)
+
+    # ---- 生命周期 ----
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for task in self.background:
+                    task.cancel()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        """初始化系统（在线程池中执行，只执行一次），并在事件循环上启动副本池健康检查"""
+        if self.initialized is None:
+            self.initialized = asyncio.ensure_future(self._initialize())
+        await asyncio.shield(self.initialized)
+
+    async def _initialize(self):
+        # 副本池健康检查由本事件循环执行，不再启动健康检查线程
+        replica_pools.threaded_health_checks = False
+        self.flask_app.config['SERVER_PUSH'] = True
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(self.executor, initialize_system):
+            logger.error("系统初始化失败，请检查配置")
+        self.background.append(asyncio.ensure_future(self._health_loop()))
+        logger.info(f"ASGI 模式已启动：WSGI 线程 {self.executor._max_workers}，推送轮询间隔 {self.hub.interval}s")
+
+    async def _health_loop(self):
+        while True:
+            try:
+                targets = {(model_key, replica.url): replica.url
+                           for model_key, pool in list(replica_pools.pools.items()) for replica in pool.replicas}
+                statuses = await probe_all(targets, fallback=performance_monitor.check_endpoint_status)
+                for (model_key, url), status in statuses.items():
+                    replica_pools.get(model_key).update_health(url, status)
+            except Exception as e:
+                logger.error(f"副本健康检查出错: {e}")
+            await asyncio.sleep(replica_pools.health_interval)
+
+    # ---- WSGI 转交 ----
+
+    async def call_wsgi(self, scope, receive, send):
+        """在线程池中执行 Flask 应用；流式响应（如 NDJSON）逐块转发"""
+        body = await _read_body(receive)
+        if body is None:
+            return
+        environ = _wsgi_environ(scope, body)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, self.flask_app.wsgi_app, environ, start_response)
+        chunks = iter(result)
+        try:
+            chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            await send({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+
+    # ---- 推送接口 ----
+
+    async def respond_json(self, send, payload, status=200, headers=()):
+        body = _json_bytes(payload)
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), *headers]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def stream(self, receive, send, topic, encode):
+        """SSE：先发送主题当前数据，之后主题每次变化发送一次，空闲时发送心跳注释
+
+        encode 可以是协程函数（如需按连接自己的状态在线程池中读取数据）。
+        """
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no')]})
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            version = topic.version
+            await send({'type': 'http.response.body', 'body': await self._encode(encode, topic.payload),
+                        'more_body': True})
+            while not topic.final or topic.version > version:
+                changed = asyncio.ensure_future(topic.wait(version, self.heartbeat_seconds))
+                await asyncio.wait({changed, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    changed.cancel()
+                    return
+                if topic.version > version:
+                    version = topic.version
+                    message = await self._encode(encode, topic.payload)
+                else:
+                    message = b': ping\n\n'
+                await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'event: end\ndata: {}\n\n'})
+        finally:
+            disconnected.cancel()
+            self.hub.unsubscribe(topic)
+
+    @staticmethod
+    async def _encode(encode, payload):
+        message = encode(payload)
+        return await message if asyncio.iscoroutine(message) else message
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    def _task_fetch(self, task_id):
+        def fetch():
+            with self.flask_app.app_context():
+                task = EvaluationTask.query.get(task_id)
+                if task is None:
+                    return None
+                return {'version': task_version(task), 'task': build_task_status(task)}
+        return fetch
+
+    @staticmethod
+    def _task_final(payload):
+        return payload['task']['status'] in TERMINAL_STATUSES
+
+    async def task_events(self, scope, receive, send, query, task_id):
+        """任务进度 SSE：事件数据与 /api/tasks/<id> 相同，事件 id 为任务版本；任务结束后发送 end 事件并关闭"""
+        topic = await self.hub.subscribe(('task', task_id), self._task_fetch(task_id), is_final=self._task_final)
+        if topic.payload is None:
+            self.hub.unsubscribe(topic)
+            return await self.respond_json(send, {'error': '任务不存在'}, 404)
+
+        def encode(payload):
+            return f"id: {payload['version']}\nevent: status\ndata: {json.dumps(payload['task'], ensure_ascii=False)}\n\n".encode('utf-8')
+        await self.stream(receive, send, topic, encode)
+
+    async def task_wait(self, scope, receive, send, query, task_id):
+        """长轮询：任务版本与 since 不同时立即返回，否则最多等待 timeout 秒（上限60），仍未变化时返回304"""
+        since = query.get('since')
+        try:
+            timeout = _number(query.get('timeout'), 30.0, maximum=60.0)
+        except ValueError:
+            return await self.respond_json(send, {'error': 'timeout 必须是非负数'}, 400)
+        topic = await self.hub.subscribe(('task', task_id), self._task_fetch(task_id), is_final=self._task_final)
+        try:
+            if topic.payload is None:
+                return await self.respond_json(send, {'error': '任务不存在'}, 404)
+            deadline = asyncio.get_running_loop().time() + timeout
+            while topic.payload['version'] == since and not topic.final:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0 or not await topic.wait(topic.version, remaining):
+                    break
+            payload = topic.payload
+        finally:
+            self.hub.unsubscribe(topic)
+        etag = (b'etag', f'W/"{payload["version"]}"'.encode())
+        if payload['version'] == since:
+            await send({'type': 'http.response.start', 'status': 304, 'headers': [etag]})
+            return await send({'type': 'http.response.body', 'body': b''})
+        await self.respond_json(send, payload['task'], headers=(etag,))
+
+    async def log_events(self, scope, receive, send, query):
+        """最近日志 SSE（?type=translation 等过滤，?limit= 条数），数据与 /api/logs 相同"""
+        try:
+            limit = _number(query.get('limit'), 50, cast=int, minimum=1, maximum=500)
+        except ValueError:
+            return await self.respond_json(send, {'error': 'limit 必须是正整数'}, 400)
+        log_type = query.get('type')
+        topic = await self.hub.subscribe(('logs', log_type, limit),
+                                         lambda: log_manager.get_recent_logs(limit=limit, log_type=log_type))
+        await self.stream(receive, send, topic, lambda logs: b'event: logs\ndata: ' + _json_bytes(logs) + b'\n\n')
+
+    async def performance_events(self, scope, receive, send, query):
+        """性能统计 SSE：首个事件为完整历史，之后每个事件的 history 只包含该连接上次事件之后的采样点
+
+        共享主题只推送不含历史的快照；采样历史按每个连接自己的游标读取，连接错过中间的主题版本也不会丢点。
+        事件 id 为游标，断线重连时浏览器携带 Last-Event-ID（或 ?since=<游标>）从该位置续传；
+        游标早于已保留的最早采样点时返回完整历史（full=true），客户端替换而不是追加。
+        """
+        try:
+            since = _number(query.get('since') or _header(scope, b'last-event-id'), None)
+        except ValueError:
+            return await self.respond_json(send, {'error': 'since 必须是采样游标（时间戳）'}, 400)
+        cursor = {'since': since}
+        loop = asyncio.get_running_loop()
+
+        def fetch():
+            stats = performance_monitor.get_current_stats(endpoint_status=self._endpoint_status(), include_history=False)
+            stats['replica_pools'] = replica_pools.get_status()
+            return stats
+
+        async def encode(stats):
+            history = await loop.run_in_executor(self.executor, performance_monitor.sampler.history, None, cursor['since'])
+            cursor['since'] = history['cursor']
+            event_id = f"id: {cursor['since']}\n" if cursor['since'] is not None else ''
+            return (f"{event_id}event: performance\ndata: ".encode('utf-8')
+                    + _json_bytes(dict(stats, history=history)) + b'\n\n')
+
+        topic = await self.hub.subscribe(('performance',), fetch)
+        await self.stream(receive, send, topic, encode)
+
+    def _endpoint_status(self):
+        """由副本池健康状态生成端点在线状态（健康检查已在事件循环上执行，推送时不再逐个探测）"""
+        healthy = {replica['url']: replica['healthy'] for replicas in replica_pools.get_status().values()
+                   for replica in replicas}
+        return {name: {'online': healthy.get(url, False), 'model_loaded': healthy.get(url, False)}
+                for name, url in performance_monitor.local_endpoints.items()}
+
+    async def models_health(self, scope, receive, send, query):
+        """并发探测全部本地模型端点的 /health"""
+        statuses = await probe_all(performance_monitor.local_endpoints, fallback=performance_monitor.check_endpoint_status)
+        await self.respond_json(send, {'endpoints': statuses, 'streams': self.hub.get_status()})
+
+
+application = AsgiApplication(
+    app,
+    wsgi_threads=int(os.getenv('ASGI_WSGI_THREADS', '32')),
+    poll_interval=float(os.getenv('SSE_POLL_INTERVAL', '1')),
+    heartbeat_seconds=float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+)
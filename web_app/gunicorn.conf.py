@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn 配置
+每个工作进程启动后各自执行 initialize_system；任务控制、实时进度、日志与性能统计经共享状态（SHARED_STATE_DB）在进程间共享。
+
+用法（在 web_app 目录下）:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+# 评估任务在工作进程的后台线程中运行，使用多线程 worker 以免长请求阻塞
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = 300
+
+
+def post_worker_init(worker):
+    from app import initialize_system
+    if not initialize_system():
+        worker.log.error("系统初始化失败，请检查配置")
@@ -486,10 +486,28 @@ class TranslationEvaluationApp {
     }
 
     startTaskPolling() {
-        if (this.taskPollingInterval) {
-            clearInterval(this.taskPollingInterval);
+        this.stopTaskPolling();
+
+        // ASGI 模式下由服务端推送任务进度，连接失败时退回轮询
+        if (window.SERVER_PUSH && window.EventSource) {
+            const taskId = this.currentTaskId;
+            this.taskEvents = new EventSource(`/api/tasks/${taskId}/events`);
+            this.taskEvents.addEventListener('status', (event) => {
+                this.handleTaskUpdate(JSON.parse(event.data));
+            });
+            this.taskEvents.addEventListener('end', () => this.stopTaskPolling());
+            this.taskEvents.onerror = () => {
+                if (this.taskEvents && this.taskEvents.readyState === EventSource.CLOSED) {
+                    this.taskEvents = null;
+                    this.startIntervalPolling();
+                }
+            };
+            return;
         }
+        this.startIntervalPolling();
+    }
 
+    startIntervalPolling() {
         this.taskPollingInterval = setInterval(async () => {
             await this.updateTaskStatus();
         }, 2000); // 每2秒更新一次
@@ -498,33 +516,46 @@ class TranslationEvaluationApp {
         this.updateTaskStatus();
     }
 
+    stopTaskPolling() {
+        if (this.taskPollingInterval) {
+            clearInterval(this.taskPollingInterval);
+            this.taskPollingInterval = null;
+        }
+        if (this.taskEvents) {
+            this.taskEvents.close();
+            this.taskEvents = null;
+        }
+    }
+
     async updateTaskStatus() {
         if (!this.currentTaskId) return;
 
         try {
             const response = await fetch(`/api/tasks/${this.currentTaskId}`);
             const task = await response.json();
-
-            this.updateTaskDisplay(task);
-
-            if (task.status === 'completed') {
-                clearInterval(this.taskPollingInterval);
-                this.taskPollingInterval = null;
-                await this.loadTaskResults(this.currentTaskId);
-                this.showAlert('评估任务完成！', 'success');
-            } else if (task.status === 'failed') {
-                clearInterval(this.taskPollingInterval);
-                this.taskPollingInterval = null;
-                this.showAlert(`评估任务失败：${task.error_message}`, 'danger');
-            }
+            await this.handleTaskUpdate(task);
         } catch (error) {
             console.error('更新任务状态失败:', error);
         }
     }
 
+    async handleTaskUpdate(task) {
+        this.updateTaskDisplay(task);
+
+        if (task.status === 'completed') {
+            this.stopTaskPolling();
+            await this.loadTaskResults(this.currentTaskId);
+            this.showAlert('评估任务完成！', 'success');
+        } else if (task.status === 'failed') {
+            this.stopTaskPolling();
+            this.showAlert(`评估任务失败：${task.error_message}`, 'danger');
+        }
+    }
+
     updateTaskDisplay(task) {
         document.getElementById('currentTaskName').textContent = task.name;
         document.getElementById('currentTaskProgress').textContent = `${task.progress}%`;
+        document.getElementById('currentTaskEta').textContent = this.formatEta(task.live);
         
         const statusElement = document.getElementById('currentTaskStatus');
         statusElement.className = `status-badge status-${task.status}`;
@@ -543,6 +574,16 @@ class TranslationEvaluationApp {
         this.updateTaskControlButtons(task.status);
     }
 
+    formatEta(live) {
+        // 运行中任务显示剩余时间与吞吐
+        if (!live || live.eta_seconds === null || live.eta_seconds === undefined) return '';
+        const seconds = Math.round(live.eta_seconds);
+        const minutes = Math.floor(seconds / 60);
+        const eta = minutes > 0 ? `${minutes}分${seconds % 60}秒` : `${seconds}秒`;
+        const throughput = live.throughput_units_per_sec ? ` · ${live.throughput_units_per_sec} 单元/秒` : '';
+        return `剩余约 ${eta}${throughput}`;
+    }
+
     getStatusText(status) {
         const statusMap = {
             'pending': '等待中',
@@ -833,6 +874,10 @@ class TranslationEvaluationApp {
         if (testBtn) {
             testBtn.disabled = selectedModels === 0;
         }
+        const loadTestBtn = document.getElementById('loadTestBtn');
+        if (loadTestBtn) {
+            loadTestBtn.disabled = selectedModels === 0;
+        }
     }
 
     setupTaskControl() {
@@ -842,6 +887,16 @@ class TranslationEvaluationApp {
             testBtn.addEventListener('click', () => this.testSelectedModels());
         }
 
+        // 负载测试按钮
+        const loadTestBtn = document.getElementById('loadTestBtn');
+        if (loadTestBtn) {
+            loadTestBtn.addEventListener('click', () => this.openLoadTest());
+        }
+        const startLoadTestBtn = document.getElementById('startLoadTestBtn');
+        if (startLoadTestBtn) {
+            startLoadTestBtn.addEventListener('click', () => this.startLoadTest());
+        }
+
         // 任务控制按钮
         const pauseBtn = document.getElementById('pauseTaskBtn');
         const resumeBtn = document.getElementById('resumeTaskBtn');
@@ -883,24 +938,53 @@ class TranslationEvaluationApp {
         testResultsContent.style.display = 'none';
         testLoadingSpinner.style.display = 'block';
 
+        const testResultsTable = document.getElementById('testResultsTable');
+        if (testResultsTable) {
+            testResultsTable.innerHTML = '';
+        }
+
         try {
+            // 各模型并发测试，结果以 NDJSON 逐行返回，完成一个显示一个
             const response = await fetch('/api/models/test', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/x-ndjson'
                 },
                 body: JSON.stringify({
-                    selected_models: selectedModels
+                    selected_models: selectedModels,
+                    stream: true
                 })
             });
 
-            const result = await response.json();
-
-            if (result.success) {
-                this.displayTestResults(result);
-            } else {
+            if (!response.ok) {
+                const result = await response.json();
                 this.showAlert(`模型测试失败: ${result.error}`, 'danger');
                 modal.hide();
+                return;
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.filter(line => line.trim()).forEach(line => {
+                    const message = JSON.parse(line);
+                    if (message.type === 'sample') {
+                        this.displayTestSample(message.sample_text);
+                        testLoadingSpinner.style.display = 'none';
+                        testResultsContent.style.display = 'block';
+                    } else if (message.type === 'result') {
+                        this.appendTestResult(message);
+                    }
+                });
             }
         } catch (error) {
             this.showAlert(`模型测试失败: ${error.message}`, 'danger');
@@ -911,45 +995,44 @@ class TranslationEvaluationApp {
         }
     }
 
-    displayTestResults(result) {
+    displayTestSample(sampleText) {
         // 显示示例文本
         const testSourceText = document.getElementById('testSourceText');
         const testReferenceText = document.getElementById('testReferenceText');
 
         if (testSourceText && testReferenceText) {
-            testSourceText.textContent = result.sample_text.source;
-            testReferenceText.textContent = result.sample_text.reference;
+            testSourceText.textContent = sampleText.source;
+            testReferenceText.textContent = sampleText.reference;
         }
+    }
 
-        // 显示测试结果表格
+    appendTestResult(testResult) {
+        // 在测试结果表格中追加一行
         const testResultsTable = document.getElementById('testResultsTable');
-        if (testResultsTable) {
-            testResultsTable.innerHTML = '';
+        if (!testResultsTable) {
+            return;
+        }
+        const row = document.createElement('tr');
 
-            result.test_results.forEach(testResult => {
-                const row = document.createElement('tr');
-                
-                const statusBadge = testResult.status === 'success' ? 
-                    '<span class="badge bg-success">成功</span>' : 
-                    '<span class="badge bg-danger">失败</span>';
+        const statusBadge = testResult.status === 'success' ? 
+            '<span class="badge bg-success">成功</span>' : 
+            '<span class="badge bg-danger">失败</span>';
 
-                const qualityBadge = this.getQualityStatusBadge(testResult.quality_status);
-                
-                const translatedText = testResult.translated_text || testResult.error_message || '无输出';
-                const displayText = translatedText.length > 50 ? 
-                    translatedText.substring(0, 50) + '...' : translatedText;
-
-                row.innerHTML = `
-                    <td>${testResult.model}</td>
-                    <td>${statusBadge}</td>
-                    <td title="${translatedText}">${displayText}</td>
-                    <td>${testResult.processing_time}s</td>
-                    <td>${qualityBadge}</td>
-                `;
+        const qualityBadge = this.getQualityStatusBadge(testResult.quality_status);
+        
+        const translatedText = testResult.translated_text || testResult.error_message || '无输出';
+        const displayText = translatedText.length > 50 ? 
+            translatedText.substring(0, 50) + '...' : translatedText;
+
+        row.innerHTML = `
+            <td>${testResult.model}</td>
+            <td>${statusBadge}</td>
+            <td title="${translatedText}">${displayText}</td>
+            <td>${testResult.processing_time}s</td>
+            <td>${qualityBadge}</td>
+        `;
 
-                testResultsTable.appendChild(row);
-            });
-        }
+        testResultsTable.appendChild(row);
     }
 
     getQualityStatusBadge(status) {
@@ -958,7 +1041,8 @@ class TranslationEvaluationApp {
             '错误': '<span class="badge bg-danger">错误</span>',
             '未翻译': '<span class="badge bg-warning">未翻译</span>',
             '语言错误': '<span class="badge bg-warning">语言错误</span>',
-            '连接失败': '<span class="badge bg-secondary">连接失败</span>'
+            '连接失败': '<span class="badge bg-secondary">连接失败</span>',
+            '超时': '<span class="badge bg-secondary">超时</span>'
         };
         return badges[status] || `<span class="badge bg-secondary">${status}</span>`;
     }
@@ -967,6 +1051,158 @@ class TranslationEvaluationApp {
         await this.testSelectedModels();
     }
 
+    openLoadTest() {
+        const selectedModels = Array.from(document.querySelectorAll('.model-selector:checked'))
+            .map(checkbox => checkbox.value);
+        const modelSelect = document.getElementById('loadTestModel');
+        modelSelect.innerHTML = selectedModels
+            .map(model => `<option value="${model}">${model}</option>`).join('');
+
+        new bootstrap.Modal(document.getElementById('loadTestModal')).show();
+        this.renderLoadTest(null);
+    }
+
+    async startLoadTest() {
+        const model = document.getElementById('loadTestModel').value;
+        const levels = document.getElementById('loadTestLevels').value
+            .split(',').map(level => parseInt(level.trim(), 10)).filter(level => level > 0);
+        const samples = parseInt(document.getElementById('loadTestSamples').value, 10) || 32;
+        if (!model) {
+            return;
+        }
+
+        try {
+            const response = await fetch(`/api/models/${encodeURIComponent(model)}/load_test`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    levels: levels,
+                    samples: samples,
+                    filepath: this.uploadedFile ? this.uploadedFile.filepath : null
+                })
+            });
+            const result = await response.json();
+            if (!result.success) {
+                this.showAlert(`负载测试启动失败: ${result.error}`, 'danger');
+                return;
+            }
+            document.getElementById('startLoadTestBtn').disabled = true;
+            this.pollLoadTest(result.run_id);
+        } catch (error) {
+            this.showAlert(`负载测试启动失败: ${error.message}`, 'danger');
+        }
+    }
+
+    pollLoadTest(runId) {
+        // 每完成一个并发级别即更新曲线，测试结束后停止轮询
+        clearInterval(this.loadTestPolling);
+        const poll = async () => {
+            try {
+                const response = await fetch(`/api/models/load_tests/${runId}`);
+                const run = await response.json();
+                this.renderLoadTest(run);
+                if (run.state !== 'running') {
+                    clearInterval(this.loadTestPolling);
+                    document.getElementById('startLoadTestBtn').disabled = false;
+                }
+            } catch (error) {
+                console.error('获取负载测试结果失败:', error);
+            }
+        };
+        this.loadTestPolling = setInterval(poll, 2000);
+        poll();
+    }
+
+    renderLoadTest(run) {
+        const results = run ? run.results : [];
+        const status = document.getElementById('loadTestStatus');
+        if (!run) {
+            status.textContent = '';
+        } else if (run.state === 'running') {
+            status.textContent = `测试中：已完成 ${results.length}/${run.levels.length} 个并发级别`;
+        } else if (run.state === 'failed') {
+            status.textContent = `测试失败：${run.error}`;
+        } else {
+            const saturation = run.saturation;
+            status.textContent = saturation
+                ? `饱和点：并发 ${saturation.concurrency}（${saturation.throughput_rps} req/s，P95 ${saturation.p95_ms} ms）`
+                : '所有并发级别错误率过高，未找到饱和点';
+        }
+
+        const table = document.getElementById('loadTestTable');
+        table.innerHTML = results.map(level => `
+            <tr>
+                <td>${level.concurrency}</td>
+                <td>${level.requests}</td>
+                <td>${level.throughput_rps ?? '-'}</td>
+                <td>${level.p50_ms ?? '-'}</td>
+                <td>${level.p95_ms ?? '-'}</td>
+                <td>${(level.error_rate * 100).toFixed(1)}%</td>
+            </tr>
+        `).join('');
+
+        // 吞吐（左轴）与 P50/P95 延迟（右轴）随并发变化的曲线
+        const labels = results.map(level => level.concurrency);
+        if (!this.loadTestChart) {
+            const ctx = document.getElementById('loadTestChart').getContext('2d');
+            this.loadTestChart = new Chart(ctx, {
+                type: 'line',
+                data: {
+                    labels: [],
+                    datasets: [{
+                        label: '吞吐 (req/s)',
+                        data: [],
+                        borderColor: 'rgb(54, 162, 235)',
+                        yAxisID: 'throughput',
+                        tension: 0.1
+                    }, {
+                        label: 'P50 延迟 (ms)',
+                        data: [],
+                        borderColor: 'rgb(75, 192, 192)',
+                        yAxisID: 'latency',
+                        tension: 0.1
+                    }, {
+                        label: 'P95 延迟 (ms)',
+                        data: [],
+                        borderColor: 'rgb(255, 99, 132)',
+                        yAxisID: 'latency',
+                        tension: 0.1
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    animation: false,
+                    scales: {
+                        x: {
+                            title: { display: true, text: '并发数' }
+                        },
+                        throughput: {
+                            type: 'linear',
+                            position: 'left',
+                            beginAtZero: true,
+                            title: { display: true, text: 'req/s' }
+                        },
+                        latency: {
+                            type: 'linear',
+                            position: 'right',
+                            beginAtZero: true,
+                            grid: { drawOnChartArea: false },
+                            title: { display: true, text: 'ms' }
+                        }
+                    }
+                }
+            });
+        }
+        this.loadTestChart.data.labels = labels;
+        this.loadTestChart.data.datasets[0].data = results.map(level => level.throughput_rps);
+        this.loadTestChart.data.datasets[1].data = results.map(level => level.p50_ms);
+        this.loadTestChart.data.datasets[2].data = results.map(level => level.p95_ms);
+        this.loadTestChart.update('none');
+    }
+
     async pauseTask() {
         if (!this.currentTaskId) {
             this.showAlert('没有正在运行的任务', 'warning');
@@ -1105,6 +1341,11 @@ class MonitoringSystem {
         this.speedComparisonChart = null;
         this.logPollingInterval = null;
         this.performancePollingInterval = null;
+        // 系统指标历史：按服务端游标增量拉取并在本地累积
+        this.metricCursor = null;
+        this.metricHistory = { timestamps: [], cpu: [], memory: [] };
+        this.maxMetricPoints = 60;
+        this.processRss = {};
         
         this.initializeCharts();
         this.startMonitoring();
@@ -1242,6 +1483,20 @@ class MonitoringSystem {
     }
     
     startMonitoring() {
+        // ASGI 模式下日志与性能统计由服务端推送
+        if (window.SERVER_PUSH && window.EventSource) {
+            this.logEvents = new EventSource('/api/logs/events?limit=50');
+            this.logEvents.addEventListener('logs', (event) => this.renderLogs(JSON.parse(event.data)));
+            this.performanceEvents = new EventSource('/api/performance/events');
+            this.performanceEvents.addEventListener('performance', (event) => {
+                this.renderPerformanceStats(JSON.parse(event.data));
+            });
+            this.performancePollingInterval = setInterval(() => {
+                this.updateSpeedComparison();
+            }, 3000);
+            return;
+        }
+        
         // 启动日志轮询
         this.logPollingInterval = setInterval(() => {
             this.updateLogs();
@@ -1258,85 +1513,122 @@ class MonitoringSystem {
         try {
             const response = await fetch('/api/logs?limit=50');
             const logs = await response.json();
-            
-            const logWindow = document.getElementById('log-window');
-            if (!logWindow) return;
-            
-            let logHtml = '';
-            logs.forEach(log => {
-                const timestamp = new Date(log.timestamp).toLocaleTimeString();
-                const levelClass = this.getLogLevelClass(log.level);
-                const message = this.formatLogMessage(log);
-                
-                logHtml += `
-                    <div class="log-entry ${levelClass}">
-                        <span class="log-time">[${timestamp}]</span>
-                        <span class="log-level">[${log.level}]</span>
-                        <span class="log-message">${message}</span>
-                    </div>
-                `;
-            });
-            
-            logWindow.innerHTML = logHtml;
-            
-            // 自动滚动到底部
-            if (this.logAutoScroll) {
-                logWindow.scrollTop = logWindow.scrollHeight;
-            }
-            
+            this.renderLogs(logs);
         } catch (error) {
             console.error('更新日志失败:', error);
         }
     }
     
+    renderLogs(logs) {
+        const logWindow = document.getElementById('log-window');
+        if (!logWindow) return;
+        
+        let logHtml = '';
+        logs.forEach(log => {
+            const timestamp = new Date(log.timestamp).toLocaleTimeString();
+            const levelClass = this.getLogLevelClass(log.level);
+            const message = this.formatLogMessage(log);
+            
+            logHtml += `
+                <div class="log-entry ${levelClass}">
+                    <span class="log-time">[${timestamp}]</span>
+                    <span class="log-level">[${log.level}]</span>
+                    <span class="log-message">${message}</span>
+                </div>
+            `;
+        });
+        
+        logWindow.innerHTML = logHtml;
+        
+        // 自动滚动到底部
+        if (this.logAutoScroll) {
+            logWindow.scrollTop = logWindow.scrollHeight;
+        }
+    }
+    
     async updatePerformanceStats() {
         try {
-            const response = await fetch('/api/performance');
-            const stats = await response.json();
-            
-            if (stats.error) {
-                console.error('性能统计错误:', stats.error);
-                return;
-            }
-            
-            // 更新系统资源显示
-            document.getElementById('cpu-usage').textContent = `${stats.system.cpu_percent.toFixed(1)}%`;
-            document.getElementById('memory-usage').textContent = `${stats.system.memory_percent.toFixed(1)}%`;
-            
-            // 更新本地模型状态（多模型）
-            const localModelStatus = document.getElementById('local-model-status');
-            if (stats.local_models && stats.local_models.status) {
-                const s = stats.local_models.status;
-                const labels = Object.keys(s);
-                const parts = labels.map(k => `${s[k].online ? '🟢' : '🔴'} ${k}`);
-                localModelStatus.innerHTML = parts.join(' · ');
-                localModelStatus.className = 'h6 mb-0';
-            } else if (stats.local_model && stats.local_model.status) {
-                // 兼容旧结构
-                localModelStatus.textContent = stats.local_model.status.online ? '在线' : '离线';
-                localModelStatus.className = stats.local_model.status.online ? 'h4 mb-0 text-success' : 'h4 mb-0 text-danger';
-            }
-            
-            // 更新性能图表
-            if (stats.history && stats.history.timestamps.length > 0) {
-                const maxPoints = 20;
-                const timestamps = stats.history.timestamps.slice(-maxPoints);
-                const cpuData = stats.history.cpu.slice(-maxPoints);
-                const memoryData = stats.history.memory.slice(-maxPoints);
-                
-                this.performanceChart.data.labels = timestamps.map(t => 
-                    new Date(t).toLocaleTimeString()
-                );
-                this.performanceChart.data.datasets[0].data = cpuData;
-                this.performanceChart.data.datasets[1].data = memoryData;
-                this.performanceChart.update('none');
+            const params = new URLSearchParams({ resolution: 1 });
+            if (this.metricCursor !== null) {
+                params.set('since', this.metricCursor);
             }
-            
+            const response = await fetch(`/api/performance?${params}`);
+            const stats = await response.json();
+            this.renderPerformanceStats(stats);
         } catch (error) {
             console.error('更新性能统计失败:', error);
         }
     }
     
+    renderPerformanceStats(stats) {
+        if (stats.error) {
+            console.error('性能统计错误:', stats.error);
+            return;
+        }
+        
+        // 更新系统资源显示
+        document.getElementById('cpu-usage').textContent = `${stats.system.cpu_percent.toFixed(1)}%`;
+        document.getElementById('memory-usage').textContent = `${stats.system.memory_percent.toFixed(1)}%`;
+        
+        // 更新本地模型状态（多模型）
+        const localModelStatus = document.getElementById('local-model-status');
+        if (stats.local_models && stats.local_models.status) {
+            const s = stats.local_models.status;
+            const labels = Object.keys(s);
+            // 本地模型服务器进程的最近RSS（来自 history.processes）
+            const processes = (stats.history && stats.history.processes) || {};
+            labels.forEach(k => {
+                const rss = processes[k] ? processes[k].values.rss_mb : [];
+                if (rss.length) this.processRss[k] = rss[rss.length - 1];
+            });
+            const parts = labels.map(k => {
+                const rss = this.processRss[k];
+                return `${s[k].online ? '🟢' : '🔴'} ${k}` + (s[k].online && rss != null ? ` (${(rss / 1024).toFixed(1)}GB)` : '');
+            });
+            localModelStatus.innerHTML = parts.join(' · ');
+            localModelStatus.className = 'h6 mb-0';
+        } else if (stats.local_model && stats.local_model.status) {
+            // 兼容旧结构
+            localModelStatus.textContent = stats.local_model.status.online ? '在线' : '离线';
+            localModelStatus.className = stats.local_model.status.online ? 'h4 mb-0 text-success' : 'h4 mb-0 text-danger';
+        }
+        
+        // 更新性能图表（history 为增量编码，只包含游标之后的新采样点）
+        if (stats.history) {
+            this.appendMetricHistory(stats.history);
+            const history = this.metricHistory;
+            this.performanceChart.data.labels = history.timestamps.map(t =>
+                new Date(t * 1000).toLocaleTimeString()
+            );
+            this.performanceChart.data.datasets[0].data = history.cpu;
+            this.performanceChart.data.datasets[1].data = history.memory;
+            this.performanceChart.update('none');
+        }
+    }
+    
+    appendMetricHistory(delta) {
+        // full 表示游标已超出服务端保留范围（或首次请求），整体替换本地历史
+        if (delta.full) {
+            this.metricHistory = { timestamps: [], cpu: [], memory: [] };
+        }
+        const history = this.metricHistory;
+        const lastTimestamp = history.timestamps.length ? history.timestamps[history.timestamps.length - 1] : -Infinity;
+        let timestamp = delta.t0;
+        delta.dt_ms.forEach((dt, index) => {
+            timestamp += dt / 1000;
+            // 推送的增量可能与首个完整快照重叠，跳过已有的点
+            if (timestamp <= lastTimestamp) return;
+            history.timestamps.push(timestamp);
+            history.cpu.push(delta.values.cpu[index]);
+            history.memory.push(delta.values.memory[index]);
+        });
+        const overflow = history.timestamps.length - this.maxMetricPoints;
+        if (overflow > 0) {
+            Object.keys(history).forEach(key => history[key].splice(0, overflow));
+        }
+        this.metricCursor = delta.cursor;
+    }
+    
     async updateSpeedComparison() {
         try {
             const response = await fetch('/api/performance/comparison');
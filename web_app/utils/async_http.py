@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步健康检查
+ASGI 模式下本地模型端点的 /health 探测在事件循环上并发执行（asyncio 原生连接，不占用线程），
+返回结构与 PerformanceMonitor.check_endpoint_status 相同。https 端点回退到线程池中的同步探测
+（调用方传入 performance_monitor.check_endpoint_status）。
+"""
+
+import json
+import asyncio
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+OFFLINE = {'online': False, 'model_loaded': False}
+
+
+def _dechunk(body):
+    """解码 Transfer-Encoding: chunked 响应体"""
+    data = bytearray()
+    while body:
+        size_line, _, rest = body.partition(b'\r\n')
+        size = int(size_line.split(b';', 1)[0] or b'0', 16)
+        if size == 0:
+            break
+        data += rest[:size]
+        body = rest[size + 2:]
+    return bytes(data)
+
+
+async def get_json(url, timeout=2.0):
+    """异步 HTTP GET（仅 http），返回 (状态码, JSON)；响应体不是 JSON 时为 None"""
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+
+    async def request():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write((f"GET {path} HTTP/1.1\r\nHost: {parsed.netloc}\r\nAccept: application/json\r\n"
+                          f"Connection: close\r\n\r\n").encode('latin-1'))
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    raw = await asyncio.wait_for(request(), timeout)
+    head, _, body = raw.partition(b'\r\n\r\n')
+    lines = head.split(b'\r\n')
+    status = int(lines[0].split(b' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if headers.get(b'transfer-encoding') == b'chunked':
+        body = _dechunk(body)
+    try:
+        return status, json.loads(body) if body else None
+    except ValueError:
+        return status, None
+
+
+async def probe_endpoint(base_url, timeout=2.0, fallback=None):
+    """探测本地模型端点 <base_url>/health；fallback 为 https 端点使用的同步探测函数
+    （如 performance_monitor.check_endpoint_status，在线程池中执行），未提供时 https 端点视为离线"""
+    if urlparse(base_url).scheme != 'http':
+        if fallback is None:
+            return dict(OFFLINE)
+        return await asyncio.get_running_loop().run_in_executor(None, fallback, base_url)
+    try:
+        status, data = await get_json(f"{base_url.rstrip('/')}/health", timeout)
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+        logger.debug(f"健康检查 {base_url} 失败: {e}")
+        return dict(OFFLINE)
+    if status != 200:
+        return dict(OFFLINE)
+    return {'online': True, 'model_loaded': (data or {}).get('model_loaded', False)}
+
+
+async def probe_all(endpoints, timeout=2.0, fallback=None):
+    """并发探测 {名称: URL}，返回 {名称: 状态}"""
+    names = list(endpoints)
+    statuses = await asyncio.gather(*(probe_endpoint(endpoints[name], timeout, fallback) for name in names))
+    return dict(zip(names, statuses))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按模型的熔断器
+连续失败次数或滑动窗口内错误率超过阈值时打开熔断，打开期间该模型的单元直接跳过（不再逐条等待连接超时），
+其他模型照常执行；冷却时间到后进入半开状态，放行少量探测请求，成功则关闭，失败则以加倍的冷却时间重新打开。
+本地模型同时接收副本池健康检查（check_endpoint_status）的结果：全部副本不可用时立即打开，恢复健康后立即关闭。
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+
+from .task_control import TaskTerminated
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """模型熔断器处于打开状态，调用被跳过"""
+
+    def __init__(self, model_key, retry_in=None):
+        self.model_key = model_key
+        self.retry_in = retry_in
+        super().__init__(f"模型 {model_key} 已熔断" + (f"，{retry_in:.0f}s 后探测" if retry_in else ''))
+
+
+class CircuitBreaker:
+    """单个模型的熔断器"""
+
+    def __init__(self, model_key, failure_threshold=5, error_rate=0.5, window=20, min_requests=10,
+                 open_seconds=30.0, max_open_seconds=300.0, half_open_probes=1):
+        self.model_key = model_key
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = STATE_CLOSED
+        self.reason = None
+        self.outcomes = deque(maxlen=window)  # 最近请求是否成功
+        self.consecutive_failures = 0
+        self.cooldown = open_seconds
+        self.open_until = 0.0
+        self.probes = 0
+        self.trips = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """是否放行一次调用；打开期间返回False，半开时只放行有限个探测请求"""
+        with self.lock:
+            if self.state == STATE_OPEN:
+                if time.time() < self.open_until:
+                    self.skipped += 1
+                    return False
+                self.state = STATE_HALF_OPEN
+                self.probes = 0
+                logger.info(f"模型 {self.model_key} 熔断冷却结束，进入半开状态探测")
+            if self.state == STATE_HALF_OPEN:
+                if self.probes >= self.half_open_probes:
+                    self.skipped += 1
+                    return False
+                self.probes += 1
+            return True
+
+    def record(self, success):
+        """记录一次放行调用的结果"""
+        with self.lock:
+            if self.state == STATE_HALF_OPEN:
+                self.probes = max(0, self.probes - 1)
+                if success:
+                    self._close('探测成功')
+                else:
+                    # 探测失败：冷却时间加倍
+                    self.cooldown = min(self.cooldown * 2, self.max_open_seconds)
+                    self._trip('探测失败')
+                return
+            if self.state == STATE_OPEN:
+                # 打开前已放行的请求陆续返回，不再影响状态
+                return
+            self.outcomes.append(success)
+            if success:
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            failures = self.outcomes.count(False)
+            if self.consecutive_failures >= self.failure_threshold:
+                self._trip(f"连续失败 {self.consecutive_failures} 次")
+            elif len(self.outcomes) >= self.min_requests and failures / len(self.outcomes) >= self.error_rate:
+                self._trip(f"最近 {len(self.outcomes)} 次请求错误率 {failures / len(self.outcomes):.0%}")
+
+    def abandon(self):
+        """放行的调用因任务终止而中断，不计入结果"""
+        with self.lock:
+            if self.state == STATE_HALF_OPEN:
+                self.probes = max(0, self.probes - 1)
+
+    def update_health(self, healthy):
+        """健康检查结果：不可用时立即打开；因健康检查打开的熔断在恢复健康后立即关闭"""
+        with self.lock:
+            if not healthy and self.state != STATE_OPEN:
+                self._trip('健康检查失败')
+            elif healthy and self.state == STATE_OPEN and self.reason == '健康检查失败':
+                self._close('健康检查恢复')
+
+    def _trip(self, reason):
+        self.state = STATE_OPEN
+        self.reason = reason
+        self.open_until = time.time() + self.cooldown
+        self.probes = 0
+        self.trips += 1
+        logger.warning(f"模型 {self.model_key} 熔断打开（{reason}），{self.cooldown:.0f}s 内跳过该模型")
+
+    def _close(self, reason):
+        self.state = STATE_CLOSED
+        self.reason = None
+        self.outcomes.clear()
+        self.consecutive_failures = 0
+        self.cooldown = self.open_seconds
+        logger.info(f"模型 {self.model_key} 熔断关闭（{reason}）")
+
+    def retry_in(self):
+        return max(0.0, self.open_until - time.time()) if self.state == STATE_OPEN else None
+
+    def to_dict(self):
+        with self.lock:
+            failures = self.outcomes.count(False)
+            return {
+                'state': self.state,
+                'reason': self.reason,
+                'consecutive_failures': self.consecutive_failures,
+                'window_requests': len(self.outcomes),
+                'window_error_rate': round(failures / len(self.outcomes), 4) if self.outcomes else 0.0,
+                'retry_in_seconds': round(self.retry_in(), 1) if self.state == STATE_OPEN else None,
+                'trips': self.trips,
+                'skipped': self.skipped
+            }
+
+
+class CircuitBreakerRegistry:
+    """按模型管理熔断器"""
+
+    def __init__(self, enabled=True, **settings):
+        self.enabled = enabled
+        self.settings = settings
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def configure(self, enabled=None, **settings):
+        if enabled is not None:
+            self.enabled = enabled
+        self.settings.update({key: value for key, value in settings.items() if value is not None})
+        with self.lock:
+            self.breakers = {}
+        logger.info(f"模型熔断: enabled={self.enabled}, {self.settings}")
+
+    def get(self, model_key):
+        breaker = self.breakers.get(model_key)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.get(model_key)
+                if breaker is None:
+                    breaker = self.breakers[model_key] = CircuitBreaker(model_key, **self.settings)
+        return breaker
+
+    def call(self, model_key, fn, *args, is_failure=None):
+        """经熔断器调用；打开时抛出 CircuitOpenError。返回带 error_message 的结果也计为失败"""
+        if not self.enabled:
+            return fn(*args)
+        if is_failure is None:
+            is_failure = lambda result: bool(getattr(result, 'error_message', None))
+        breaker = self.get(model_key)
+        if not breaker.allow():
+            raise CircuitOpenError(model_key, breaker.retry_in())
+        try:
+            result = fn(*args)
+        except TaskTerminated:
+            breaker.abandon()
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(not is_failure(result))
+        return result
+
+    def update_health(self, model_key, healthy):
+        if self.enabled:
+            self.get(model_key).update_health(healthy)
+
+    def get_status(self):
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {model_key: breaker.to_dict() for model_key, breaker in breakers.items()}
+
+
+# 全局熔断器登记表（阈值在 initialize_system 中按环境变量配置）
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译对去重
+按规范化后的原文对翻译对分组，同组只需翻译一次；组内再按参考译文细分，同一子组只需评估一次
+"""
+
+import re
+import unicodedata
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """规范化文本：NFKC（统一全角/半角）并合并空白"""
+    if not text:
+        return ''
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+class PairGroup:
+    """原文相同的一组翻译对"""
+
+    def __init__(self, key):
+        self.key = key
+        self.subgroups = OrderedDict()  # 规范化参考译文 -> [pair, ...]
+        self.models = None  # 增量重评估时该组需要执行的模型（None 表示任务选择的全部模型）
+
+    @property
+    def representative(self):
+        """用于发送翻译请求的代表翻译对"""
+        return next(iter(self.subgroups.values()))[0]
+
+    @property
+    def pairs(self):
+        return [pair for members in self.subgroups.values() for pair in members]
+
+    def add(self, pair):
+        target_key = normalize_text(getattr(pair, 'target_text', ''))
+        self.subgroups.setdefault(target_key, []).append(pair)
+
+
+def group_duplicate_pairs(pairs):
+    """按规范化原文分组，保持首次出现顺序"""
+    groups = OrderedDict()
+    for pair in pairs:
+        key = normalize_text(pair.source_text)
+        if key not in groups:
+            groups[key] = PairGroup(key)
+        groups[key].add(pair)
+    return list(groups.values())
+
+
+def dedup_stats(total_pairs, groups, model_count):
+    """计算去重比例及节省的请求数"""
+    unique_sources = len(groups)
+    unique_evaluations = sum(len(g.subgroups) for g in groups)
+    return {
+        'total_pairs': total_pairs,
+        'unique_sources': unique_sources,
+        'unique_evaluations': unique_evaluations,
+        'dedup_ratio': round(1 - unique_sources / total_pairs, 4) if total_pairs else 0,
+        'translation_calls_saved': (total_pairs - unique_sources) * model_count,
+        'evaluation_calls_saved': (total_pairs - unique_evaluations) * model_count
+    }
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务端推送的事件主题（ASGI 模式）
+同一主题（如某个任务的进度、最近日志、性能统计）无论有多少个 SSE/长轮询连接，都只有一个轮询协程：
+按间隔在线程池中读取一次数据，内容变化时唤醒全部订阅者。订阅者只是等待事件的协程，
+数千个连接不占用线程，也不会把查询放大为连接数倍。最后一个订阅者断开后轮询停止。
+"""
+
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Topic:
+    """单个主题：最新数据与版本号，数据变化时唤醒等待者"""
+
+    def __init__(self, hub, key, fetch, interval, is_final=None):
+        self.hub = hub
+        self.key = key
+        self.fetch = fetch
+        self.interval = interval
+        self.is_final = is_final or (lambda payload: False)
+        self.payload = None
+        self.body = None
+        self.version = 0
+        self.final = False
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.ready = asyncio.Event()
+        self.task = None
+
+    async def _poll(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.subscribers and not self.final:
+                try:
+                    payload = await loop.run_in_executor(self.hub.executor, self.fetch)
+                except Exception as e:
+                    logger.warning(f"事件主题 {self.key} 读取失败: {e}")
+                else:
+                    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+                    if body != self.body:
+                        self._publish(payload, body)
+                self.ready.set()
+                if not self.final:
+                    await asyncio.sleep(self.interval)
+        finally:
+            self.ready.set()
+            self.hub._drop(self)
+
+    def _publish(self, payload, body):
+        self.payload = payload
+        self.body = body
+        self.version += 1
+        self.final = payload is None or self.is_final(payload)
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+    async def wait(self, version, timeout):
+        """等待版本号超过 version；超时返回False"""
+        if self.version > version or self.final:
+            return True
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class EventHub:
+    """按键管理主题；fetch 在线程池中执行（可以调用数据库与其他同步代码）"""
+
+    def __init__(self, executor=None, interval=1.0):
+        self.executor = executor
+        self.interval = interval
+        self.topics = {}
+
+    def _drop(self, topic):
+        if self.topics.get(topic.key) is topic:
+            del self.topics[topic.key]
+
+    async def subscribe(self, key, fetch, interval=None, is_final=None):
+        """订阅主题（不存在时创建并开始轮询），等到首次读取完成后返回；用完须调用 unsubscribe"""
+        topic = self.topics.get(key)
+        if topic is None or topic.final:
+            topic = Topic(self, key, fetch, interval or self.interval, is_final)
+            self.topics[key] = topic
+        topic.subscribers += 1
+        if topic.task is None:
+            topic.task = asyncio.ensure_future(topic._poll())
+        await topic.ready.wait()
+        return topic
+
+    def unsubscribe(self, topic):
+        topic.subscribers -= 1
+
+    def get_status(self):
+        return {
+            'topics': len(self.topics),
+            'subscribers': sum(topic.subscribers for topic in self.topics.values())
+        }
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对冲请求策略
+当本地模型调用超过其历史P95延迟仍未返回时，发送一个重复请求，取先返回的结果，并取消落败的一方
+"""
+
+import time
+import heapq
+import itertools
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .performance_monitor import performance_monitor
+from .task_control import CallScope, TaskTerminated, current_task_control, bind_task_control
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """按模型记录最近的请求延迟，用于计算对冲阈值"""
+
+    def __init__(self, max_samples=200):
+        self.max_samples = max_samples
+        self.samples = {}  # model_name -> deque[float]
+        self.lock = threading.Lock()
+
+    def record(self, model_name, latency):
+        """记录一次成功请求的延迟（秒）"""
+        with self.lock:
+            if model_name not in self.samples:
+                self.samples[model_name] = deque(maxlen=self.max_samples)
+            self.samples[model_name].append(latency)
+
+    def percentile(self, model_name, percentile, min_samples=1):
+        """计算指定模型的延迟分位数，样本不足时返回None"""
+        with self.lock:
+            values = sorted(self.samples.get(model_name, ()))
+        if len(values) < max(1, min_samples):
+            return None
+        index = min(len(values) - 1, int(round(percentile / 100.0 * (len(values) - 1))))
+        return values[index]
+
+
+class HedgedRequestPolicy:
+    """对冲请求执行器：主请求超过P95未返回时发送副本请求，先成功者胜出
+
+    主请求在调用方线程中执行，对冲请求在独立的有界线程池中执行，池满时不再对冲（不排队）。
+    两个请求各自绑定一个 CallScope：一方成功后取消另一方，流式调用随之断开连接；
+    非流式调用无法中断，落败的一方运行到结束后丢弃结果（主请求不可中断时调用方仍需等待其返回）。
+    """
+
+    def __init__(self, enabled=False, percentile=95, min_samples=20, min_delay=0.05, max_hedges=4):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latency = LatencyTracker()
+        self._timers = []  # 堆：(触发时间, 序号, 回调)
+        self._timer_condition = threading.Condition()
+        self._timer_thread = None
+        self._sequence = itertools.count()
+        self._set_pool(max_hedges)
+
+    def _set_pool(self, max_hedges):
+        self.max_hedges = max(1, max_hedges)
+        self.hedge_slots = threading.BoundedSemaphore(self.max_hedges)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_hedges, thread_name_prefix='hedge')
+
+    def configure(self, enabled=None, percentile=None, min_samples=None, min_delay=None, max_hedges=None):
+        """更新策略参数"""
+        if enabled is not None:
+            self.enabled = enabled
+        if percentile is not None:
+            self.percentile = percentile
+        if min_samples is not None:
+            self.min_samples = min_samples
+        if min_delay is not None:
+            self.min_delay = min_delay
+        if max_hedges is not None and max_hedges != self.max_hedges:
+            previous = self.executor
+            self._set_pool(max_hedges)
+            previous.shutdown(wait=False)
+        logger.info(f"对冲请求策略: enabled={self.enabled}, P{self.percentile}, 最少样本={self.min_samples}, "
+                    f"并发对冲上限={self.max_hedges}")
+
+    def hedge_delay(self, model_name):
+        """返回触发对冲的等待时间，样本不足时返回None（不对冲）"""
+        delay = self.latency.percentile(model_name, self.percentile, self.min_samples)
+        if delay is None:
+            return None
+        return max(delay, self.min_delay)
+
+    def execute(self, model_name, primary_fn, hedge_fn=None, is_failure=None):
+        """执行请求；hedge_fn为空时对同一服务重试
+
+        is_failure用于判断返回值是否视为失败（如带error_message的翻译结果），
+        失败的结果不会胜出，除非另一个请求也失败。
+        """
+        if is_failure is None:
+            is_failure = lambda r: bool(getattr(r, 'error_message', None))
+
+        if not self.enabled:
+            return self._timed_call(model_name, primary_fn, is_failure)
+
+        delay = self.hedge_delay(model_name)
+        if delay is None:
+            result = self._timed_call(model_name, primary_fn, is_failure)
+            performance_monitor.record_hedge(model_name, hedged=False, hedge_won=False)
+            return result
+
+        parent = current_task_control()
+        primary_scope = CallScope(parent)
+        state = {'finished': False, 'hedge': None, 'scope': None}
+        lock = threading.Lock()
+
+        def on_hedge_done(future):
+            # 对冲请求先成功时取消仍在进行的主请求
+            slots.release()
+            try:
+                succeeded = not is_failure(future.result())
+            except Exception:
+                succeeded = False
+            with lock:
+                if succeeded and not state['finished']:
+                    primary_scope.cancel()
+
+        def launch():
+            with lock:
+                if state['finished']:
+                    return
+                if not slots.acquire(blocking=False):
+                    logger.debug(f"{model_name} 对冲线程池已满，本次不对冲")
+                    return
+                logger.info(f"{model_name} 请求超过P{self.percentile}延迟 {delay:.2f}s，发送对冲请求")
+                state['scope'] = CallScope(parent)
+                state['hedge'] = self.executor.submit(
+                    self._scoped_call, model_name, hedge_fn or primary_fn, is_failure, state['scope'])
+            state['hedge'].add_done_callback(on_hedge_done)
+
+        slots = self.hedge_slots
+        self._schedule(delay, launch)
+        try:
+            result, error = self._scoped_call(model_name, primary_fn, is_failure, primary_scope, capture=True)
+        finally:
+            with lock:
+                state['finished'] = True
+            primary_scope.close()
+        hedge, hedge_scope = state['hedge'], state['scope']
+
+        if hedge is None:
+            performance_monitor.record_hedge(model_name, hedged=False, hedge_won=False)
+            return self._unwrap(result, error)
+        if parent is not None and parent.terminated:
+            hedge_scope.cancel()
+            parent.detach_call(hedge)
+            raise TaskTerminated(f"任务 {parent.task_id} 已被终止")
+        if error is None and not is_failure(result) and not primary_scope.terminated:
+            # 主请求先成功，取消对冲请求（非流式请求无法中断，登记到任务上，返回前不释放模型）
+            hedge_scope.cancel()
+            if parent is not None:
+                parent.detach_call(hedge)
+            performance_monitor.record_hedge(model_name, hedged=True, hedge_won=False)
+            return result
+
+        # 主请求失败或已被先成功的对冲请求取消：使用对冲请求的结果
+        try:
+            hedge_result, hedge_error = hedge.result(), None
+        except Exception as e:
+            hedge_result, hedge_error = None, e
+        if hedge_error is None and not is_failure(hedge_result):
+            performance_monitor.record_hedge(model_name, hedged=True, hedge_won=True)
+            return hedge_result
+        performance_monitor.record_hedge(model_name, hedged=True, hedge_won=False)
+        # 带错误信息的结果优先于异常作为兜底返回
+        if error is None and not primary_scope.terminated:
+            return result
+        if hedge_error is None:
+            return hedge_result
+        return self._unwrap(result, error)
+
+    @staticmethod
+    def _unwrap(result, error):
+        if error is not None:
+            raise error
+        return result
+
+    def _scoped_call(self, model_name, fn, is_failure, scope, capture=False):
+        """在绑定 scope 的当前线程中执行调用；capture=True 时返回 (结果, 异常)"""
+        try:
+            with bind_task_control(scope):
+                result = self._timed_call(model_name, fn, is_failure)
+        except Exception as e:
+            if not capture:
+                raise
+            return None, e
+        finally:
+            if not capture:
+                scope.close()
+        return (result, None) if capture else result
+
+    def _timed_call(self, model_name, fn, is_failure):
+        """执行调用并在成功时记录延迟"""
+        start = time.time()
+        result = fn()
+        if not is_failure(result):
+            self.latency.record(model_name, time.time() - start)
+        return result
+
+    def _schedule(self, delay, callback):
+        """delay 秒后在定时线程中执行 callback（所有请求共用一个定时线程）"""
+        with self._timer_condition:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._sequence), callback))
+            if self._timer_thread is None or not self._timer_thread.is_alive():
+                self._timer_thread = threading.Thread(target=self._timer_loop, daemon=True, name='hedge-timer')
+                self._timer_thread.start()
+            self._timer_condition.notify()
+
+    def _timer_loop(self):
+        while True:
+            with self._timer_condition:
+                while not self._timers or self._timers[0][0] > time.monotonic():
+                    timeout = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._timer_condition.wait(timeout)
+                _, _, callback = heapq.heappop(self._timers)
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"发送对冲请求失败: {e}")
+
+
+# 全局对冲策略实例
+hedging_policy = HedgedRequestPolicy()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+读多写少接口的响应缓存
+- 条件请求：按任务状态/完成时间或配置文件修改时间生成弱 ETag 与 Last-Modified，命中 If-None-Match/If-Modified-Since 时
+  直接返回 304，不再查询结果或渲染模板
+- 已结束任务（completed/failed/terminated）的报告不再变化，序列化后的响应体按字节上限 LRU 缓存在进程内，
+  压缩后的版本随缓存条目保存，重复请求不再重新压缩
+- 响应压缩：超过最小长度的 JSON/HTML/文本响应按客户端 Accept-Encoding 使用 brotli（安装 brotli 时）或 gzip 压缩；
+  流式响应（如 NDJSON）不压缩
+"""
+
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timezone
+
+from flask import request, current_app
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli as _brotli
+except ImportError:
+    _brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+# 已结束、结果不再变化的任务状态
+TERMINAL_STATUSES = ('completed', 'failed', 'terminated')
+
+
+def make_etag(*parts):
+    """由版本信息生成 ETag 值（不含引号与 W/ 前缀）"""
+    return hashlib.sha1('\x00'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified(etag=None, last_modified=None):
+    """请求的缓存副本是否仍然有效（有 If-None-Match 时忽略 If-Modified-Since）"""
+    if request.if_none_match:
+        return etag is not None and request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return _naive_utc(last_modified).replace(microsecond=0) <= _naive_utc(request.if_modified_since)
+    return False
+
+
+def _naive_utc(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def negotiate_encoding():
+    """按 Accept-Encoding 选择压缩算法：优先 br（需安装 brotli），其次 gzip"""
+    accepted = request.accept_encodings
+    if _brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return _brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CachedBody:
+    """序列化后的响应体及其各压缩版本"""
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.encoded = {}
+
+    def get(self, encoding):
+        if encoding is None:
+            return self.body
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compress_body(self.body, encoding)
+        return self.encoded[encoding]
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+class ResponseCache:
+    """条件请求、进程内响应缓存与响应压缩"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, compression=True, min_compress_bytes=1024):
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.min_compress_bytes = min_compress_bytes
+        self.entries = OrderedDict()  # (名称, 键) -> (版本, CachedBody)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def configure(self, max_bytes=None, compression=None, min_compress_bytes=None):
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if compression is not None:
+            self.compression = compression
+        if min_compress_bytes is not None:
+            self.min_compress_bytes = min_compress_bytes
+        self.clear()
+        logger.info(f"响应缓存: 上限 {self.max_bytes // (1024 * 1024)}MB, 压缩={self.compression}"
+                    f"（{'br/gzip' if _brotli is not None else 'gzip'}，最小 {self.min_compress_bytes} 字节）")
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _lookup(self, name, key, version):
+        with self.lock:
+            entry = self.entries.get((name, key))
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end((name, key))
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def _store(self, name, key, version, cached):
+        with self.lock:
+            previous = self.entries.pop((name, key), None)
+            if previous is not None:
+                self.size -= previous[1].size
+            if cached.size > self.max_bytes:
+                return
+            self.entries[(name, key)] = (version, cached)
+            self.size += cached.size
+            while self.size > self.max_bytes and self.entries:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def _resize(self, name, key, cached, before):
+        """按需生成的压缩版本计入缓存大小（条目已被淘汰时忽略）"""
+        with self.lock:
+            entry = self.entries.get((name, key))
+            if entry is not None and entry[1] is cached:
+                self.size += cached.size - before
+
+    def json_response(self, build, etag=None, last_modified=None, cache=None, max_age=0):
+        """返回 JSON 响应，支持条件请求
+
+        build() 生成可序列化的数据；etag 为空时以响应体摘要作为 ETag（仍需执行 build，但命中时不传输响应体）。
+        cache=(名称, 键) 时按 etag 版本缓存序列化结果，适用于内容不再变化的响应。
+        """
+        if etag is not None and not_modified(etag, last_modified):
+            return self._not_modified(etag, last_modified, max_age)
+        if etag is None:
+            cache = None
+        cached = self._lookup(*cache, etag) if cache else None
+        if cached is None:
+            body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            cached = CachedBody(body, 'application/json')
+            if etag is None:
+                etag = make_etag(hashlib.sha1(body).hexdigest())
+                if not_modified(etag):
+                    return self._not_modified(etag, last_modified, max_age)
+            if cache:
+                self._store(*cache, etag, cached)
+        encoding = negotiate_encoding() if self.compression and len(cached.body) >= self.min_compress_bytes else None
+        before = cached.size
+        response = current_app.response_class(cached.get(encoding), mimetype=cached.mimetype)
+        if cache:
+            self._resize(*cache, cached, before)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return self.set_validators(response, etag, last_modified, max_age)
+
+    def _not_modified(self, etag, last_modified, max_age):
+        return self.set_validators(current_app.response_class(status=304), etag, last_modified, max_age)
+
+    @staticmethod
+    def set_validators(response, etag, last_modified, max_age):
+        if etag is not None:
+            response.set_etag(etag, weak=True)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        # 允许缓存，但每次使用前向服务器验证（命中时为 304）
+        response.cache_control.no_cache = None if max_age else True
+        if max_age:
+            response.cache_control.max_age = max_age
+        return response
+
+    def compress_response(self, response):
+        """after_request 钩子：压缩未经处理的大响应"""
+        if (not self.compression or response.status_code != 200 or response.direct_passthrough
+                or response.is_streamed or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_compress_bytes:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+        response.set_data(compress_body(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        if response.get_etag()[0]:
+            # 压缩后的字节不同，强 ETag 降为弱 ETag
+            response.set_etag(response.get_etag()[0], weak=True)
+        return response
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'compression': ('br', 'gzip') if _brotli is not None else ('gzip',)
+            }
+
+
+# 全局响应缓存（上限与压缩设置在 initialize_system 中按环境变量配置）
+response_cache = ResponseCache()
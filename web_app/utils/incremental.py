@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量重评估
+每个任务记录一份清单：翻译对id -> 原文与参考译文的内容键、各翻译模型的配置指纹
+（开启流式翻译时含内置翻译提示词版本与提前终止阈值）与评估指纹（评估模型配置、预筛选阈值、术语表内容）。
+新任务指定基准任务时，按翻译对id与内容键比对数据集、按指纹比对模型配置，
+只执行新增或发生变化的（翻译对, 模型）单元，其余结果直接从基准任务复制。
+"""
+
+import json
+import hashlib
+import logging
+
+from .dedup import group_duplicate_pairs
+
+logger = logging.getLogger(__name__)
+
+# 不影响翻译结果、不应写入指纹的配置字段
+SECRET_FIELDS = ('api_key',)
+
+
+def pair_fingerprint(source_text, target_text):
+    """翻译对内容键：原文与参考译文任一变化（含空白）都视为变化"""
+    return hashlib.sha1(f"{source_text or ''}\x00{target_text or ''}".encode('utf-8')).hexdigest()
+
+
+def config_fingerprint(config):
+    """模型配置指纹（不含密钥）；没有配置时返回None"""
+    if config is None:
+        return None
+    fields = config if isinstance(config, dict) else vars(config)
+    payload = {key: value for key, value in fields.items()
+               if not key.startswith('_') and key not in SECRET_FIELDS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def build_manifest(pairs, model_configs, evaluator_config=None):
+    """生成任务清单；model_configs 为 {模型: 配置}"""
+    return {
+        'pairs': {pair.id: pair_fingerprint(pair.source_text, getattr(pair, 'target_text', '')) for pair in pairs},
+        'models': {model_key: config_fingerprint(config) for model_key, config in model_configs.items()},
+        'evaluator': config_fingerprint(evaluator_config)
+    }
+
+
+class IncrementalPlan:
+    """与基准任务比对的结果：需要执行的单元与可从基准复制的单元"""
+
+    def __init__(self, baseline_task_id, run, reuse, changes):
+        self.baseline_task_id = baseline_task_id
+        self.run = run  # {pair_id: [需要执行的模型, ...]}
+        self.reuse = reuse  # {(pair_id, 模型), ...}
+        self.changes = changes
+
+    @property
+    def units_run(self):
+        return sum(len(models) for models in self.run.values())
+
+    def groups(self, pairs):
+        """需要执行的翻译对分组：需要执行的模型相同的翻译对才去重合并，组上记录该组的模型"""
+        buckets = {}
+        for pair in pairs:
+            models = self.run.get(pair.id)
+            if models:
+                buckets.setdefault(tuple(models), []).append(pair)
+        groups = []
+        for models, members in buckets.items():
+            for group in group_duplicate_pairs(members):
+                group.models = list(models)
+                groups.append(group)
+        return groups
+
+    def model_units(self):
+        """各模型需要执行的单元数（进度统计用）"""
+        totals = {}
+        for models in self.run.values():
+            for model_key in models:
+                totals[model_key] = totals.get(model_key, 0) + 1
+        return totals
+
+    def summary(self):
+        return {
+            'baseline_task_id': self.baseline_task_id,
+            'units_run': self.units_run,
+            'units_reused': len(self.reuse),
+            **self.changes
+        }
+
+
+def diff_manifests(current, baseline, model_keys, available, baseline_task_id=None):
+    """比对当前清单与基准清单
+
+    available 为基准任务中已有有效结果的 {(pair_id, 模型)}；基准任务缺失或失败的单元总是重新执行。
+    评估指纹变化时所有评分都可能变化，全部单元重新执行。
+    """
+    base_pairs = baseline.get('pairs', {})
+    base_models = baseline.get('models', {})
+    evaluator_changed = current.get('evaluator') != baseline.get('evaluator')
+    unchanged_models = {model_key for model_key in model_keys
+                        if model_key in base_models and current['models'].get(model_key) == base_models[model_key]}
+    changes = {
+        'pairs_added': 0,
+        'pairs_changed': 0,
+        'pairs_removed': len(set(base_pairs) - set(current['pairs'])),
+        'models_added': [model_key for model_key in model_keys if model_key not in base_models],
+        'models_changed': [model_key for model_key in model_keys
+                           if model_key in base_models and model_key not in unchanged_models],
+        'evaluator_changed': evaluator_changed
+    }
+    run, reuse = {}, set()
+    for pair_id, fingerprint in current['pairs'].items():
+        if pair_id not in base_pairs:
+            changes['pairs_added'] += 1
+        elif base_pairs[pair_id] != fingerprint:
+            changes['pairs_changed'] += 1
+        pair_unchanged = base_pairs.get(pair_id) == fingerprint and not evaluator_changed
+        for model_key in model_keys:
+            if pair_unchanged and model_key in unchanged_models and (pair_id, model_key) in available:
+                reuse.add((pair_id, model_key))
+            else:
+                run.setdefault(pair_id, []).append(model_key)
+    plan = IncrementalPlan(baseline_task_id, run, reuse, changes)
+    logger.info(f"增量重评估（基准 {baseline_task_id}）: 执行 {plan.units_run} 个单元, 复用 {len(reuse)} 个单元, "
+                f"新增翻译对 {changes['pairs_added']}, 变化 {changes['pairs_changed']}, "
+                f"新增模型 {changes['models_added']}, 配置变化 {changes['models_changed']}")
+    return plan
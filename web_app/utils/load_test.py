@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型负载测试
+对单个模型按并发级别（默认 1, 2, 4, 8, 16）依次压测数据集样本，记录每级的吞吐（请求/秒）、
+P50/P95 延迟与错误率，并找出饱和点（再增加并发吞吐不再明显提升的级别），用于确定各模型的并发上限与副本数。
+每完成一级即把结果写入 results/load_tests/<run_id>.json，多进程部署时任一进程都能查询进度。
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEVELS = (1, 2, 4, 8, 16)
+# 吞吐提升低于该比例、或错误率超过该值时认为已饱和
+SATURATION_MIN_GAIN = 0.1
+SATURATION_MAX_ERROR_RATE = 0.05
+
+
+def percentile(sorted_values, q):
+    """线性插值分位数（sorted_values 已升序）"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def measure_level(call, samples, concurrency, requests):
+    """以固定并发执行 requests 次调用，返回该级别的吞吐、延迟与错误率"""
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(index):
+        started = time.perf_counter()
+        try:
+            result = call(samples[index % len(samples)])
+            error = getattr(result, 'error_message', None)
+        except Exception as e:
+            error = str(e)
+        elapsed = time.perf_counter() - started
+        with lock:
+            if error:
+                errors.append(error)
+            else:
+                latencies.append(elapsed)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f'load-test-{concurrency}') as executor:
+        list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - wall_started
+    latencies.sort()
+    to_ms = lambda value: round(value * 1000, 1) if value is not None else None
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': len(errors),
+        'error_rate': round(len(errors) / requests, 4) if requests else 0.0,
+        'throughput_rps': round(len(latencies) / wall, 3) if wall > 0 else None,
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p95_ms': to_ms(percentile(latencies, 95)),
+        'mean_ms': to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        'wall_seconds': round(wall, 2),
+        'sample_error': errors[0] if errors else None
+    }
+
+
+def find_saturation(levels):
+    """饱和点：吞吐仍有明显提升且错误率可接受的最高并发级别"""
+    best = None
+    for level in levels:
+        if level['error_rate'] > SATURATION_MAX_ERROR_RATE or not level['throughput_rps']:
+            reason = 'error_rate'
+            break
+        if best is not None and level['throughput_rps'] < best['throughput_rps'] * (1 + SATURATION_MIN_GAIN):
+            reason = 'throughput_plateau'
+            break
+        best = level
+    else:
+        reason = 'max_level_reached'
+    if best is None:
+        return None
+    return {
+        'concurrency': best['concurrency'],
+        'throughput_rps': best['throughput_rps'],
+        'p95_ms': best['p95_ms'],
+        'reason': reason
+    }
+
+
+class LoadTestRun:
+    """一次负载测试"""
+
+    def __init__(self, model_key, levels, requests_per_level, sample_count):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.model_key = model_key
+        self.levels = list(levels)
+        self.requests_per_level = requests_per_level
+        self.sample_count = sample_count
+        self.state = 'running'
+        self.results = []
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'model': self.model_key,
+            'state': self.state,
+            'levels': self.levels,
+            'requests_per_level': self.requests_per_level,
+            'samples': self.sample_count,
+            'results': self.results,
+            'saturation': find_saturation(self.results),
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class LoadTester:
+    """负载测试登记表：每个模型同时只运行一次测试"""
+
+    def __init__(self, results_dir=os.path.join('results', 'load_tests')):
+        self.results_dir = results_dir
+        self.running = {}  # model_key -> LoadTestRun
+        self.lock = threading.Lock()
+
+    def start(self, model_key, call, samples, levels=DEFAULT_LEVELS, requests_per_level=None, prepare=None):
+        """在后台线程中开始测试；该模型已有测试在运行时抛出 RuntimeError
+
+        requests_per_level 为空时每级执行 max(样本数, 并发×4) 次调用；prepare() 在压测前执行（如启动本地模型）。
+        """
+        levels = sorted({int(level) for level in levels if int(level) > 0})
+        with self.lock:
+            if model_key in self.running:
+                raise RuntimeError(f"模型 {model_key} 的负载测试正在进行")
+            run = LoadTestRun(model_key, levels, requests_per_level, len(samples))
+            self.running[model_key] = run
+        self._save(run)
+        threading.Thread(target=self._run, args=(run, call, samples, prepare), daemon=True,
+                         name=f'load-test-{model_key}').start()
+        return run
+
+    def _run(self, run, call, samples, prepare):
+        try:
+            if prepare is not None:
+                prepare()
+            for concurrency in run.levels:
+                requests = run.requests_per_level or max(len(samples), concurrency * 4)
+                level = measure_level(call, samples, concurrency, requests)
+                run.results.append(level)
+                logger.info(f"负载测试 {run.model_key} 并发 {concurrency}: {level['throughput_rps']} req/s, "
+                            f"P50 {level['p50_ms']}ms, P95 {level['p95_ms']}ms, 错误率 {level['error_rate']:.1%}")
+                self._save(run)
+            run.state = 'completed'
+        except Exception as e:
+            run.state = 'failed'
+            run.error = str(e)
+            logger.error(f"负载测试 {run.model_key} 失败: {e}")
+        finally:
+            run.finished_at = time.time()
+            self._save(run)
+            with self.lock:
+                self.running.pop(run.model_key, None)
+
+    def _path(self, run_id):
+        return os.path.join(self.results_dir, f"{run_id}.json")
+
+    def _save(self, run):
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = self._path(run.run_id)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(run.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def get(self, run_id):
+        """读取测试结果（运行中的测试为已完成级别的部分结果），不存在时返回None"""
+        if not run_id.isalnum():
+            return None
+        try:
+            with open(self._path(run_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def list(self, model_key=None, limit=20):
+        """最近的测试（新的在前）"""
+        if not os.path.isdir(self.results_dir):
+            return []
+        paths = sorted((os.path.join(self.results_dir, name) for name in os.listdir(self.results_dir)
+                        if name.endswith('.json')), key=os.path.getmtime, reverse=True)
+        runs = []
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    run = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if model_key is None or run.get('model') == model_key:
+                runs.append(run)
+            if len(runs) >= limit:
+                break
+        return runs
+
+
+# 全局负载测试登记表
+load_tester = LoadTester()
@@ -3,6 +3,7 @@
 """
 日志管理器
 实时收集和管理翻译过程中的日志信息
+多进程部署时可挂接共享状态存储，各进程的日志与翻译进度汇总到同一处，所有查询都从共享存储读取
 """
 
 import time
@@ -51,10 +52,22 @@ class LogManager:
         # 翻译进度日志
         self.translation_progress = {}
         
+        # 跨进程共享的日志存储（见 attach_store）
+        self.store = None
+        
+    def attach_store(self, store):
+        """挂接共享状态存储：此后日志同时写入共享存储，查询最近日志时从共享存储读取"""
+        self.store = store
+        with self.lock:
+            for log_entry in self.logs:
+                store.append_log(log_entry)
+        
     def add_log(self, log_entry):
         """添加日志条目"""
         with self.lock:
             self.logs.append(log_entry)
+        if self.store is not None:
+            self.store.append_log(log_entry)
     
     def add_translation_log(self, task_id, model_name, text_id, status, message, extra_data=None):
         """添加翻译特定日志"""
@@ -70,10 +83,14 @@ class LogManager:
             'extra_data': extra_data or {}
         }
         
-        with self.lock:
-            self.logs.append(log_entry)
+        self.add_log(log_entry)
             
-        # 更新进度信息
+        # 更新进度信息（挂接共享存储时累加到共享存储，其他进程也能查询）
+        if self.store is not None:
+            self.store.add_translation_progress(
+                task_id, model_name,
+                total=int(status == 'started'), completed=int(status == 'completed'), errors=int(status == 'error'))
+            return
         if task_id not in self.translation_progress:
             self.translation_progress[task_id] = {
                 'total': 0,
@@ -112,8 +129,7 @@ class LogManager:
             'extra_data': extra_data or {}
         }
         
-        with self.lock:
-            self.logs.append(log_entry)
+        self.add_log(log_entry)
     
     def add_error_log(self, task_id, component, error_message, extra_data=None):
         """添加错误日志"""
@@ -127,8 +143,7 @@ class LogManager:
             'extra_data': extra_data or {}
         }
         
-        with self.lock:
-            self.logs.append(log_entry)
+        self.add_log(log_entry)
     
     def add_performance_log(self, model_name, operation, duration, extra_data=None):
         """添加性能日志"""
@@ -143,11 +158,13 @@ class LogManager:
             'extra_data': extra_data or {}
         }
         
-        with self.lock:
-            self.logs.append(log_entry)
+        self.add_log(log_entry)
     
     def get_recent_logs(self, limit=50, log_type=None):
         """获取最近的日志"""
+        if self.store is not None:
+            return self.store.recent_logs(limit=limit, log_type=log_type)
+        
         with self.lock:
             logs = list(self.logs)
         
@@ -162,6 +179,9 @@ class LogManager:
     
     def get_task_logs(self, task_id, limit=100):
         """获取特定任务的日志"""
+        if self.store is not None:
+            return self.store.task_logs(task_id, limit=limit)
+        
         with self.lock:
             logs = list(self.logs)
         
@@ -175,6 +195,8 @@ class LogManager:
     
     def get_translation_progress(self, task_id):
         """获取翻译进度"""
+        if self.store is not None:
+            return self.store.get_translation_progress(task_id)
         return self.translation_progress.get(task_id, {
             'total': 0,
             'completed': 0,
@@ -183,11 +205,16 @@ class LogManager:
     
     def clear_task_progress(self, task_id):
         """清理任务进度"""
+        if self.store is not None:
+            self.store.clear_translation_progress(task_id)
         if task_id in self.translation_progress:
             del self.translation_progress[task_id]
     
     def get_performance_summary(self, limit=20):
         """获取性能摘要"""
+        if self.store is not None:
+            return self.store.recent_logs(limit=limit, log_type='performance')
+        
         with self.lock:
             logs = list(self.logs)
         
@@ -201,6 +228,9 @@ class LogManager:
     
     def get_error_summary(self, limit=20):
         """获取错误摘要"""
+        if self.store is not None:
+            return self.store.recent_logs(limit=limit, level='ERROR')
+        
         with self.lock:
             logs = list(self.logs)
         
@@ -212,6 +242,13 @@ class LogManager:
         
         return error_logs[:limit]
     
+    def clear_logs(self):
+        """清空日志"""
+        with self.lock:
+            self.logs.clear()
+        if self.store is not None:
+            self.store.clear_logs()
+    
     def get_logs_json(self, limit=50, log_type=None):
         """返回JSON格式的日志"""
         logs = self.get_recent_logs(limit=limit, log_type=log_type)
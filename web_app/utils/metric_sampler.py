@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+系统指标采样
+后台按固定间隔（默认1秒）采样系统 CPU/内存/GPU 显存与各进程（本 Web 进程、本地模型服务器进程）的 CPU 与 RSS，
+写入按数组实现的环形缓冲区：时间戳为 float64 数组，指标为 float32 数组，容量固定、不随运行时间增长。
+每个序列按多个分辨率（默认 1s/10s/1m）保存，粗分辨率为细分辨率采样的平均值，查询时按分辨率选取。
+查询结果按增量编码返回：只返回客户端游标（since）之后的采样点，时间戳编码为起点 + 相邻毫秒差。
+"""
+
+import math
+import time
+import logging
+import threading
+from array import array
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 默认分辨率：(步长秒数, 保留点数) —— 1秒保留10分钟，10秒保留2小时，1分钟保留24小时
+DEFAULT_RESOLUTIONS = ((1, 600), (10, 720), (60, 1440))
+SYSTEM_COLUMNS = ('cpu', 'memory', 'gpu_memory')
+PROCESS_COLUMNS = ('cpu', 'rss_mb')
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '0.0.0.0', '::1')
+# 本地模型端点未找到监听进程时的重试间隔（秒）
+RESOLVE_RETRY_SECONDS = 30
+
+_NAN = float('nan')
+
+
+def parse_resolutions(spec):
+    """解析 "1:600,10:720,60:1440" 形式的分辨率配置"""
+    resolutions = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        step, _, points = item.partition(':')
+        resolutions.append((float(step), int(points or 600)))
+    return tuple(sorted(resolutions)) or DEFAULT_RESOLUTIONS
+
+
+class RingSeries:
+    """固定容量的环形时间序列：timestamps 为 array('d')，每列为 array('f')，缺失值为 NaN"""
+
+    def __init__(self, columns, capacity):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self.timestamps = array('d', [0.0]) * capacity
+        self.values = {column: array('f', [_NAN]) * capacity for column in self.columns}
+        self.head = 0  # 下一个写入位置
+        self.count = 0
+
+    def append(self, timestamp, values):
+        index = self.head
+        self.timestamps[index] = timestamp
+        for column in self.columns:
+            value = values.get(column)
+            self.values[column][index] = _NAN if value is None else value
+        self.head = (index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    @property
+    def first_timestamp(self):
+        return self.timestamps[(self.head - self.count) % self.capacity] if self.count else None
+
+    def since(self, since=None):
+        """按时间顺序返回 since 之后的 (时间戳列表, {列: 值列表})"""
+        newer = 0
+        while newer < self.count and (since is None or self.timestamps[(self.head - 1 - newer) % self.capacity] > since):
+            newer += 1
+        indices = [(self.head - offset) % self.capacity for offset in range(newer, 0, -1)]
+        return ([self.timestamps[i] for i in indices],
+                {column: [self.values[column][i] for i in indices] for column in self.columns})
+
+
+class MultiResolutionSeries:
+    """多分辨率序列：最细一级直接保存原始采样，其余各级按时间桶求平均后写入"""
+
+    def __init__(self, columns, resolutions=DEFAULT_RESOLUTIONS, sample_interval=1.0):
+        self.columns = tuple(columns)
+        self.tiers = []
+        for step, capacity in resolutions:
+            self.tiers.append({
+                'step': step,
+                'raw': step <= sample_interval,
+                'ring': RingSeries(self.columns, capacity),
+                'bucket': None,
+                'sums': dict.fromkeys(self.columns, 0.0),
+                'counts': dict.fromkeys(self.columns, 0)
+            })
+
+    def add(self, timestamp, values):
+        for tier in self.tiers:
+            if tier['raw']:
+                tier['ring'].append(timestamp, values)
+                continue
+            bucket = math.floor(timestamp / tier['step']) * tier['step']
+            if tier['bucket'] is not None and bucket != tier['bucket']:
+                self._flush(tier)
+            tier['bucket'] = bucket
+            for column in self.columns:
+                value = values.get(column)
+                if value is not None and not math.isnan(value):
+                    tier['sums'][column] += value
+                    tier['counts'][column] += 1
+
+    def _flush(self, tier):
+        tier['ring'].append(tier['bucket'], {
+            column: tier['sums'][column] / tier['counts'][column] if tier['counts'][column] else None
+            for column in self.columns
+        })
+        tier['sums'] = dict.fromkeys(self.columns, 0.0)
+        tier['counts'] = dict.fromkeys(self.columns, 0)
+
+    def tier(self, resolution=None):
+        """步长不小于 resolution 的最细一级（未指定时为最细一级）"""
+        if resolution is not None:
+            for tier in self.tiers:
+                if tier['step'] >= resolution:
+                    return tier
+            return self.tiers[-1]
+        return self.tiers[0]
+
+    def latest(self):
+        ring = self.tiers[0]['ring']
+        if not ring.count:
+            return None
+        index = (ring.head - 1) % ring.capacity
+        return {column: _clean(ring.values[column][index]) for column in self.columns}
+
+
+def _clean(value, digits=1):
+    return None if math.isnan(value) else round(value, digits)
+
+
+def encode_delta(series, resolution=None, since=None):
+    """增量编码：只包含 since 之后的点；t0 为首点时间戳，dt_ms 为各点相对前一点的毫秒差（首点为0）
+
+    since 早于已保留的最早点时返回全部数据并置 full=True，客户端应替换而不是追加。
+    """
+    tier = series.tier(resolution)
+    ring = tier['ring']
+    full = since is None or ring.first_timestamp is None or since < ring.first_timestamp
+    timestamps, columns = ring.since(None if full else since)
+    dt_ms, previous = [], timestamps[0] if timestamps else None
+    for timestamp in timestamps:
+        dt_ms.append(int(round((timestamp - previous) * 1000)))
+        previous = timestamp
+    return {
+        'resolution': tier['step'],
+        'full': full,
+        't0': round(timestamps[0], 3) if timestamps else None,
+        'dt_ms': dt_ms,
+        'cursor': round(timestamps[-1], 3) if timestamps else since,
+        'values': {column: [_clean(value) for value in values] for column, values in columns.items()}
+    }
+
+
+class MetricSampler:
+    """后台系统指标采样器（由 PerformanceMonitor 的监控线程按间隔调用 sample）"""
+
+    def __init__(self, sample_interval=1.0, resolutions=DEFAULT_RESOLUTIONS):
+        self.sample_interval = sample_interval
+        self.resolutions = resolutions
+        self.system = MultiResolutionSeries(SYSTEM_COLUMNS, resolutions, sample_interval)
+        self.processes = {}  # 名称 -> {'pid', 'url', 'proc', 'series', 'retry_at'}
+        self.lock = threading.Lock()
+        self._nvml = None
+
+    def configure(self, sample_interval=None, resolutions=None):
+        """调整采样间隔与分辨率（已有历史数据清空）"""
+        with self.lock:
+            if sample_interval:
+                self.sample_interval = sample_interval
+            if resolutions:
+                self.resolutions = resolutions
+            self.system = MultiResolutionSeries(SYSTEM_COLUMNS, self.resolutions, self.sample_interval)
+            for entry in self.processes.values():
+                entry['series'] = MultiResolutionSeries(PROCESS_COLUMNS, self.resolutions, self.sample_interval)
+        logger.info(f"系统指标采样: 间隔 {self.sample_interval}s, 分辨率 {self.resolutions}")
+
+    def _track(self, name, pid=None, url=None):
+        with self.lock:
+            entry = self.processes.get(name)
+            if entry is None:
+                entry = self.processes[name] = {
+                    'series': MultiResolutionSeries(PROCESS_COLUMNS, self.resolutions, self.sample_interval)
+                }
+            entry.update(pid=pid, url=url, proc=None, retry_at=0.0)
+
+    def track_process(self, name, pid):
+        """按进程号采样指定进程"""
+        self._track(name, pid=pid)
+
+    def track_endpoint(self, name, url):
+        """采样本地模型端点对应的服务器进程（按监听端口查找进程号）；非本机地址忽略"""
+        parsed = urlparse(url)
+        if parsed.hostname in LOCAL_HOSTS and parsed.port:
+            self._track(name, url=url)
+
+    def sample(self):
+        """采集一次系统与各进程指标"""
+        import psutil
+
+        now = time.time()
+        memory = psutil.virtual_memory()
+        with self.lock:
+            self.system.add(now, {
+                'cpu': psutil.cpu_percent(interval=None),
+                'memory': memory.percent,
+                'gpu_memory': self._gpu_memory_percent()
+            })
+            for name, entry in self.processes.items():
+                proc = self._resolve(entry, now)
+                if proc is None:
+                    continue
+                try:
+                    with proc.oneshot():
+                        values = {'cpu': proc.cpu_percent(interval=None),
+                                  'rss_mb': proc.memory_info().rss / (1024 ** 2)}
+                except psutil.Error:
+                    # 进程已退出（如模型空闲停止），下次采样时重新查找
+                    entry['proc'] = None
+                    continue
+                entry['series'].add(now, values)
+
+    def _resolve(self, entry, now):
+        import psutil
+
+        if entry['proc'] is not None:
+            return entry['proc']
+        if now < entry['retry_at']:
+            return None
+        entry['retry_at'] = now + RESOLVE_RETRY_SECONDS
+        pid = entry['pid'] or (entry['url'] and _listening_pid(urlparse(entry['url']).port))
+        if not pid:
+            return None
+        try:
+            proc = psutil.Process(pid)
+            proc.cpu_percent(interval=None)  # 首次调用只建立基准
+        except psutil.Error:
+            return None
+        entry['proc'] = proc
+        return proc
+
+    def _gpu_memory_percent(self):
+        """NVIDIA GPU 显存占用百分比（安装 nvidia-ml-py 时可用），其他平台返回None"""
+        if self._nvml is False:
+            return None
+        try:
+            if self._nvml is None:
+                import pynvml
+                pynvml.nvmlInit()
+                self._nvml = pynvml
+            used = total = 0
+            for index in range(self._nvml.nvmlDeviceGetCount()):
+                info = self._nvml.nvmlDeviceGetMemoryInfo(self._nvml.nvmlDeviceGetHandleByIndex(index))
+                used += info.used
+                total += info.total
+            return used / total * 100 if total else None
+        except Exception:
+            self._nvml = False
+            return None
+
+    def latest(self):
+        with self.lock:
+            return self.system.latest()
+
+    def history(self, resolution=None, since=None):
+        """系统与各进程的增量编码历史"""
+        with self.lock:
+            return {
+                **encode_delta(self.system, resolution, since),
+                'processes': {
+                    name: dict(encode_delta(entry['series'], resolution, since),
+                               pid=entry['proc'].pid if entry['proc'] is not None else None)
+                    for name, entry in self.processes.items()
+                }
+            }
+
+
+def _listening_pid(port):
+    """查找监听指定 TCP 端口的进程号；无权限读取系统连接表时逐进程查找"""
+    import psutil
+
+    try:
+        for conn in psutil.net_connections(kind='tcp'):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port and conn.pid:
+                return conn.pid
+    except (psutil.AccessDenied, PermissionError):
+        pass
+    for proc in psutil.process_iter():
+        try:
+            connections = proc.net_connections(kind='tcp') if hasattr(proc, 'net_connections') \
+                else proc.connections(kind='tcp')
+        except (psutil.Error, OSError):
+            continue
+        if any(conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port for conn in connections):
+            return proc.pid
+    return None
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模型生命周期管理
+按需（首次被任务选中时）并行启动本地模型，空闲超时后自动停止
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .performance_monitor import performance_monitor
+from .replica_pool import replica_pools
+
+logger = logging.getLogger(__name__)
+
+# 模型状态
+STATE_STOPPED = 'stopped'
+STATE_STARTING = 'starting'
+STATE_READY = 'ready'
+STATE_STOPPING = 'stopping'
+STATE_FAILED = 'failed'
+
+
+class ModelLifecycleManager:
+    """管理本地模型的懒启动、并行预热与空闲回收"""
+
+    def __init__(self, idle_timeout=900, startup_timeout=180, reap_interval=30):
+        self.idle_timeout = idle_timeout
+        self.startup_timeout = startup_timeout
+        self.reap_interval = reap_interval
+        self.models = {}  # model_key -> {'model_id', 'state', 'in_use', 'last_used', ...}
+        self.lock = threading.Lock()
+        # 模型停止完成时唤醒等待重新启动的线程
+        self.stopped = threading.Condition(self.lock)
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='model-start')
+        self.startups = {}  # model_key -> Future
+        self.manager = None
+        self.reaper_thread = None
+
+    def configure(self, idle_timeout=None, startup_timeout=None):
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        if startup_timeout is not None:
+            self.startup_timeout = startup_timeout
+
+    def register(self, model_key, model_id, managed=True):
+        """登记一个本地模型（不启动）
+
+        managed=False 表示服务进程由外部启动（如独立部署或模拟服务器），
+        启动时只等待健康检查就绪，也不会被空闲回收。
+        """
+        with self.lock:
+            if model_key not in self.models:
+                self.models[model_key] = {
+                    'model_id': model_id,
+                    'managed': managed,
+                    'state': STATE_STOPPED,
+                    'in_use': 0,
+                    'last_used': None,
+                    'started_at': None,
+                    'startup_seconds': None,
+                    'error': None
+                }
+
+    def _get_manager(self):
+        """首次需要时才导入并初始化本地模型管理器"""
+        if self.manager is None:
+            from local_model_manager import local_model_manager, initialize_local_models
+            initialize_local_models()
+            self.manager = local_model_manager
+        return self.manager
+
+    def ensure_started(self, model_keys, wait=True):
+        """并行启动尚未就绪的模型；wait=True时等待全部就绪（或失败）
+
+        已就绪的模型先做一次健康检查，服务进程已退出（如崩溃）时重新启动。
+        """
+        with self.lock:
+            ready = [key for key in model_keys if key in self.models and self.models[key]['state'] == STATE_READY]
+        for model_key in ready:
+            if not self._is_alive(model_key):
+                with self.lock:
+                    info = self.models[model_key]
+                    if info['state'] == STATE_READY:
+                        info['state'] = STATE_STOPPED
+                        logger.warning(f"本地模型 {model_key} 健康检查失败，重新启动")
+        futures = []
+        with self.lock:
+            for model_key in model_keys:
+                info = self.models.get(model_key)
+                if not info:
+                    continue
+                # 正在被空闲回收的模型等停止完成后再启动
+                self.stopped.wait_for(lambda: info['state'] != STATE_STOPPING)
+                if info['state'] == STATE_READY:
+                    continue
+                future = self.startups.get(model_key)
+                if future is None or future.done():
+                    info['state'] = STATE_STARTING
+                    info['error'] = None
+                    future = self.executor.submit(self._start_model, model_key)
+                    self.startups[model_key] = future
+                futures.append(future)
+        self._ensure_reaper()
+        if wait:
+            for future in futures:
+                future.result()
+        return {key: self.models[key]['state'] for key in model_keys if key in self.models}
+
+    def _is_alive(self, model_key):
+        """探测模型的各副本，任一副本在线且模型已加载即视为存活（没有副本地址时视为存活）"""
+        pool = replica_pools.get(model_key)
+        if not pool:
+            return True
+        alive = False
+        for replica in pool.replicas:
+            status = performance_monitor.check_endpoint_status(replica.url)
+            pool.update_health(replica.url, status)
+            alive = alive or bool(status.get('online') and status.get('model_loaded'))
+        return alive
+
+    def _start_model(self, model_key):
+        """启动单个模型并等待健康检查报告模型已加载"""
+        info = self.models[model_key]
+        start = time.time()
+        try:
+            if info['managed']:
+                self._get_manager().start_model(info['model_id'])
+            pool = replica_pools.get(model_key)
+            urls = [r.url for r in pool.replicas] if pool else []
+            deadline = start + self.startup_timeout
+            ready = not urls
+            while not ready and time.time() < deadline:
+                for url in urls:
+                    status = performance_monitor.check_endpoint_status(url)
+                    pool.update_health(url, status)
+                    if status.get('online') and status.get('model_loaded'):
+                        ready = True
+                if not ready:
+                    time.sleep(1)
+            if not ready:
+                raise TimeoutError(f"{self.startup_timeout}s 内未就绪")
+            with self.lock:
+                info['state'] = STATE_READY
+                info['started_at'] = time.time()
+                info['last_used'] = time.time()
+                info['startup_seconds'] = round(time.time() - start, 2)
+            logger.info(f"本地模型 {model_key} 已就绪，耗时 {info['startup_seconds']}s")
+        except Exception as e:
+            with self.lock:
+                info['state'] = STATE_FAILED
+                info['error'] = str(e)
+            logger.warning(f"启动本地模型 {model_key} 失败: {e}")
+
+    def acquire(self, model_keys):
+        """标记模型为占用并启动（如需要），避免任务运行期间被空闲回收
+
+        先占用再启动，启动期间不会被回收线程停止。返回实际占用（已就绪）的本地模型列表，
+        任务结束时传给 release；启动失败的模型不占用、不返回。
+        """
+        model_keys = [key for key in model_keys if key in self.models]
+        with self.lock:
+            for key in model_keys:
+                self.models[key]['in_use'] += 1
+        try:
+            self.ensure_started(model_keys)
+        except BaseException:
+            self.release(model_keys)
+            raise
+        with self.lock:
+            failed = [key for key in model_keys if self.models[key]['state'] != STATE_READY]
+        if failed:
+            self.release(failed)
+        return [key for key in model_keys if key not in failed]
+
+    def release(self, model_keys):
+        """解除占用，空闲计时从此刻开始"""
+        with self.lock:
+            for key in model_keys:
+                info = self.models[key]
+                info['in_use'] = max(0, info['in_use'] - 1)
+                info['last_used'] = time.time()
+
+    def release_after(self, model_keys, futures):
+        """futures 全部结束后再解除占用
+
+        任务终止时无法中断的模型调用（非流式客户端）仍在工作线程中执行，
+        在其返回前保持占用，避免空闲回收在调用进行中停止模型。
+        """
+        remaining = [future for future in futures if not future.done()]
+        if not remaining:
+            self.release(model_keys)
+            return
+        logger.info(f"等待 {len(remaining)} 个已放弃的模型调用返回后释放模型 {', '.join(model_keys)}")
+        left = [len(remaining)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                left[0] -= 1
+                finished = left[0] == 0
+            if finished:
+                self.release(model_keys)
+
+        for future in remaining:
+            future.add_done_callback(on_done)
+
+    def touch(self, model_key):
+        """记录模型最近一次被调用的时间"""
+        info = self.models.get(model_key)
+        if info:
+            info['last_used'] = time.time()
+
+    def _ensure_reaper(self):
+        if self.idle_timeout and self.reaper_thread is None:
+            self.reaper_thread = threading.Thread(target=self._reap_loop, daemon=True)
+            self.reaper_thread.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self.stop_idle_models()
+            except Exception as e:
+                logger.error(f"回收空闲本地模型出错: {e}")
+
+    def stop_idle_models(self):
+        """停止空闲超过 idle_timeout 且未被任务占用的模型"""
+        if not self.idle_timeout:
+            return []
+        stopped = []
+        with self.lock:
+            idle = [key for key, info in self.models.items() if self._is_idle(info, time.time())]
+        manager = self._get_manager() if idle else None
+        if not hasattr(manager, 'stop_model'):
+            return stopped
+        for key in idle:
+            info = self.models[key]
+            # 收集候选之后可能已被任务占用或调用，停止前在锁内重新检查并标记为停止中
+            with self.lock:
+                if not self._is_idle(info, time.time()):
+                    continue
+                info['state'] = STATE_STOPPING
+            state = STATE_READY
+            try:
+                manager.stop_model(info['model_id'])
+                state = STATE_STOPPED
+                stopped.append(key)
+                logger.info(f"本地模型 {key} 空闲超过 {self.idle_timeout}s，已停止")
+            except Exception as e:
+                logger.warning(f"停止本地模型 {key} 失败: {e}")
+            finally:
+                with self.lock:
+                    info['state'] = state
+                    self.stopped.notify_all()
+        return stopped
+
+    def _is_idle(self, info, now):
+        return (info['state'] == STATE_READY and info['in_use'] == 0 and info['managed']
+                and info['last_used'] and now - info['last_used'] > self.idle_timeout)
+
+    def get_status(self):
+        """返回每个本地模型的就绪状态"""
+        with self.lock:
+            return {key: dict(info) for key, info in self.models.items()}
+
+
+# 全局本地模型生命周期管理实例
+model_lifecycle = ModelLifecycleManager()
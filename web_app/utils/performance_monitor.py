@@ -3,31 +3,44 @@
 """
 性能监控工具
 监控本地模型的资源使用情况和翻译性能
+系统与进程资源由 MetricSampler 按间隔采样到多分辨率环形缓冲区，/api/performance 按客户端游标增量返回
+多进程部署时各进程定期把翻译/对冲/流式统计发布到共享状态，查询时汇总所有进程的数据
 """
 
 import time
-import psutil
 import threading
+import os
 import json
 from datetime import datetime
-from collections import deque
-import requests
 import logging
 
+from .metric_sampler import MetricSampler
+
+# psutil 与 requests 在首次采样/健康检查时才导入，避免拖慢应用导入
+
 logger = logging.getLogger(__name__)
 
+def _merge_speed(target, entry):
+    """累加另一进程的速度统计并重新计算平均速度"""
+    target['total_requests'] += entry['total_requests']
+    target['total_tokens'] += entry['total_tokens']
+    target['total_time'] += entry['total_time']
+    if target['total_time'] > 0:
+        target['avg_tokens_per_sec'] = round(target['total_tokens'] / target['total_time'], 2)
+    if not target.get('last_speed'):
+        target['last_speed'] = entry.get('last_speed', 0)
+
 class PerformanceMonitor:
-    def __init__(self, local_model_url="http://127.0.0.1:8081", max_history=100):
+    def __init__(self, local_model_url="http://127.0.0.1:8081"):
         self.local_model_url = local_model_url
-        self.max_history = max_history
         # 多本地模型端点: 名称 -> URL（用于显示多个本地模型状态）
         self.local_endpoints = {}
         
-        # 性能数据历史记录
-        self.cpu_history = deque(maxlen=max_history)
-        self.memory_history = deque(maxlen=max_history)
-        self.gpu_memory_history = deque(maxlen=max_history)
-        self.timestamps = deque(maxlen=max_history)
+        # 系统与进程资源历史（多分辨率环形缓冲区），本 Web 进程自身的资源占用同时采样
+        self.sampler = MetricSampler()
+        self.sampler.track_process('web_app', os.getpid())
+        # 共享统计的发布间隔（秒），与采样间隔无关
+        self.publish_interval = 3.0
         
         # 翻译性能记录
         self.translation_stats = {
@@ -42,10 +55,28 @@ class PerformanceMonitor:
             'api_models': {}
         }
         
+        # 对冲请求统计: model_name -> {'requests', 'hedged', 'hedge_wins'}
+        self.hedge_stats = {}
+        # 流式生成统计: model_name -> {'requests', 'ttft_total', 'aborted', 'saved_tokens', 'saved_seconds'}
+        self.stream_stats = {}
+        self.stats_lock = threading.Lock()
+        
         # 监控线程
         self.monitoring = False
         self.monitor_thread = None
         
+        # 跨进程共享统计（见 attach_store）；超过 stale_seconds 未更新的进程视为已退出
+        self.store = None
+        self.stale_seconds = 120
+        
+    def attach_store(self, store):
+        """挂接共享状态存储"""
+        self.store = store
+        
+    def configure(self, sample_interval=None, resolutions=None):
+        """配置系统指标采样间隔与分辨率（见 MetricSampler）"""
+        self.sampler.configure(sample_interval=sample_interval, resolutions=resolutions)
+        
     def start_monitoring(self):
         """开始性能监控"""
         if not self.monitoring:
@@ -62,123 +93,213 @@ class PerformanceMonitor:
         logger.info("性能监控已停止")
     
     def _monitor_loop(self):
-        """监控循环"""
+        """监控循环（后台线程中运行）：按采样间隔非阻塞采样，按发布间隔发布共享统计"""
+        next_sample = time.monotonic()
+        next_publish = next_sample
         while self.monitoring:
             try:
-                # 获取系统资源使用情况
-                cpu_percent = psutil.cpu_percent(interval=1)
-                memory = psutil.virtual_memory()
-                
-                # 获取GPU内存使用情况（如果可用）
-                gpu_memory = self._get_gpu_memory_usage()
-                
-                # 记录数据
-                current_time = datetime.now()
-                self.timestamps.append(current_time)
-                self.cpu_history.append(cpu_percent)
-                self.memory_history.append(memory.percent)
-                self.gpu_memory_history.append(gpu_memory)
-                
-                time.sleep(2)  # 每2秒更新一次
+                self.sampler.sample()
+                now = time.monotonic()
+                if now >= next_publish:
+                    self.publish()
+                    next_publish = now + self.publish_interval
+                # 按固定节拍调度，采样耗时不累积为漂移；落后超过一个间隔时从当前时刻重新计时
+                next_sample += self.sampler.sample_interval
+                if next_sample < now:
+                    next_sample = now + self.sampler.sample_interval
+                time.sleep(max(0.0, next_sample - time.monotonic()))
                 
             except Exception as e:
                 logger.error(f"性能监控出错: {e}")
                 time.sleep(5)
-    
-    def _get_gpu_memory_usage(self):
-        """获取GPU内存使用情况"""
-        try:
-            # 对于Apple Silicon，这里可以扩展获取GPU使用情况
-            # 目前返回0作为占位符
-            return 0
-        except Exception:
-            return 0
+                next_sample = time.monotonic()
     
     def record_translation(self, model_name, tokens_generated, time_taken, is_local=False):
-        """记录翻译性能"""
+        """记录翻译性能（工作线程并发调用，统计字典在 stats_lock 下修改，与 publish/_merged_stats 的序列化互斥）"""
         try:
             # 确保输入参数有效
             if tokens_generated is None or tokens_generated <= 0:
                 tokens_generated = 1  # 默认值避免除零错误
             if time_taken is None or time_taken <= 0:
                 time_taken = 0.1  # 默认值避免除零错误
-                
-            if is_local:
+            
+            with self.stats_lock:
+                group = 'local_models' if is_local else 'api_models'
                 # 分模型统计
-                if model_name not in self.translation_stats['local_models']:
-                    self.translation_stats['local_models'][model_name] = {
-                        'total_requests': 0,
-                        'total_tokens': 0,
-                        'total_time': 0,
-                        'avg_tokens_per_sec': 0,
-                        'last_speed': 0
-                    }
-                per_stats = self.translation_stats['local_models'][model_name]
-                per_stats['total_requests'] += 1
-                per_stats['total_tokens'] += tokens_generated
-                per_stats['total_time'] += time_taken
-                if per_stats['total_time'] > 0:
-                    per_stats['avg_tokens_per_sec'] = round(per_stats['total_tokens'] / per_stats['total_time'], 2)
-                per_stats['last_speed'] = round(tokens_generated / time_taken, 2)
-
-                # 聚合（向后兼容）
-                stats = self.translation_stats['local_model']
-                stats['total_requests'] += 1
-                stats['total_tokens'] += tokens_generated
-                stats['total_time'] += time_taken
-                if stats['total_time'] > 0:
-                    stats['avg_tokens_per_sec'] = round(stats['total_tokens'] / stats['total_time'], 2)
-                stats['last_speed'] = round(tokens_generated / time_taken, 2)
-                
-                logger.info(f"本地模型性能记录 {model_name}: {tokens_generated} tokens, {time_taken:.2f}s, {per_stats['last_speed']:.2f} tokens/s")
-            else:
-                # API模型统计
-                if model_name not in self.translation_stats['api_models']:
-                    self.translation_stats['api_models'][model_name] = {
+                if model_name not in self.translation_stats[group]:
+                    self.translation_stats[group][model_name] = {
                         'total_requests': 0,
                         'total_tokens': 0,
                         'total_time': 0,
                         'avg_tokens_per_sec': 0,
                         'last_speed': 0
                     }
-                
-                stats = self.translation_stats['api_models'][model_name]
-                stats['total_requests'] += 1
-                stats['total_tokens'] += tokens_generated
-                stats['total_time'] += time_taken
-                
-                if stats['total_time'] > 0:
-                    stats['avg_tokens_per_sec'] = round(stats['total_tokens'] / stats['total_time'], 2)
-                
-                stats['last_speed'] = round(tokens_generated / time_taken, 2)
-                
-                logger.info(f"API模型性能记录 {model_name}: {tokens_generated} tokens, {time_taken:.2f}s, {stats['last_speed']:.2f} tokens/s")
-                    
+                targets = [self.translation_stats[group][model_name]]
+                if is_local:
+                    # 聚合（向后兼容）
+                    targets.append(self.translation_stats['local_model'])
+                for stats in targets:
+                    stats['total_requests'] += 1
+                    stats['total_tokens'] += tokens_generated
+                    stats['total_time'] += time_taken
+                    if stats['total_time'] > 0:
+                        stats['avg_tokens_per_sec'] = round(stats['total_tokens'] / stats['total_time'], 2)
+                    stats['last_speed'] = round(tokens_generated / time_taken, 2)
+            
+            logger.info(f"{'本地' if is_local else 'API'}模型性能记录 {model_name}: {tokens_generated} tokens, "
+                        f"{time_taken:.2f}s, {tokens_generated / time_taken:.2f} tokens/s")
         except Exception as e:
             logger.error(f"记录翻译性能出错: {e}")
     
-    def get_current_stats(self):
-        """获取当前性能统计"""
+    def record_hedge(self, model_name, hedged, hedge_won):
+        """记录一次请求的对冲情况（是否发送对冲请求、对冲请求是否胜出）"""
+        with self.stats_lock:
+            if model_name not in self.hedge_stats:
+                self.hedge_stats[model_name] = {
+                    'requests': 0,
+                    'hedged': 0,
+                    'hedge_wins': 0
+                }
+            stats = self.hedge_stats[model_name]
+            stats['requests'] += 1
+            if hedged:
+                stats['hedged'] += 1
+            if hedge_won:
+                stats['hedge_wins'] += 1
+    
+    def publish(self):
+        """发布本进程的累计统计到共享状态"""
+        if self.store is None:
+            return
+        with self.stats_lock:
+            payload = json.dumps({
+                'translation_stats': self.translation_stats,
+                'hedge_stats': self.hedge_stats,
+                'stream_stats': self.stream_stats
+            })
+        self.store.put_metrics('performance', json.loads(payload))
+    
+    def _merged_stats(self):
+        """本进程与其他存活进程的统计之和（三项统计的原始累计值）"""
+        with self.stats_lock:
+            own = json.loads(json.dumps({
+                'translation_stats': self.translation_stats,
+                'hedge_stats': self.hedge_stats,
+                'stream_stats': self.stream_stats
+            }))
+        if self.store is None:
+            return own
         try:
-            # 系统资源
-            cpu_percent = psutil.cpu_percent()
+            others = self.store.get_metrics('performance', max_age=self.stale_seconds, exclude_self=True)
+        except Exception as e:
+            logger.warning(f"读取其他进程的性能统计失败: {e}")
+            return own
+        merged = own
+        for _, payload in others:
+            stats = payload['translation_stats']
+            _merge_speed(merged['translation_stats']['local_model'], stats['local_model'])
+            for group in ('local_models', 'api_models'):
+                for name, entry in stats[group].items():
+                    _merge_speed(merged['translation_stats'][group].setdefault(name, dict(entry, total_requests=0,
+                                 total_tokens=0, total_time=0)), entry)
+            for name, entry in payload['hedge_stats'].items():
+                target = merged['hedge_stats'].setdefault(name, {'requests': 0, 'hedged': 0, 'hedge_wins': 0})
+                for key in target:
+                    target[key] += entry.get(key, 0)
+            for name, entry in payload['stream_stats'].items():
+                target = merged['stream_stats'].setdefault(name, {
+                    'requests': 0, 'ttft_total': 0.0, 'ttft_count': 0,
+                    'aborted': {}, 'saved_tokens': 0, 'saved_seconds': 0.0
+                })
+                for key in ('requests', 'ttft_total', 'ttft_count', 'saved_tokens', 'saved_seconds'):
+                    target[key] += entry.get(key, 0)
+                for reason, count in entry.get('aborted', {}).items():
+                    target['aborted'][reason] = target['aborted'].get(reason, 0) + count
+        return merged
+    
+    def get_hedge_stats(self, hedge_stats=None):
+        """获取对冲统计：对冲率 = 对冲次数/请求数，胜出率 = 对冲胜出次数/对冲次数"""
+        if hedge_stats is None:
+            hedge_stats = self._merged_stats()['hedge_stats']
+        with self.stats_lock:
+            result = {}
+            for name, stats in hedge_stats.items():
+                result[name] = dict(stats)
+                result[name]['hedge_rate'] = round(stats['hedged'] / stats['requests'], 4) if stats['requests'] else 0
+                result[name]['win_rate'] = round(stats['hedge_wins'] / stats['hedged'], 4) if stats['hedged'] else 0
+            return result
+    
+    def record_stream(self, model_name, stream):
+        """记录一次流式请求的首字延迟及提前终止情况"""
+        with self.stats_lock:
+            if model_name not in self.stream_stats:
+                self.stream_stats[model_name] = {
+                    'requests': 0,
+                    'ttft_total': 0.0,
+                    'ttft_count': 0,
+                    'aborted': {},
+                    'saved_tokens': 0,
+                    'saved_seconds': 0.0
+                }
+            stats = self.stream_stats[model_name]
+            stats['requests'] += 1
+            if stream.ttft is not None:
+                stats['ttft_total'] += stream.ttft
+                stats['ttft_count'] += 1
+            if stream.abort_reason:
+                stats['aborted'][stream.abort_reason] = stats['aborted'].get(stream.abort_reason, 0) + 1
+                stats['saved_tokens'] += stream.saved_tokens
+                stats['saved_seconds'] += stream.saved_seconds
+    
+    def get_stream_stats(self, stream_stats=None):
+        """获取流式统计：平均首字延迟、各原因提前终止次数及估算节省的token与时间"""
+        if stream_stats is None:
+            stream_stats = self._merged_stats()['stream_stats']
+        with self.stats_lock:
+            result = {}
+            for name, stats in stream_stats.items():
+                result[name] = {
+                    'requests': stats['requests'],
+                    'avg_ttft_ms': round(stats['ttft_total'] / stats['ttft_count'] * 1000, 1) if stats['ttft_count'] else None,
+                    'aborted': dict(stats['aborted']),
+                    'saved_tokens': stats['saved_tokens'],
+                    'saved_seconds': round(stats['saved_seconds'], 2)
+                }
+            return result
+    
+    def get_current_stats(self, since=None, resolution=None, endpoint_status=None, include_history=True):
+        """获取当前性能统计；history 只包含 since（上次响应的 cursor）之后的采样点
+
+        endpoint_status 为已知的端点状态（ASGI 模式下由事件循环上的健康检查提供）时不再逐个同步探测。
+        include_history=False 时不返回 history（ASGI 推送按各连接自己的游标单独读取）。
+        """
+        try:
+            import psutil
+            
+            # 系统资源：CPU 取最近一次采样（在请求中调用 cpu_percent 会重置采样线程的计算基准）
+            latest = self.sampler.latest() or {}
+            cpu_percent = latest.get('cpu') or 0.0
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
             # 检查本地模型服务器状态（支持多端点）
             local_models_status = {}
-            if self.local_endpoints:
+            if endpoint_status is not None:
+                local_models_status = endpoint_status
+            elif self.local_endpoints:
                 for name, url in self.local_endpoints.items():
-                    local_models_status[name] = self._check_endpoint_status(url)
+                    local_models_status[name] = self.check_endpoint_status(url)
             else:
                 # 向后兼容：仅单一默认端点
-                local_models_status['default'] = self._check_endpoint_status(self.local_model_url)
+                local_models_status['default'] = self.check_endpoint_status(self.local_model_url)
             
+            merged = self._merged_stats()
             return {
                 'timestamp': datetime.now().isoformat(),
                 'system': {
                     'cpu_percent': cpu_percent,
                     'memory_percent': memory.percent,
+                    'gpu_memory_percent': latest.get('gpu_memory'),
                     'memory_used_gb': memory.used / (1024**3),
                     'memory_total_gb': memory.total / (1024**3),
                     'disk_percent': disk.percent,
@@ -189,21 +310,19 @@ class PerformanceMonitor:
                     'endpoints': self.local_endpoints,
                     'status': local_models_status
                 },
-                'translation_stats': self.translation_stats,
-                'history': {
-                    'timestamps': [t.isoformat() for t in list(self.timestamps)],
-                    'cpu': list(self.cpu_history),
-                    'memory': list(self.memory_history),
-                    'gpu_memory': list(self.gpu_memory_history)
-                }
+                'translation_stats': merged['translation_stats'],
+                'hedging': self.get_hedge_stats(merged['hedge_stats']),
+                'streaming': self.get_stream_stats(merged['stream_stats']),
+                'history': self.sampler.history(resolution=resolution, since=since) if include_history else None
             }
         except Exception as e:
             logger.error(f"获取性能统计出错: {e}")
             return {'error': str(e)}
     
-    def _check_endpoint_status(self, base_url: str):
-        """检查指定端点健康状态"""
+    def check_endpoint_status(self, base_url: str):
+        """同步检查指定端点 <base_url>/health，返回 {'online', 'model_loaded'}（副本池、模型生命周期与 ASGI 回退探测共用）"""
         try:
+            import requests
             response = requests.get(f"{base_url}/health", timeout=2)
             if response.status_code == 200:
                 data = response.json()
@@ -219,6 +338,7 @@ class PerformanceMonitor:
     def _check_local_model_status(self):
         """检查本地模型服务器状态"""
         try:
+            import requests
             response = requests.get(f"{self.local_model_url}/health", timeout=2)
             if response.status_code == 200:
                 data = response.json()
@@ -234,9 +354,10 @@ class PerformanceMonitor:
     def get_speed_comparison(self):
         """获取速度对比数据"""
         try:
-            local_stats = self.translation_stats['local_model']
-            api_stats = self.translation_stats['api_models']
-            per_local = self.translation_stats.get('local_models', {})
+            translation_stats = self._merged_stats()['translation_stats']
+            local_stats = translation_stats['local_model']
+            api_stats = translation_stats['api_models']
+            per_local = translation_stats.get('local_models', {})
             
             comparison = {
                 'local_model': {  # 聚合数据显示（向后兼容）
@@ -277,6 +398,7 @@ class PerformanceMonitor:
         """注册一个本地模型端点供监控展示"""
         try:
             self.local_endpoints[name] = url
+            self.sampler.track_endpoint(name, url)
             logger.info(f"注册本地模型端点: {name} -> {url}")
         except Exception as e:
             logger.error(f"注册本地模型端点失败: {e}")
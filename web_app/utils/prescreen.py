@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地预筛选指标
+在调用远程评估模型前，用 chrF/BLEU/TER、占位符（数值/参考号）保留率、术语命中率与语言检查快速判断译文质量，
+明显失败的译文（空输出、未翻译、目标语言错误等）按规则直接给分，不再调用评估模型。
+预筛选关闭时不计算任何指标；开启时只计算规则需要的指标，BLEU/TER 只为被规则拦截的译文补算并随结果保存。
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+
+from .dedup import normalize_text
+from .translation_memory import extract_placeholders
+from .terminology import terminology_checker
+
+logger = logging.getLogger(__name__)
+
+# 中文按字切分，其余按单词/数字/标点切分
+_TOKEN = re.compile(r'[一-鿿]|[A-Za-z]+|\d+(?:\.\d+)?|[^\sA-Za-z\d一-鿿]')
+_CJK = re.compile(r'[一-鿿]')
+
+# 评分维度权重（与 evaluation_criteria 一致）
+WEIGHTS = {'accuracy': 0.4, 'fluency': 0.3, 'terminology': 0.3}
+
+
+def tokenize(text):
+    return _TOKEN.findall(text or '')
+
+
+def _ngrams(sequence, n):
+    return Counter(tuple(sequence[i:i + n]) for i in range(len(sequence) - n + 1))
+
+
+def chrf(candidate, reference, max_n=6, beta=2.0):
+    """字符级chrF（0-100），忽略空白"""
+    cand = ''.join((candidate or '').split())
+    ref = ''.join((reference or '').split())
+    if not cand or not ref:
+        return 0.0
+    precisions, recalls = [], []
+    for n in range(1, max_n + 1):
+        cand_ngrams, ref_ngrams = _ngrams(cand, n), _ngrams(ref, n)
+        if not cand_ngrams or not ref_ngrams:
+            continue
+        matches = sum((cand_ngrams & ref_ngrams).values())
+        precisions.append(matches / sum(cand_ngrams.values()))
+        recalls.append(matches / sum(ref_ngrams.values()))
+    if not precisions:
+        return 0.0
+    precision = sum(precisions) / len(precisions)
+    recall = sum(recalls) / len(recalls)
+    if precision + recall == 0:
+        return 0.0
+    beta2 = beta * beta
+    return round(100 * (1 + beta2) * precision * recall / (beta2 * precision + recall), 2)
+
+
+def bleu(candidate_tokens, reference_tokens, max_n=4):
+    """句级BLEU（0-100，加一平滑）"""
+    if not candidate_tokens or not reference_tokens:
+        return 0.0
+    log_precision = 0.0
+    for n in range(1, max_n + 1):
+        cand_ngrams = _ngrams(candidate_tokens, n)
+        matches = sum((cand_ngrams & _ngrams(reference_tokens, n)).values())
+        total = sum(cand_ngrams.values())
+        log_precision += math.log((matches + 1) / (total + 1))
+    brevity = min(0.0, 1 - len(reference_tokens) / len(candidate_tokens))
+    return round(100 * math.exp(brevity + log_precision / max_n), 2)
+
+
+def edit_distance(a, b):
+    """词元级编辑距离（NumPy逐行向量化）"""
+    import numpy as np
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+    vocab = {}
+    a_ids = np.array([vocab.setdefault(t, len(vocab)) for t in a])
+    b_ids = np.array([vocab.setdefault(t, len(vocab)) for t in b])
+    offsets = np.arange(len(b) + 1)
+    previous = offsets.copy()
+    for i in range(1, len(a) + 1):
+        substitution = previous[:-1] + (b_ids != a_ids[i - 1])
+        current = np.empty_like(previous)
+        current[0] = i
+        current[1:] = np.minimum(previous[1:] + 1, substitution)
+        # 插入操作：current[j] = min(current[j], current[j-1] + 1)，用累计最小值一次完成
+        current = np.minimum.accumulate(current - offsets) + offsets
+        previous = current
+    return int(previous[-1])
+
+
+def ter(candidate_tokens, reference_tokens):
+    """翻译编辑率（不含移位操作，0-100，越低越好）"""
+    if not reference_tokens:
+        return 100.0 if candidate_tokens else 0.0
+    return round(100 * edit_distance(candidate_tokens, reference_tokens) / len(reference_tokens), 2)
+
+
+def placeholder_hits(source_text, candidate):
+    """原文中的数值/ATA参考号/件号在译文中的保留情况"""
+    _, tokens = extract_placeholders(source_text)
+    if not tokens:
+        return {'expected': 0, 'hits': 0, 'missing': [], 'hit_rate': 1.0}
+    missing = [token for token in tokens if token not in candidate]
+    hits = len(tokens) - len(missing)
+    return {'expected': len(tokens), 'hits': hits, 'missing': missing, 'hit_rate': round(hits / len(tokens), 4)}
+
+
+def language_checks(source_text, candidate, target_lang='zh', reference=None):
+    """返回语言检查失败原因（empty/untranslated/wrong_language），通过时返回None
+
+    参考译文与原文相同（如件号、代码等本不需要翻译的内容）时不做未翻译检查；
+    参考译文本身不含中文时也不做目标语言检查。
+    """
+    if not candidate or not candidate.strip():
+        return 'empty'
+    source = normalize_text(source_text).lower()
+    if normalize_text(candidate).lower() == source and (reference is None or normalize_text(reference).lower() != source):
+        return 'untranslated'
+    if target_lang == 'zh' and _CJK.search(source_text or '') is None and _CJK.search(candidate) is None \
+            and (reference is None or _CJK.search(reference) is not None):
+        return 'wrong_language'
+    return None
+
+
+def compute_metrics(pair, candidate, terminology=True):
+    """计算预筛选规则使用的本地指标；terminology=False 时不做术语检查"""
+    reference = getattr(pair, 'target_text', '') or ''
+    metrics = {
+        'chrf': chrf(candidate, reference),
+        'placeholders': placeholder_hits(pair.source_text, candidate or ''),
+        'language_check': language_checks(pair.source_text, candidate, getattr(pair, 'target_lang', 'zh'), reference),
+        'length_ratio': round(len(candidate or '') / max(1, len(reference)), 3)
+    }
+    if terminology and len(terminology_checker):
+        metrics['terminology'] = terminology_checker.check(pair.source_text, candidate)
+    return metrics
+
+
+def add_overlap_metrics(metrics, pair, candidate):
+    """补算 BLEU/TER（TER 为逐词编辑距离，只对需要保存指标的译文计算）"""
+    cand_tokens, ref_tokens = tokenize(candidate), tokenize(getattr(pair, 'target_text', '') or '')
+    metrics['bleu'] = bleu(cand_tokens, ref_tokens)
+    metrics['ter'] = ter(cand_tokens, ref_tokens)
+    return metrics
+
+
+class PrescreenEvaluation:
+    """预筛选直接给出的评估结果，字段与评估引擎返回的结果保持一致"""
+
+    def __init__(self, pair, translation_result, scores, reason, metrics):
+        self.pair_id = pair.id
+        self.model_name = getattr(translation_result, 'model_name', None)
+        self.accuracy_score = scores['accuracy']
+        self.fluency_score = scores['fluency']
+        self.terminology_score = scores['terminology']
+        self.overall_score = round(sum(scores[k] * w for k, w in WEIGHTS.items()), 2)
+        self.comments = f"本地预筛选未通过（{reason}），未调用评估模型"
+        self.error_message = None
+        self.prescreen_reason = reason
+        self.local_metrics = metrics
+
+
+class PrescreenPolicy:
+    """预筛选规则：决定译文是否需要调用评估模型"""
+
+    # 规则 -> 直接给出的分数（与评估提示词中的质量控制规则一致）
+    RULE_SCORES = {
+        'empty': {'accuracy': 1.0, 'fluency': 1.0, 'terminology': 1.0},
+        'untranslated': {'accuracy': 1.5, 'fluency': 1.5, 'terminology': 1.5},
+        'wrong_language': {'accuracy': 1.0, 'fluency': 1.5, 'terminology': 1.5},
+        'low_chrf': {'accuracy': 1.5, 'fluency': 1.5, 'terminology': 1.5},
+        'missing_placeholders': {'accuracy': 1.5, 'fluency': 2.0, 'terminology': 2.0},
+        'missing_terminology': {'accuracy': 2.0, 'fluency': 2.5, 'terminology': 1.5},
+    }
+
+    def __init__(self, enabled=False, min_chrf=0.0, min_placeholder_hit_rate=0.0, min_terminology_hit_rate=0.0):
+        self.enabled = enabled
+        self.min_chrf = min_chrf
+        self.min_placeholder_hit_rate = min_placeholder_hit_rate
+        self.min_terminology_hit_rate = min_terminology_hit_rate
+
+    def configure(self, enabled=None, min_chrf=None, min_placeholder_hit_rate=None, min_terminology_hit_rate=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if min_chrf is not None:
+            self.min_chrf = min_chrf
+        if min_placeholder_hit_rate is not None:
+            self.min_placeholder_hit_rate = min_placeholder_hit_rate
+        if min_terminology_hit_rate is not None:
+            self.min_terminology_hit_rate = min_terminology_hit_rate
+        logger.info(f"本地预筛选: enabled={self.enabled}, min_chrf={self.min_chrf}, "
+                    f"min_placeholder_hit_rate={self.min_placeholder_hit_rate}, "
+                    f"min_terminology_hit_rate={self.min_terminology_hit_rate}")
+
+    def settings(self):
+        """影响评分的规则设置（关闭时为None）"""
+        if not self.enabled:
+            return None
+        return {'min_chrf': self.min_chrf, 'min_placeholder_hit_rate': self.min_placeholder_hit_rate,
+                'min_terminology_hit_rate': self.min_terminology_hit_rate}
+
+    def decide(self, metrics):
+        """返回不调用评估模型的原因；需要评估模型时返回None"""
+        if metrics['language_check']:
+            return metrics['language_check']
+        if self.min_chrf and metrics['chrf'] < self.min_chrf:
+            return 'low_chrf'
+        placeholders = metrics['placeholders']
+        if self.min_placeholder_hit_rate and placeholders['expected'] \
+                and placeholders['hit_rate'] < self.min_placeholder_hit_rate:
+            return 'missing_placeholders'
+        terminology = metrics.get('terminology')
+        if self.min_terminology_hit_rate and terminology and terminology['expected'] \
+                and terminology['hit_rate'] < self.min_terminology_hit_rate:
+            return 'missing_terminology'
+        return None
+
+    def screen(self, pair, translation_result):
+        """返回预筛选评估结果；为None时需要调用评估模型
+
+        关闭时直接返回，不计算指标（任务的术语统计由 check_batch 单独完成）。
+        被规则拦截的结果在 local_metrics 中带有全部指标，其余译文不保存本地指标。
+        """
+        if not self.enabled:
+            return None
+        candidate = getattr(translation_result, 'translated_text', '') or ''
+        metrics = compute_metrics(pair, candidate, terminology=bool(self.min_terminology_hit_rate))
+        reason = self.decide(metrics)
+        if reason is None:
+            return None
+        add_overlap_metrics(metrics, pair, candidate)
+        return PrescreenEvaluation(pair, translation_result, self.RULE_SCORES[reason], reason, metrics)
+
+
+# 全局预筛选策略实例
+prescreen_policy = PrescreenPolicy()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务进度与剩余时间预测
+以“翻译对×模型”为单位记录完成情况，按模型维护每单位耗时的指数加权移动平均（EWMA），
+根据各模型剩余工作量与并发工作线程数估算剩余时间，并统计任务整体吞吐（units/sec）。
+运行中任务的进度快照定期发布到共享状态，多进程部署时其他进程也能查询。
+"""
+
+import time
+import threading
+
+from .shared_state import shared_state
+
+
+class ModelProgress:
+    """单个模型的进度与耗时EWMA"""
+
+    __slots__ = ('total', 'done', 'seconds_per_unit', 'samples', 'skipped')
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.seconds_per_unit = None
+        self.samples = 0
+        self.skipped = {}  # 跳过原因 -> 单元数
+
+
+class TaskProgress:
+    """单个任务的实时进度"""
+
+    def __init__(self, total_pairs, model_keys, workers=1, planned_seconds=None, alpha=0.2,
+                 publisher=None, publish_interval=1.0, model_units=None):
+        self.total_pairs = total_pairs
+        self.workers = max(1, workers)
+        self.planned_seconds = planned_seconds
+        self.alpha = alpha
+        self.started_at = time.time()
+        # model_units: 各模型需要执行的单元数（增量重评估时小于翻译对总数），默认每个模型 total_pairs 个
+        model_units = model_units or {}
+        self.models = {model_key: ModelProgress(model_units.get(model_key, total_pairs)) for model_key in model_keys}
+        self.lock = threading.Lock()
+        # publisher(snapshot)：把快照发布给其他进程，至多每 publish_interval 秒一次
+        self.publisher = publisher
+        self.publish_interval = publish_interval
+        self.published_at = 0.0
+
+    def record(self, model_key, units, seconds):
+        """记录某模型完成 units 个翻译对（共用一次调用时 units>1），耗时 seconds"""
+        with self.lock:
+            model = self.models[model_key]
+            model.done += units
+            per_unit = seconds / units if units else seconds
+            if model.seconds_per_unit is None:
+                model.seconds_per_unit = per_unit
+            else:
+                model.seconds_per_unit = self.alpha * per_unit + (1 - self.alpha) * model.seconds_per_unit
+            model.samples += 1
+        self.publish()
+
+    def skip(self, model_key, units, reason=None):
+        """未产生结果的单元（出错或被跳过）也计入已处理，避免进度停滞；reason 为跳过原因（如熔断）"""
+        with self.lock:
+            model = self.models[model_key]
+            model.done += units
+            if reason:
+                model.skipped[reason] = model.skipped.get(reason, 0) + units
+        self.publish()
+
+    def publish(self, force=False):
+        if self.publisher is None:
+            return
+        now = time.time()
+        if not force and now - self.published_at < self.publish_interval:
+            return
+        self.published_at = now
+        self.publisher(self.snapshot())
+
+    @property
+    def fraction(self):
+        with self.lock:
+            total = sum(m.total for m in self.models.values())
+            done = sum(min(m.done, m.total) for m in self.models.values())
+        return done / total if total else 1.0
+
+    def snapshot(self):
+        """返回进度、吞吐与ETA（ETA = Σ模型剩余单元×单位耗时EWMA / 工作线程数）"""
+        with self.lock:
+            elapsed = time.time() - self.started_at
+            total = sum(m.total for m in self.models.values())
+            done = sum(min(m.done, m.total) for m in self.models.values())
+            models = {}
+            remaining_seconds = 0.0
+            known = True
+            for model_key, model in self.models.items():
+                remaining = max(0, model.total - model.done)
+                model_eta = None
+                if model.seconds_per_unit is not None:
+                    model_eta = remaining * model.seconds_per_unit / self.workers
+                    remaining_seconds += model_eta
+                elif remaining:
+                    known = False
+                models[model_key] = {
+                    'done': min(model.done, model.total),
+                    'total': model.total,
+                    'units_per_sec': round(self.workers / model.seconds_per_unit, 3)
+                    if model.seconds_per_unit else None,
+                    'eta_seconds': round(model_eta, 1) if model_eta is not None else None,
+                    'skipped': dict(model.skipped)
+                }
+            if known:
+                eta, source = remaining_seconds, 'ewma'
+            elif self.planned_seconds is not None:
+                # 还没有完成任何单元的模型时，按调度计划的预计耗时扣除已用时间
+                eta, source = max(0.0, self.planned_seconds - elapsed), 'plan'
+            else:
+                eta, source = None, None
+        return {
+            'units_done': done,
+            'units_total': total,
+            'progress_percent': round(done / total * 100, 2) if total else 100.0,
+            'elapsed_seconds': round(elapsed, 1),
+            'throughput_units_per_sec': round(done / elapsed, 3) if elapsed > 0 else None,
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'eta_source': source,
+            'workers': self.workers,
+            'models': models
+        }
+
+
+class ProgressRegistry:
+    """运行中任务的进度登记表（本进程运行的任务保存在内存，其他进程的任务从共享状态读取快照）"""
+
+    def __init__(self, store=None):
+        self.store = store or shared_state
+        self.tasks = {}
+        self.lock = threading.Lock()
+
+    def start(self, task_id, total_pairs, model_keys, workers=1, planned_seconds=None, model_units=None):
+        publisher = (lambda snapshot: self.store.put_progress(task_id, snapshot)) if self.store.enabled else None
+        progress = TaskProgress(total_pairs, model_keys, workers, planned_seconds, publisher=publisher,
+                                model_units=model_units)
+        with self.lock:
+            self.tasks[task_id] = progress
+        progress.publish(force=True)
+        return progress
+
+    def get(self, task_id):
+        with self.lock:
+            return self.tasks.get(task_id)
+
+    def snapshot(self, task_id):
+        """返回任务的实时进度快照，任务不在运行时返回None"""
+        progress = self.get(task_id)
+        if progress is not None:
+            return progress.snapshot()
+        if self.store.enabled:
+            return self.store.get_progress(task_id)
+        return None
+
+    def finish(self, task_id):
+        with self.lock:
+            self.tasks.pop(task_id, None)
+        if self.store.enabled:
+            self.store.delete_progress(task_id)
+
+
+# 全局任务进度登记表
+task_progress = ProgressRegistry()
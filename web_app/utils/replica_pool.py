@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模型副本池
+一个模型可对应多个副本端点，按最少未完成请求路由，并根据健康检查自动摘除异常副本
+"""
+
+import time
+import threading
+import logging
+
+from .performance_monitor import performance_monitor
+from .circuit_breaker import circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """单个副本端点的运行状态"""
+
+    def __init__(self, model_key, url):
+        self.model_key = model_key
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+
+    @property
+    def engine_key(self):
+        """在翻译引擎中注册该副本使用的模型标识"""
+        return f"{self.model_key}@{self.url}"
+
+    def available(self, now=None):
+        """副本是否可接收请求"""
+        return self.healthy and (now or time.time()) >= self.ejected_until
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'outstanding': self.outstanding,
+            'healthy': self.healthy,
+            'ejected': time.time() < self.ejected_until,
+            'consecutive_failures': self.consecutive_failures,
+            'total_requests': self.total_requests,
+            'total_failures': self.total_failures
+        }
+
+
+class ReplicaPool:
+    """单个模型的副本池"""
+
+    def __init__(self, model_key, urls, max_failures=3, ejection_seconds=30):
+        self.model_key = model_key
+        self.replicas = [Replica(model_key, url) for url in urls]
+        self.max_failures = max_failures
+        self.ejection_seconds = ejection_seconds
+        self.lock = threading.Lock()
+
+    def acquire(self, exclude=None):
+        """选择未完成请求最少的可用副本；全部不可用时退回到失败最少的副本"""
+        with self.lock:
+            now = time.time()
+            candidates = [r for r in self.replicas if r.available(now) and r.url != exclude]
+            if not candidates:
+                candidates = [r for r in self.replicas if r.url != exclude] or self.replicas
+                replica = min(candidates, key=lambda r: (r.consecutive_failures, r.outstanding))
+            else:
+                replica = min(candidates, key=lambda r: r.outstanding)
+            replica.outstanding += 1
+            replica.total_requests += 1
+            return replica
+
+    def release(self, replica, success=True):
+        """请求结束后归还副本，连续失败达到阈值时临时摘除；success=None（如请求被取消）不计入成败"""
+        with self.lock:
+            replica.outstanding = max(0, replica.outstanding - 1)
+            if success is None:
+                return
+            if success:
+                replica.consecutive_failures = 0
+                return
+            replica.total_failures += 1
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self.max_failures:
+                replica.ejected_until = time.time() + self.ejection_seconds
+                logger.warning(f"副本 {replica.url} 连续失败 {replica.consecutive_failures} 次，摘除 {self.ejection_seconds}s")
+
+    def update_health(self, url, status):
+        """根据健康检查结果更新副本状态"""
+        with self.lock:
+            for replica in self.replicas:
+                if replica.url != url:
+                    continue
+                healthy = bool(status.get('online')) and bool(status.get('model_loaded', True))
+                if healthy and not replica.healthy:
+                    replica.consecutive_failures = 0
+                    replica.ejected_until = 0.0
+                    logger.info(f"副本 {url} 恢复健康，重新加入 {self.model_key} 副本池")
+                elif not healthy and replica.healthy:
+                    logger.warning(f"副本 {url} 健康检查失败，从 {self.model_key} 副本池摘除")
+                replica.healthy = healthy
+            any_healthy = any(replica.healthy for replica in self.replicas)
+        # 全部副本不可用时打开该模型的熔断，任一副本恢复后关闭
+        circuit_breakers.update_health(self.model_key, any_healthy)
+
+    def to_dict(self):
+        with self.lock:
+            return [r.to_dict() for r in self.replicas]
+
+
+class ReplicaPoolManager:
+    """管理全部本地模型副本池，并周期性执行健康检查"""
+
+    def __init__(self, health_interval=10):
+        self.pools = {}  # model_key -> ReplicaPool
+        self.health_interval = health_interval
+        self.health_thread = None
+        self.running = False
+        # ASGI 模式下健康检查在事件循环上执行（见 asgi.py），不启动健康检查线程
+        self.threaded_health_checks = True
+
+    def configure_pool(self, model_key, urls, **kwargs):
+        """创建或替换模型的副本池"""
+        urls = [u for u in urls if u]
+        if not urls:
+            return None
+        self.pools[model_key] = ReplicaPool(model_key, urls, **kwargs)
+        logger.info(f"配置副本池 {model_key}: {urls}")
+        return self.pools[model_key]
+
+    def get(self, model_key):
+        return self.pools.get(model_key)
+
+    def start_health_checks(self):
+        """启动后台健康检查线程"""
+        if self.running or not self.threaded_health_checks:
+            return
+        self.running = True
+        self.health_thread = threading.Thread(target=self._health_loop, daemon=True)
+        self.health_thread.start()
+
+    def check_health(self):
+        """对所有副本执行一次健康检查"""
+        for pool in list(self.pools.values()):
+            for replica in pool.replicas:
+                status = performance_monitor.check_endpoint_status(replica.url)
+                pool.update_health(replica.url, status)
+
+    def _health_loop(self):
+        while self.running:
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error(f"副本健康检查出错: {e}")
+            time.sleep(self.health_interval)
+
+    def get_status(self):
+        return {key: pool.to_dict() for key, pool in self.pools.items()}
+
+
+# 全局副本池管理实例
+replica_pools = ReplicaPoolManager()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按长度感知的任务调度
+根据原文长度与 performance_monitor 中各模型的历史速度估算每组翻译对的耗时，
+按最长处理时间优先（LPT）顺序分派给工作线程以缩短总耗时；相近长度的翻译对按长度分桶连续分派，
+便于本地模型服务端合并批处理。
+"""
+
+import heapq
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 英文原文平均每token约4个字符，中文译文token数约为原文的1.5倍
+CHARS_PER_TOKEN = 4.0
+OUTPUT_TOKEN_RATIO = 1.5
+# 没有历史速度时使用的默认值
+DEFAULT_TOKENS_PER_SEC = 30.0
+DEFAULT_REQUEST_OVERHEAD = 0.5
+# 评估模型需要读入原文、参考译文与译文，按原文长度的倍数估算输入规模
+EVALUATION_INPUT_RATIO = 3.0
+EVALUATION_OUTPUT_TOKENS = 60
+
+
+def length_bucket(text):
+    """按原文长度的对数分桶（0: ≤16字符，1: ≤32，2: ≤64 ...）"""
+    return max(0, int(math.ceil(math.log2(max(1, len(text or ''))))) - 4)
+
+
+class ScheduledItem:
+    """一个调度单元（一组原文相同的翻译对）及其耗时估计"""
+
+    __slots__ = ('group', 'cost', 'bucket', 'index')
+
+    def __init__(self, group, cost, bucket, index):
+        self.group = group
+        self.cost = cost
+        self.bucket = bucket
+        self.index = index
+
+
+class SchedulePlan:
+    """调度计划：分派顺序与预计总耗时"""
+
+    def __init__(self, items, workers):
+        self.items = items
+        self.workers = workers
+        self.total_cost = sum(item.cost for item in items)
+        self.estimated_makespan = simulate_makespan([item.cost for item in items], workers)
+
+    def summary(self):
+        buckets = {}
+        for item in self.items:
+            buckets[item.bucket] = buckets.get(item.bucket, 0) + 1
+        return {
+            'workers': self.workers,
+            'units': len(self.items),
+            'estimated_total_seconds': round(self.total_cost, 2),
+            'estimated_makespan_seconds': round(self.estimated_makespan, 2),
+            'length_buckets': {f"≤{2 ** (bucket + 4)}": count for bucket, count in sorted(buckets.items())}
+        }
+
+
+def simulate_makespan(costs, workers):
+    """按给定顺序模拟贪心分派（空闲工作线程取下一项），返回总耗时"""
+    if not costs:
+        return 0.0
+    finish_times = [0.0] * max(1, workers)
+    for cost in costs:
+        heapq.heapreplace(finish_times, finish_times[0] + cost)
+    return max(finish_times)
+
+
+class LengthAwareScheduler:
+    """长度感知调度器"""
+
+    def __init__(self, speed_lookup=None, workers=1):
+        # speed_lookup(model_key) -> tokens/sec（无历史时返回None）
+        self.speed_lookup = speed_lookup or (lambda model_key: None)
+        self.workers = max(1, workers)
+
+    def model_speed(self, model_key):
+        speed = self.speed_lookup(model_key)
+        return speed if speed and speed > 0 else DEFAULT_TOKENS_PER_SEC
+
+    def estimate_translation(self, text, model_key):
+        output_tokens = len(text or '') / CHARS_PER_TOKEN * OUTPUT_TOKEN_RATIO
+        return DEFAULT_REQUEST_OVERHEAD + output_tokens / self.model_speed(model_key)
+
+    def estimate_evaluation(self, text):
+        input_tokens = len(text or '') / CHARS_PER_TOKEN * EVALUATION_INPUT_RATIO
+        # 输入（prefill）远快于生成，按生成速度的1/10计入
+        return DEFAULT_REQUEST_OVERHEAD + (input_tokens / 10 + EVALUATION_OUTPUT_TOKENS) / DEFAULT_TOKENS_PER_SEC
+
+    def estimate_group(self, group, model_keys):
+        """估算一组翻译对在全部模型上的翻译与评估耗时（秒）"""
+        text = group.representative.source_text
+        translation = sum(self.estimate_translation(text, model_key) for model_key in model_keys)
+        evaluation = self.estimate_evaluation(text) * len(group.subgroups) * len(model_keys)
+        return translation + evaluation
+
+    def plan(self, groups, model_keys):
+        """生成LPT调度计划：估计耗时从大到小，耗时相同时同一长度桶内保持原始顺序"""
+        items = [ScheduledItem(group, self.estimate_group(group, group.models or model_keys),
+                               length_bucket(group.representative.source_text), index)
+                 for index, group in enumerate(groups)]
+        items.sort(key=lambda item: (-item.cost, -item.bucket, item.index))
+        plan = SchedulePlan(items, self.workers)
+        logger.info(f"调度计划: {len(items)} 个单元, {self.workers} 个工作线程, "
+                    f"预计耗时 {plan.estimated_makespan:.1f}s")
+        return plan
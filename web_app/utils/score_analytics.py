@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评分分析（列式存储）
+评分与元数据镜像到只含数值列的分析表（模型/类别/难度整数编码，不含任何文本），
+查询时按列加载为 NumPy 数组并缓存在内存中，此后只增量读取新增行。
+直方图、分位数、模型间逐条差值与时间趋势均为向量化计算，百万行级别在毫秒量级完成。
+numpy 在首次查询时才导入，避免拖慢应用冷启动。
+"""
+
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('accuracy', 'fluency', 'terminology', 'overall')
+DIMENSIONS = ('model', 'category', 'difficulty')
+BUCKET_SECONDS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+# 加载顺序与 ScoreAnalytics.columns 的键一致
+ROW_FIELDS = ('id', 'task', 'item', 'model', 'category', 'difficulty', 'time') + METRICS
+
+
+def item_key(source_key):
+    """将原文内容键（SHA1十六进制）截取为可存入 BIGINT 的整数，用于跨任务对齐同一原文"""
+    return int(source_key[:15], 16)
+
+
+class ScoreAnalytics:
+    """评分的内存列式副本：维度列为整数编码，分数列为 float32"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.labels = {dim: {} for dim in DIMENSIONS}  # dim -> {编码: 标签}
+        self.task_ids = []  # 任务编码 -> task_id
+        self._task_codes = {}
+        self.columns = None
+        self.last_id = 0
+
+    def __len__(self):
+        return 0 if self.columns is None else len(self.columns['id'])
+
+    # ---- 加载 ----
+
+    def refresh(self, fetch_rows, fetch_labels, chunk_size=200000):
+        """增量加载 id 大于已加载最大值的行
+
+        fetch_rows(after_id, limit) 返回按 id 升序的元组
+        (id, task_id, item, model_id, category_id, difficulty_id, created_at, 四项分数)；
+        fetch_labels() 返回 [(编码, 维度, 标签)]。
+        """
+        import numpy as np
+
+        with self.lock:
+            for code, kind, value in fetch_labels():
+                if kind in self.labels:
+                    self.labels[kind][code] = value
+            chunks = []
+            while True:
+                rows = fetch_rows(self.last_id, chunk_size)
+                if not rows:
+                    break
+                chunks.append(self._to_columns(np, rows))
+                self.last_id = rows[-1][0]
+                if len(rows) < chunk_size:
+                    break
+            if chunks:
+                if self.columns is not None:
+                    chunks.insert(0, self.columns)
+                self.columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in ROW_FIELDS}
+                logger.info(f"评分分析已加载 {len(self)} 行")
+            elif self.columns is None:
+                self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in self._dtypes(np).items()}
+        return len(self)
+
+    def _dtypes(self, np):
+        dtypes = {'id': np.int64, 'task': np.int32, 'item': np.int64, 'model': np.int32,
+                  'category': np.int32, 'difficulty': np.int32, 'time': np.float64}
+        dtypes.update({metric: np.float32 for metric in METRICS})
+        return dtypes
+
+    def _to_columns(self, np, rows):
+        columns = list(zip(*rows))
+        # task_id 为字符串，在内存中另行编码
+        tasks = []
+        for task_id in columns[1]:
+            code = self._task_codes.get(task_id)
+            if code is None:
+                code = self._task_codes[task_id] = len(self.task_ids)
+                self.task_ids.append(task_id)
+            tasks.append(code)
+        columns[1] = tasks
+        # 分数为空（None）时转换为 NaN
+        return {name: np.array(values, dtype=dtype) for (name, dtype), values in zip(self._dtypes(np).items(), columns)}
+
+    # ---- 过滤与分组 ----
+
+    def _code(self, dim, label):
+        for code, value in self.labels[dim].items():
+            if value == label:
+                return code
+        return None
+
+    def mask(self, model=None, category=None, difficulty=None, task_id=None, since=None, until=None):
+        """按维度标签、任务与时间范围过滤，返回布尔掩码（未知标签匹配不到任何行）"""
+        import numpy as np
+
+        columns = self.columns
+        mask = np.ones(len(self), dtype=bool)
+        for dim, label in (('model', model), ('category', category), ('difficulty', difficulty)):
+            if label is not None:
+                code = self._code(dim, label)
+                mask &= (columns[dim] == code) if code is not None else False
+        if task_id is not None:
+            code = self._task_codes.get(task_id)
+            mask &= (columns['task'] == code) if code is not None else False
+        if since is not None:
+            mask &= columns['time'] >= since
+        if until is not None:
+            mask &= columns['time'] < until
+        return mask
+
+    def _groups(self, mask, group_by):
+        """[(标签, 组内掩码)]；group_by 为空时整体作为一组"""
+        import numpy as np
+
+        if not group_by:
+            return [('all', mask)]
+        codes = self.columns[group_by]
+        return [(self.labels[group_by].get(int(code), str(code)), mask & (codes == code))
+                for code in np.unique(codes[mask])]
+
+    def _values(self, metric, mask):
+        import numpy as np
+
+        values = self.columns[metric][mask]
+        return values[~np.isnan(values)]
+
+    # ---- 聚合 ----
+
+    def histogram(self, metric='overall', bins=20, value_range=(0.0, 5.0), group_by=None, **filters):
+        import numpy as np
+
+        edges = np.histogram_bin_edges([], bins=bins, range=value_range)
+        with self.lock:
+            mask = self.mask(**filters)
+            result = {}
+            for label, group_mask in self._groups(mask, group_by):
+                counts, _ = np.histogram(self._values(metric, group_mask), bins=edges)
+                result[label] = {'counts': counts.tolist(), 'total': int(counts.sum())}
+        return {'metric': metric, 'edges': np.round(edges, 4).tolist(), 'groups': result}
+
+    def percentiles(self, metric='overall', q=(5, 25, 50, 75, 95), group_by='model', **filters):
+        import numpy as np
+
+        with self.lock:
+            mask = self.mask(**filters)
+            result = {}
+            for label, group_mask in self._groups(mask, group_by):
+                values = self._values(metric, group_mask)
+                if not len(values):
+                    continue
+                result[label] = {
+                    'count': int(len(values)),
+                    'mean': round(float(values.mean()), 4),
+                    'std': round(float(values.std()), 4),
+                    'percentiles': {f"{p:g}": round(float(v), 4) for p, v in zip(q, np.percentile(values, q))}
+                }
+        return {'metric': metric, 'group_by': group_by, 'groups': result}
+
+    def _item_means(self, np, metric, mask):
+        """每条原文的平均分：返回 (按升序排列的原文键, 平均分)"""
+        items = self.columns['item'][mask]
+        values = self.columns[metric][mask]
+        valid = ~np.isnan(values)
+        unique, inverse = np.unique(items[valid], return_inverse=True)
+        sums = np.bincount(inverse, weights=values[valid], minlength=len(unique))
+        counts = np.bincount(inverse, minlength=len(unique))
+        return unique, sums / np.maximum(counts, 1)
+
+    def model_deltas(self, metric='overall', baseline=None, **filters):
+        """各模型相对基准模型在相同原文上的逐条分差（正值表示优于基准）"""
+        import numpy as np
+
+        with self.lock:
+            filters.pop('model', None)
+            mask = self.mask(**filters)
+            models = {label: group_mask for label, group_mask in self._groups(mask, 'model')}
+            if not models:
+                return {'metric': metric, 'baseline': baseline, 'models': {}}
+            if baseline not in models:
+                baseline = max(models, key=lambda label: int(models[label].sum()))
+            base_items, base_means = self._item_means(np, metric, models[baseline])
+            result = {}
+            for label, group_mask in models.items():
+                if label == baseline:
+                    continue
+                items, means = self._item_means(np, metric, group_mask)
+                _, base_index, index = np.intersect1d(base_items, items, assume_unique=True, return_indices=True)
+                if not len(index):
+                    result[label] = {'paired_items': 0}
+                    continue
+                delta = means[index] - base_means[base_index]
+                result[label] = {
+                    'paired_items': int(len(delta)),
+                    'mean_delta': round(float(delta.mean()), 4),
+                    'median_delta': round(float(np.median(delta)), 4),
+                    'win_rate': round(float((delta > 0).mean()), 4),
+                    'tie_rate': round(float((delta == 0).mean()), 4),
+                    'loss_rate': round(float((delta < 0).mean()), 4)
+                }
+        return {'metric': metric, 'baseline': baseline, 'models': result}
+
+    def trend(self, metric='overall', bucket='day', group_by='model', **filters):
+        """按时间桶统计各组平均分与数量"""
+        import numpy as np
+
+        seconds = BUCKET_SECONDS.get(bucket, BUCKET_SECONDS['day'])
+        with self.lock:
+            mask = self.mask(**filters)
+            result = {}
+            for label, group_mask in self._groups(mask, group_by):
+                values = self.columns[metric][group_mask]
+                valid = ~np.isnan(values)
+                buckets = (self.columns['time'][group_mask][valid] // seconds).astype(np.int64)
+                unique, inverse = np.unique(buckets, return_inverse=True)
+                sums = np.bincount(inverse, weights=values[valid], minlength=len(unique))
+                counts = np.bincount(inverse, minlength=len(unique))
+                result[label] = [{'bucket_start': int(start * seconds), 'count': int(count),
+                                  'mean': round(float(total / count), 4)}
+                                 for start, total, count in zip(unique, sums, counts)]
+        return {'metric': metric, 'bucket': bucket, 'groups': result}
+
+
+# 全局评分分析实例（数据由 app 中的 ScoreRecord 表增量加载）
+score_analytics = ScoreAnalytics()
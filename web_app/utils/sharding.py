@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片分布式评估（协调者端）
+协调者将任务按调度顺序切分为分片，工作节点注册后通过HTTP拉取分片（租约制），
+结果回传后由协调者幂等写入 TranslationResult；租约超时未完成的分片会重新分派给其他工作节点。
+分片、租约与工作节点登记保存在共享状态（SQLite）中，多进程部署时任一Web进程都能处理工作节点请求。
+"""
+
+import hmac
+import json
+import time
+import uuid
+import logging
+import threading
+
+from .shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+SHARD_PENDING = 'pending'
+SHARD_LEASED = 'leased'
+SHARD_DONE = 'done'
+
+# 可在节点间传递的翻译对字段类型
+_SERIALIZABLE = (str, int, float, bool, type(None), list, dict)
+
+
+def serialize_pair(pair):
+    """将翻译对转换为可JSON序列化的字典"""
+    fields = pair if isinstance(pair, dict) else vars(pair)
+    return {key: value for key, value in fields.items()
+            if not key.startswith('_') and isinstance(value, _SERIALIZABLE)}
+
+
+class Shard:
+    """一个分片：若干组翻译对（组内原文相同，不跨分片拆分）"""
+
+    def __init__(self, task_id, index, pairs, models):
+        self.shard_id = f"{task_id}-{index:05d}"
+        self.task_id = task_id
+        self.index = index
+        self.pairs = pairs
+        self.models = models
+        self.state = SHARD_PENDING
+        self.worker_id = None
+        self.lease_expires = 0.0
+        self.attempts = 0
+        self.error = None
+
+    @classmethod
+    def from_row(cls, row):
+        shard_id, task_id, index, payload, state, worker_id, lease_expires, attempts, error = row
+        payload = json.loads(payload)
+        shard = cls(task_id, index, payload['pairs'], payload['models'])
+        shard.state = state
+        shard.worker_id = worker_id
+        shard.lease_expires = lease_expires
+        shard.attempts = attempts
+        shard.error = error
+        return shard
+
+    def to_payload(self, lease_seconds):
+        return {
+            'shard_id': self.shard_id,
+            'task_id': self.task_id,
+            'models': self.models,
+            'pairs': self.pairs,
+            'lease_seconds': lease_seconds,
+            'attempt': self.attempts
+        }
+
+
+class ShardJob:
+    """一个分布式任务的全部分片（从共享状态读出的只读视图）"""
+
+    def __init__(self, task_id, shards, cancelled=False):
+        self.task_id = task_id
+        self.shards = {shard.shard_id: shard for shard in shards}
+        self.order = [shard.shard_id for shard in shards]
+        self.cancelled = cancelled
+
+    @property
+    def finished(self):
+        return self.cancelled or all(shard.state == SHARD_DONE for shard in self.shards.values())
+
+    def summary(self):
+        states = {}
+        workers = set()
+        for shard in self.shards.values():
+            states[shard.state] = states.get(shard.state, 0) + 1
+            if shard.worker_id:
+                workers.add(shard.worker_id)
+        return {
+            'shards': len(self.shards),
+            'states': states,
+            'workers': sorted(workers),
+            'reassigned': sum(max(0, shard.attempts - 1) for shard in self.shards.values()),
+            'failed_shards': [shard.shard_id for shard in self.shards.values() if shard.error]
+        }
+
+
+SHARD_COLUMNS = 'shard_id, task_id, idx, payload, state, worker_id, lease_expires, attempts, error'
+
+
+class ShardCoordinator:
+    """分片协调者：登记工作节点、分派租约、跟踪完成情况。
+    分片与租约保存在共享状态中，多进程部署时工作节点的请求可以落在任一Web进程上。"""
+
+    def __init__(self, store=None, enabled=False, shard_size=20, lease_seconds=300, token=''):
+        self.store = store or shared_state
+        self.enabled = enabled
+        self.shard_size = shard_size
+        self.lease_seconds = lease_seconds
+        self.token = token
+        self.is_paused = lambda task_id: False
+        # 同一进程内完成分片时唤醒等待者；其他进程完成的分片靠 wait 超时后重新查询发现
+        self.condition = threading.Condition()
+
+    def configure(self, enabled=None, shard_size=None, lease_seconds=None, token=None, is_paused=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if shard_size is not None:
+            self.shard_size = max(1, shard_size)
+        if lease_seconds is not None:
+            self.lease_seconds = lease_seconds
+        if token is not None:
+            self.token = token
+        if is_paused is not None:
+            self.is_paused = is_paused
+        if self.enabled and not self.token:
+            # 没有令牌时任何客户端都能注册为工作节点并写入任务结果：不进入协调者模式
+            self.enabled = False
+            raise ValueError("EVALUATION_MODE=coordinator 需要设置 WORKER_TOKEN")
+        logger.info(f"分布式评估: coordinator={self.enabled}, shard_size={self.shard_size}, "
+                    f"lease_seconds={self.lease_seconds}")
+
+    def authorized(self, token):
+        """工作节点令牌校验；未配置令牌时拒绝所有工作节点请求"""
+        return bool(self.token) and hmac.compare_digest((token or '').encode('utf-8'), self.token.encode('utf-8'))
+
+    def create_job(self, task_id, groups, models):
+        """按给定顺序（调度计划）将翻译对组切分为分片；组上记录了模型（增量重评估）时按模型分别切分"""
+        shards = []
+        buffers = {}  # 模型元组 -> (翻译对, 组数)
+        for group in groups:
+            shard_models = tuple(group.models or models)
+            pairs, group_count = buffers.get(shard_models, ([], 0))
+            pairs.extend(serialize_pair(pair) for pair in group.pairs)
+            group_count += 1
+            if group_count >= self.shard_size:
+                shards.append(Shard(task_id, len(shards), pairs, list(shard_models)))
+                buffers.pop(shard_models, None)
+            else:
+                buffers[shard_models] = (pairs, group_count)
+        for shard_models, (pairs, _) in buffers.items():
+            shards.append(Shard(task_id, len(shards), pairs, list(shard_models)))
+        with self.store.transaction() as conn:
+            conn.execute('DELETE FROM shards WHERE task_id = ?', (task_id,))
+            conn.execute('INSERT OR REPLACE INTO shard_jobs (task_id, cancelled, created_at) VALUES (?, 0, ?)',
+                         (task_id, time.time()))
+            conn.executemany(
+                'INSERT INTO shards (shard_id, task_id, idx, payload, state) VALUES (?, ?, ?, ?, ?)',
+                [(shard.shard_id, task_id, shard.index,
+                  json.dumps({'pairs': shard.pairs, 'models': shard.models}), SHARD_PENDING)
+                 for shard in shards])
+        logger.info(f"任务 {task_id} 已切分为 {len(shards)} 个分片，等待工作节点拉取")
+        return ShardJob(task_id, shards)
+
+    def register_worker(self, worker_id=None, info=None):
+        worker_id = worker_id or f"worker-{uuid.uuid4().hex[:8]}"
+        with self.store.transaction() as conn:
+            row = conn.execute('SELECT info FROM shard_workers WHERE worker_id = ?', (worker_id,)).fetchone()
+            if row is None:
+                conn.execute('INSERT INTO shard_workers (worker_id, info, last_seen) VALUES (?, ?, ?)',
+                             (worker_id, json.dumps(info or {}), time.time()))
+            else:
+                conn.execute('UPDATE shard_workers SET info = ?, last_seen = ? WHERE worker_id = ?',
+                             (json.dumps(info) if info else row[0], time.time(), worker_id))
+        logger.info(f"工作节点已注册: {worker_id}")
+        return worker_id
+
+    def lease(self, worker_id):
+        """为工作节点分派下一个分片（优先未分派的，其次租约已过期的），没有可用分片时返回None"""
+        now = time.time()
+        with self.store.transaction() as conn:
+            conn.execute('UPDATE shard_workers SET last_seen = ? WHERE worker_id = ?', (now, worker_id))
+            jobs = conn.execute('SELECT task_id FROM shard_jobs WHERE cancelled = 0 ORDER BY created_at').fetchall()
+            for (task_id,) in jobs:
+                if self.is_paused(task_id):
+                    continue
+                row = conn.execute(
+                    f"SELECT {SHARD_COLUMNS} FROM shards WHERE task_id = ? AND "
+                    f"(state = ? OR (state = ? AND lease_expires < ?)) ORDER BY idx LIMIT 1",
+                    (task_id, SHARD_PENDING, SHARD_LEASED, now)).fetchone()
+                if row is None:
+                    continue
+                shard = Shard.from_row(row)
+                if shard.state == SHARD_LEASED:
+                    logger.warning(f"分片 {shard.shard_id} 租约过期（{shard.worker_id}），重新分派给 {worker_id}")
+                shard.state = SHARD_LEASED
+                shard.worker_id = worker_id
+                shard.lease_expires = now + self.lease_seconds
+                shard.attempts += 1
+                conn.execute('UPDATE shards SET state = ?, worker_id = ?, lease_expires = ?, attempts = ? '
+                             'WHERE shard_id = ?',
+                             (shard.state, worker_id, shard.lease_expires, shard.attempts, shard.shard_id))
+                return shard.to_payload(self.lease_seconds)
+        return None
+
+    def _held_shard(self, conn, shard_id, worker_id):
+        row = conn.execute(
+            f"SELECT {', '.join('s.' + column.strip() for column in SHARD_COLUMNS.split(','))}, j.cancelled "
+            f"FROM shards s JOIN shard_jobs j ON j.task_id = s.task_id WHERE s.shard_id = ?",
+            (shard_id,)).fetchone()
+        if row is None or row[-1]:
+            return None
+        shard = Shard.from_row(row[:-1])
+        if shard.worker_id != worker_id or shard.state == SHARD_DONE:
+            return None
+        return shard
+
+    def get_shard(self, shard_id, worker_id):
+        """返回工作节点当前持有的分片，并续租；分片已被取消或转交其他节点时返回None"""
+        now = time.time()
+        with self.store.transaction() as conn:
+            shard = self._held_shard(conn, shard_id, worker_id)
+            if shard is None:
+                return None
+            shard.lease_expires = now + self.lease_seconds
+            conn.execute('UPDATE shards SET lease_expires = ? WHERE shard_id = ?', (shard.lease_expires, shard_id))
+            conn.execute('UPDATE shard_workers SET last_seen = ? WHERE worker_id = ?', (now, worker_id))
+            return shard
+
+    def complete(self, shard_id, worker_id, error=None):
+        with self.store.transaction() as conn:
+            if self._held_shard(conn, shard_id, worker_id) is None:
+                return False
+            conn.execute('UPDATE shards SET state = ?, error = ? WHERE shard_id = ?', (SHARD_DONE, error, shard_id))
+            conn.execute('UPDATE shard_workers SET shards_done = shards_done + 1, last_seen = ? WHERE worker_id = ?',
+                         (time.time(), worker_id))
+        with self.condition:
+            self.condition.notify_all()
+        return True
+
+    def _finished(self, task_id):
+        row = self.store.execute(
+            'SELECT j.cancelled, (SELECT COUNT(*) FROM shards s WHERE s.task_id = j.task_id AND s.state != ?) '
+            'FROM shard_jobs j WHERE j.task_id = ?', (SHARD_DONE, task_id)).fetchone()
+        return row is None or bool(row[0]) or row[1] == 0
+
+    def wait(self, task_id, timeout=1.0):
+        """等待分片状态变化，返回任务是否已全部完成"""
+        if self._finished(task_id):
+            return True
+        with self.condition:
+            self.condition.wait(timeout)
+        return self._finished(task_id)
+
+    def cancel(self, task_id):
+        self.store.execute('UPDATE shard_jobs SET cancelled = 1 WHERE task_id = ?', (task_id,))
+        with self.condition:
+            self.condition.notify_all()
+
+    def _load_job(self, conn, task_id):
+        job = conn.execute('SELECT cancelled FROM shard_jobs WHERE task_id = ?', (task_id,)).fetchone()
+        if job is None:
+            return None
+        rows = conn.execute(f"SELECT {SHARD_COLUMNS} FROM shards WHERE task_id = ? ORDER BY idx",
+                            (task_id,)).fetchall()
+        return ShardJob(task_id, [Shard.from_row(row) for row in rows], bool(job[0]))
+
+    def finish(self, task_id):
+        with self.store.transaction() as conn:
+            job = self._load_job(conn, task_id)
+            conn.execute('DELETE FROM shards WHERE task_id = ?', (task_id,))
+            conn.execute('DELETE FROM shard_jobs WHERE task_id = ?', (task_id,))
+        return job.summary() if job else None
+
+    def active_threads(self):
+        """最近一个租约周期内活跃的工作节点并发线程总数（用于估算剩余时间）"""
+        cutoff = time.time() - self.lease_seconds
+        rows = self.store.execute('SELECT info FROM shard_workers WHERE last_seen >= ?', (cutoff,)).fetchall()
+        return sum(max(1, int(json.loads(info).get('threads', 1) or 1)) for (info,) in rows)
+
+    def get_status(self):
+        now = time.time()
+        workers = self.store.execute('SELECT worker_id, info, last_seen, shards_done FROM shard_workers').fetchall()
+        task_ids = [row[0] for row in self.store.execute('SELECT task_id FROM shard_jobs ORDER BY created_at')]
+        jobs = {task_id: self._load_job(self.store, task_id) for task_id in task_ids}
+        return {
+            'enabled': self.enabled,
+            'workers': {worker_id: {
+                'info': json.loads(info),
+                'seconds_since_seen': round(now - last_seen, 1),
+                'shards_done': shards_done
+            } for worker_id, info, last_seen, shards_done in workers},
+            'jobs': {task_id: job.summary() for task_id, job in jobs.items() if job}
+        }
+
+
+# 全局分片协调者实例
+shard_coordinator = ShardCoordinator()
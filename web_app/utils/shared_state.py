@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程共享状态
+gunicorn 等多进程部署时各工作进程的内存互不可见。任务控制标志、实时进度、日志、性能统计与分片租约
+统一保存在一个 WAL 模式的 SQLite 文件中，任一进程收到的请求都能读写其他进程中运行任务的状态。
+每个进程（fork 后重新建立）每个线程各持有一个连接；日志先写入内存缓冲，由后台线程批量落盘。
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_control (
+    task_id TEXT PRIMARY KEY,
+    paused INTEGER NOT NULL DEFAULT 0,
+    terminated INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_progress (
+    task_id TEXT PRIMARY KEY,
+    snapshot TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress_inbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    entries TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT,
+    task_id TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_logs_type ON logs (type, id);
+CREATE INDEX IF NOT EXISTS ix_logs_task ON logs (task_id, id);
+CREATE TABLE IF NOT EXISTS translation_progress (
+    task_id TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, model_name)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (name, pid)
+);
+CREATE TABLE IF NOT EXISTS shard_jobs (
+    task_id TEXT PRIMARY KEY,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    shard_id TEXT PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    worker_id TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_shards_task_state ON shards (task_id, state, idx);
+CREATE TABLE IF NOT EXISTS shard_workers (
+    worker_id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    shards_done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class SharedStateStore:
+    """基于 SQLite（WAL）的跨进程共享状态"""
+
+    def __init__(self, path=None, max_logs=2000, log_flush_interval=0.5):
+        self.path = path
+        self.max_logs = max_logs
+        self.log_flush_interval = log_flush_interval
+        self._local = threading.local()
+        self._log_buffer = []
+        self._progress_buffer = {}  # (task_id, 模型) -> [total, completed, errors] 增量
+        self._buffer_lock = threading.Lock()
+        self._flusher_pid = None
+
+    def configure(self, path=None, max_logs=None):
+        if path is not None and path != self.path:
+            self.path = path
+            self._local = threading.local()
+        if max_logs is not None:
+            self.max_logs = max_logs
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        logger.info(f"共享状态存储: {self.path}")
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connection(self):
+        """当前线程的连接；fork 出的子进程不能复用父进程的连接，按PID重新建立"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def execute(self, sql, params=()):
+        return self._connection().execute(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        """写事务（BEGIN IMMEDIATE：事务开始即取得写锁，避免读后写的升级冲突）"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    # ---- 任务控制标志 ----
+
+    def init_task_control(self, task_id):
+        self.execute('INSERT OR REPLACE INTO task_control (task_id, paused, terminated, owner_pid, updated_at) '
+                     'VALUES (?, 0, 0, ?, ?)', (task_id, os.getpid(), time.time()))
+
+    def set_task_control(self, task_id, **flags):
+        """设置暂停/终止标志，任务不在运行（没有控制记录）时返回False"""
+        assignments = ', '.join(f"{name} = ?" for name in flags)
+        values = [int(bool(value)) for value in flags.values()]
+        cursor = self.execute(f"UPDATE task_control SET {assignments}, updated_at = ? WHERE task_id = ?",
+                              (*values, time.time(), task_id))
+        return cursor.rowcount > 0
+
+    def get_task_control(self, task_id):
+        row = self.execute('SELECT paused, terminated FROM task_control WHERE task_id = ?', (task_id,)).fetchone()
+        if row is None:
+            return {}
+        return {'paused': bool(row[0]), 'terminated': bool(row[1])}
+
+    def owned_task_controls(self):
+        """本进程运行的任务的控制标志 [(task_id, paused, terminated)]"""
+        rows = self.execute('SELECT task_id, paused, terminated FROM task_control WHERE owner_pid = ?',
+                            (os.getpid(),)).fetchall()
+        return [(task_id, bool(paused), bool(terminated)) for task_id, paused, terminated in rows]
+
+    def clear_task_control(self, task_id):
+        self.execute('DELETE FROM task_control WHERE task_id = ?', (task_id,))
+
+    # ---- 实时进度 ----
+
+    def put_progress(self, task_id, snapshot):
+        self.execute('INSERT OR REPLACE INTO task_progress (task_id, snapshot, updated_at) VALUES (?, ?, ?)',
+                     (task_id, json.dumps(snapshot), time.time()))
+
+    def get_progress(self, task_id):
+        row = self.execute('SELECT snapshot FROM task_progress WHERE task_id = ?', (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_progress(self, task_id):
+        self.execute('DELETE FROM task_progress WHERE task_id = ?', (task_id,))
+        self.execute('DELETE FROM progress_inbox WHERE task_id = ?', (task_id,))
+
+    def push_progress(self, task_id, entries):
+        """其他进程（如接收工作节点回传的请求）投递的进度记录，由运行任务的进程取走"""
+        if entries:
+            self.execute('INSERT INTO progress_inbox (task_id, entries) VALUES (?, ?)',
+                         (task_id, json.dumps(entries)))
+
+    def drain_progress(self, task_id):
+        with self.transaction() as conn:
+            rows = conn.execute('SELECT id, entries FROM progress_inbox WHERE task_id = ? ORDER BY id',
+                                (task_id,)).fetchall()
+            if rows:
+                conn.execute('DELETE FROM progress_inbox WHERE task_id = ? AND id <= ?', (task_id, rows[-1][0]))
+        return [entry for _, entries in rows for entry in json.loads(entries)]
+
+    # ---- 日志 ----
+
+    def append_log(self, entry):
+        """日志先进入内存缓冲，由后台线程批量写入，避免每条日志一次磁盘提交"""
+        with self._buffer_lock:
+            self._log_buffer.append(entry)
+            self._ensure_flusher()
+
+    def add_translation_progress(self, task_id, model_name, total=0, completed=0, errors=0):
+        """累加翻译进度计数（与日志一起批量写入）"""
+        with self._buffer_lock:
+            delta = self._progress_buffer.setdefault((task_id, model_name), [0, 0, 0])
+            delta[0] += total
+            delta[1] += completed
+            delta[2] += errors
+            self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        # 调用方持有 _buffer_lock
+        if self._flusher_pid != os.getpid() and self.enabled:
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.log_flush_interval)
+            try:
+                self.flush_logs()
+            except Exception as e:
+                # 不能用 logger 记录，否则会再次进入日志缓冲；直接写标准错误
+                sys.stderr.write(f"写入共享日志失败: {e}\n")
+
+    def flush_logs(self):
+        """写入缓冲中的日志与翻译进度增量"""
+        with self._buffer_lock:
+            entries, self._log_buffer = self._log_buffer, []
+            progress, self._progress_buffer = self._progress_buffer, {}
+        if not (entries or progress) or not self.enabled:
+            return
+        with self.transaction() as conn:
+            if entries:
+                conn.executemany('INSERT INTO logs (type, task_id, entry) VALUES (?, ?, ?)',
+                                 [(entry.get('type'), entry.get('task_id'),
+                                   json.dumps(entry, ensure_ascii=False, default=str)) for entry in entries])
+                last_id = conn.execute('SELECT MAX(id) FROM logs').fetchone()[0]
+                conn.execute('DELETE FROM logs WHERE id <= ?', (last_id - self.max_logs,))
+            if progress:
+                conn.executemany(
+                    'INSERT INTO translation_progress (task_id, model_name, total, completed, errors) '
+                    'VALUES (?, ?, ?, ?, ?) ON CONFLICT (task_id, model_name) DO UPDATE SET '
+                    'total = total + excluded.total, completed = completed + excluded.completed, '
+                    'errors = errors + excluded.errors',
+                    [(task_id, model_name, *delta) for (task_id, model_name), delta in progress.items()])
+
+    def recent_logs(self, limit=50, log_type=None, level=None):
+        """最新的日志在前；可按类型或级别过滤"""
+        self.flush_logs()
+        sql, params = 'SELECT entry FROM logs', []
+        if log_type:
+            sql += ' WHERE type = ?'
+            params.append(log_type)
+        elif level:
+            sql += " WHERE json_extract(entry, '$.level') = ?"
+            params.append(level)
+        rows = self.execute(sql + ' ORDER BY id DESC LIMIT ?', (*params, limit)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def task_logs(self, task_id, limit=100):
+        """指定任务最近的日志（按时间顺序）"""
+        self.flush_logs()
+        rows = self.execute('SELECT entry FROM logs WHERE task_id = ? ORDER BY id DESC LIMIT ?',
+                            (task_id, limit)).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def get_translation_progress(self, task_id):
+        self.flush_logs()
+        rows = self.execute('SELECT model_name, total, completed, errors FROM translation_progress '
+                            'WHERE task_id = ?', (task_id,)).fetchall()
+        models = {model_name: {'total': total, 'completed': completed, 'errors': errors}
+                  for model_name, total, completed, errors in rows}
+        return {
+            'total': sum(model['total'] for model in models.values()),
+            'completed': sum(model['completed'] for model in models.values()),
+            'models': models
+        }
+
+    def clear_translation_progress(self, task_id):
+        with self._buffer_lock:
+            self._progress_buffer = {key: delta for key, delta in self._progress_buffer.items() if key[0] != task_id}
+        self.execute('DELETE FROM translation_progress WHERE task_id = ?', (task_id,))
+
+    def clear_logs(self):
+        with self._buffer_lock:
+            self._log_buffer = []
+        self.execute('DELETE FROM logs')
+
+    # ---- 性能统计 ----
+
+    def put_metrics(self, name, payload):
+        """按进程发布统计快照（每个进程一行）"""
+        self.execute('INSERT OR REPLACE INTO metrics (name, pid, payload, updated_at) VALUES (?, ?, ?, ?)',
+                     (name, os.getpid(), json.dumps(payload), time.time()))
+
+    def get_metrics(self, name, max_age=None, exclude_self=False):
+        """返回各进程的统计快照（按更新时间升序）；max_age 秒内未更新的视为已退出的进程"""
+        sql = 'SELECT pid, payload FROM metrics WHERE name = ?'
+        params = [name]
+        if max_age is not None:
+            sql += ' AND updated_at >= ?'
+            params.append(time.time() - max_age)
+        if exclude_self:
+            sql += ' AND pid != ?'
+            params.append(os.getpid())
+        rows = self.execute(sql + ' ORDER BY updated_at', params).fetchall()
+        return [(pid, json.loads(payload)) for pid, payload in rows]
+
+
+# 全局共享状态实例（路径在 initialize_system 中配置）
+shared_state = SharedStateStore()
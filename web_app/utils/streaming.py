@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式生成与提前终止
+以流式方式逐块读取 OpenAI 兼容接口的翻译输出并记录首字延迟（TTFT），
+出现重复循环或输出长度远超原文长度×比例时立即断开连接，并估算节省的token数与时间。
+
+只替换翻译：评估仍由核心评估引擎（及其评分标准）完成，评分口径与非流式任务一致。
+流式翻译客户端按模型配置传递全部生成参数（含 penalty_score、enable_thinking），但使用本模块内置的翻译提示词
+（TRANSLATION_SYSTEM_PROMPT），不经过核心翻译引擎的提示词构造；任务报告的 streaming 字段与增量重评估的
+翻译模型指纹都会标明这一点（见 PROMPT_VERSION）。
+token数取自服务端在最后一个数据块中返回的 usage（请求时设置 stream_options.include_usage）；
+服务端不支持或提前断开而没有收到 usage 时，按收到的数据块数估计。
+"""
+
+import json
+import time
+import hashlib
+import logging
+
+from .task_control import current_task_control, TaskTerminated
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+ABORT_REPETITION = 'repetition'
+ABORT_LENGTH = 'length'
+
+TRANSLATION_SYSTEM_PROMPT = (
+    "你是资深的航空维修手册翻译专家。请将用户提供的英文航空维修文本准确翻译为简体中文，"
+    "严格使用民航行业标准术语，保留件号、ATA参考号和数值，只输出译文，不要解释。"
+)
+
+
+# 流式翻译客户端提供给模型的其他生成参数（OpenAI 兼容接口的扩展字段，配置中未设置时不发送）
+EXTRA_PARAMETERS = ('penalty_score', 'enable_thinking', 'presence_penalty', 'frequency_penalty')
+
+# 内置翻译提示词版本：提示词变化时译文随之变化
+PROMPT_VERSION = hashlib.sha1(TRANSLATION_SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:12]
+RUBRIC_NOTE = '流式翻译客户端使用内置翻译提示词（评估仍由核心评估引擎完成），译文可能与非流式任务不同'
+
+
+def find_repetition(text, min_repeats=4, max_period=64, min_span=24, full=False):
+    """检测文本尾部是否陷入重复循环，返回 (周期, 重复开始位置) 或 None
+
+    尾部由同一片段连续重复 min_repeats 次以上且覆盖至少 min_span 个字符时视为循环。
+    默认达到阈值即返回（每次检查的代价与文本总长无关），full=True 时回溯到循环的真正起点。
+    """
+    length = len(text)
+    for period in range(1, min(max_period, length // min_repeats) + 1):
+        needed = max(min_repeats, -(-min_span // period))
+        unit = text[length - period:]
+        repeats, start = 1, length - period
+        while start >= period and text[start - period:start] == unit and (full or repeats < needed):
+            repeats += 1
+            start -= period
+        if repeats >= needed:
+            return period, start
+    return None
+
+
+class StreamGuard:
+    """逐块检查流式输出，发现异常生成时返回终止原因"""
+
+    def __init__(self, source_text='', max_length_ratio=4.0, min_length=64,
+                 min_repeats=4, check_interval=16):
+        self.max_length = max(min_length, int(len(source_text or '') * max_length_ratio)) if max_length_ratio else 0
+        self.min_repeats = min_repeats
+        self.check_interval = check_interval
+        self.text = ''
+        self.abort_reason = None
+        self._checked_at = 0
+
+    def feed(self, delta):
+        """追加一段输出，需终止时返回原因"""
+        if self.abort_reason or not delta:
+            return self.abort_reason
+        self.text += delta
+        if self.max_length and len(self.text) > self.max_length:
+            self.abort_reason = ABORT_LENGTH
+        elif len(self.text) - self._checked_at >= self.check_interval:
+            self._checked_at = len(self.text)
+            if self.min_repeats and find_repetition(self.text, self.min_repeats):
+                self.abort_reason = ABORT_REPETITION
+        return self.abort_reason
+
+
+    def clean_text(self):
+        """返回去掉重复循环尾部后的文本（保留一次重复单元）"""
+        if self.abort_reason == ABORT_REPETITION:
+            found = find_repetition(self.text, self.min_repeats, full=True)
+            if found:
+                period, start = found
+                return self.text[:start + period]
+        return self.text
+
+
+class StreamResult:
+    """一次流式请求的结果"""
+
+    def __init__(self):
+        self.text = ''
+        self.ttft = None
+        self.elapsed = 0.0
+        self.tokens = 0  # 生成的token数（服务端usage；未返回时为数据块数）
+        self.chunks = 0
+        self.prompt_tokens = None
+        self.usage_reported = False
+        self.abort_reason = None
+        self.saved_tokens = 0
+        self.saved_seconds = 0.0
+
+
+def _consume_stream(response, result, guard, start):
+    """逐行读取SSE输出并写入 result，guard 触发时提前返回"""
+    for line in response.iter_lines(decode_unicode=False):
+        if not line or not line.startswith(b'data:'):
+            continue
+        data = line[5:].strip()
+        if data == b'[DONE]':
+            break
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        usage = chunk.get('usage')
+        if usage:
+            # include_usage 时最后一个数据块只携带用量（choices 为空）
+            result.tokens = usage.get('completion_tokens', result.tokens)
+            result.prompt_tokens = usage.get('prompt_tokens')
+            result.usage_reported = True
+        choices = chunk.get('choices') or [{}]
+        delta = (choices[0].get('delta') or {}).get('content') or ''
+        if not delta:
+            continue
+        if result.ttft is None:
+            result.ttft = time.perf_counter() - start
+        result.chunks += 1
+        if not result.usage_reported:
+            result.tokens = result.chunks
+        result.text += delta
+        if guard is not None and guard.feed(delta):
+            # 返回后调用方退出 with 块即关闭连接，服务端随之停止生成
+            result.abort_reason = guard.abort_reason
+            break
+
+
+def stream_chat_completion(model_config, messages, guard=None, timeout=120, include_usage=True):
+    """以流式方式调用 OpenAI 兼容的 chat/completions 接口，guard 触发或任务被终止时断开连接"""
+    import requests
+
+    url = model_config.base_url.rstrip('/') + '/chat/completions'
+    payload = {
+        'model': model_config.model_id,
+        'messages': messages,
+        'temperature': model_config.temperature,
+        'top_p': model_config.top_p,
+        'max_tokens': model_config.max_tokens,
+        'stream': True
+    }
+    # 与核心翻译引擎相同的生成参数：配置中设置了才发送
+    for name in EXTRA_PARAMETERS:
+        value = getattr(model_config, name, None)
+        if value is not None:
+            payload[name] = value
+    if include_usage:
+        payload['stream_options'] = {'include_usage': True}
+    headers = {'Authorization': f"Bearer {model_config.api_key}", 'Content-Type': 'application/json'}
+    result = StreamResult()
+    start = time.perf_counter()
+    control = current_task_control()
+    with tracer.span('http.stream', model=model_config.model_id) as span, \
+            requests.post(url, json=payload, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        # 任务终止时由控制线程关闭响应，阻塞中的读取随之返回
+        unregister = control.on_terminate(response.close) if control is not None else None
+        try:
+            _consume_stream(response, result, guard, start)
+        except Exception:
+            if control is not None and control.terminated:
+                raise TaskTerminated(f"任务 {control.task_id} 已被终止，流式请求已中断")
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+        span.set_attribute('ttft_ms', round(result.ttft * 1000, 1) if result.ttft is not None else None)
+        span.set_attribute('tokens', result.tokens)
+        span.set_attribute('abort_reason', result.abort_reason)
+    if control is not None and control.terminated:
+        raise TaskTerminated(f"任务 {control.task_id} 已被终止，流式请求已中断")
+    result.elapsed = time.perf_counter() - start
+    if guard is not None and result.abort_reason:
+        result.text = guard.clean_text()
+    if result.abort_reason:
+        # 节省量按 max_tokens 计算，为上限估计；耗时按已观测的生成速度折算
+        result.saved_tokens = max(0, (model_config.max_tokens or 0) - result.tokens)
+        generation_time = result.elapsed - (result.ttft or 0)
+        if result.tokens > 1 and generation_time > 0:
+            # 提前断开时没有 usage，token 数即数据块数；只有一个 token 时无法估计生成速度
+            result.saved_seconds = round(result.saved_tokens * generation_time / (result.tokens - 1), 3)
+    return result
+
+
+class StreamingPolicy:
+    """流式提前终止策略（阈值与开关）"""
+
+    def __init__(self, enabled=False, max_length_ratio=4.0, min_repeats=4, timeout=120, include_usage=True):
+        self.enabled = enabled
+        self.max_length_ratio = max_length_ratio
+        self.min_repeats = min_repeats
+        self.timeout = timeout
+        self.include_usage = include_usage
+
+    def configure(self, enabled=None, max_length_ratio=None, min_repeats=None, timeout=None, include_usage=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if max_length_ratio is not None:
+            self.max_length_ratio = max_length_ratio
+        if min_repeats is not None:
+            self.min_repeats = min_repeats
+        if timeout is not None:
+            self.timeout = timeout
+        if include_usage is not None:
+            self.include_usage = include_usage
+        logger.info(f"流式提前终止: enabled={self.enabled}, max_length_ratio={self.max_length_ratio}, "
+                    f"min_repeats={self.min_repeats}")
+        if self.enabled:
+            logger.warning(f"{RUBRIC_NOTE}（提示词版本 {PROMPT_VERSION}）")
+
+    def settings(self):
+        """影响翻译与评分的设置：内置提示词版本与提前终止阈值（关闭时为None）"""
+        if not self.enabled:
+            return None
+        return {'prompt_version': PROMPT_VERSION, 'max_length_ratio': self.max_length_ratio,
+                'min_repeats': self.min_repeats}
+
+    def translation_guard(self, source_text):
+        return StreamGuard(source_text, self.max_length_ratio, min_repeats=self.min_repeats)
+
+
+class StreamedTranslation:
+    """流式翻译结果，字段与翻译引擎返回的结果保持一致"""
+
+    def __init__(self, pair, model_name, translated_text, processing_time, tokens_used,
+                 error_message=None, stream=None):
+        self.pair_id = pair.id
+        self.model_name = model_name
+        self.source_text = pair.source_text
+        self.translated_text = translated_text
+        self.processing_time = processing_time
+        self.tokens_used = tokens_used
+        self.error_message = error_message
+        self.ttft = getattr(stream, 'ttft', None)
+        self.abort_reason = getattr(stream, 'abort_reason', None)
+        self.saved_tokens = getattr(stream, 'saved_tokens', 0)
+        self.saved_seconds = getattr(stream, 'saved_seconds', 0.0)
+
+
+class StreamTaskStats:
+    """任务范围内的流式统计（首字延迟、提前终止次数、估算节省量）"""
+
+    def __init__(self):
+        self.requests = 0
+        self.ttft = []
+        self.aborted = {}
+        self.saved_tokens = 0
+        self.saved_seconds = 0.0
+
+    def update(self, result):
+        if not hasattr(result, 'abort_reason'):
+            return
+        self.requests += 1
+        if result.ttft is not None:
+            self.ttft.append(result.ttft)
+        if result.abort_reason:
+            self.aborted[result.abort_reason] = self.aborted.get(result.abort_reason, 0) + 1
+            self.saved_tokens += result.saved_tokens
+            self.saved_seconds += result.saved_seconds
+
+    def summary(self):
+        ttft = sorted(self.ttft)
+        return {
+            'scope': 'translation',
+            'prompt_version': PROMPT_VERSION,
+            'note': RUBRIC_NOTE,
+            'requests': self.requests,
+            'ttft_p50_ms': round(ttft[len(ttft) // 2] * 1000, 1) if ttft else None,
+            'ttft_p95_ms': round(ttft[min(len(ttft) - 1, int(len(ttft) * 0.95))] * 1000, 1) if ttft else None,
+            'aborted': dict(self.aborted),
+            'saved_tokens': self.saved_tokens,
+            'saved_seconds': round(self.saved_seconds, 2)
+        }
+
+
+class StreamingTranslationEngine:
+    """流式翻译客户端，接口与翻译引擎一致（add_model / translate_single）"""
+
+    def __init__(self, policy, monitor=None):
+        self.policy = policy
+        self.monitor = monitor
+        self.models = {}
+
+    def add_model(self, model_key, model_config):
+        self.models[model_key] = model_config
+
+    def translate_single(self, model_key, pair):
+        model_config = self.models[model_key]
+        messages = [
+            {'role': 'system', 'content': TRANSLATION_SYSTEM_PROMPT},
+            {'role': 'user', 'content': pair.source_text}
+        ]
+        try:
+            stream = stream_chat_completion(model_config, messages, self.policy.translation_guard(pair.source_text),
+                                            self.policy.timeout, self.policy.include_usage)
+        except TaskTerminated:
+            raise
+        except Exception as e:
+            return StreamedTranslation(pair, model_key, '', 0.0, 0, error_message=str(e))
+        if self.monitor is not None:
+            self.monitor.record_stream(model_key, stream)
+            self.monitor.record_translation(model_config.model_id, stream.tokens, stream.elapsed,
+                                            is_local=model_config.api_key == 'local')
+        return StreamedTranslation(pair, model_key, stream.text.strip(), stream.elapsed, stream.tokens, stream=stream)
+
+
+
+# 全局流式策略实例
+streaming_policy = StreamingPolicy()
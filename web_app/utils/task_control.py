@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务暂停/终止控制
+每个运行中的任务持有一个 TaskControl（Condition + 状态变化 Future），暂停、恢复、终止请求立即唤醒
+等待中的调度线程与工作线程，不再按秒轮询数据库。终止时调用已登记的取消回调（如关闭流式响应），
+正在进行的模型请求随之中断。多进程部署时控制请求落在其他进程上，由本进程的监视线程从共享状态
+读取标志（只读查询，不产生写入）后转交给本地的 TaskControl。
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+from .shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class TaskTerminated(Exception):
+    """任务已被终止，正在进行的调用被中断"""
+
+
+class TaskControl:
+    """单个任务的暂停/终止状态"""
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.paused = False
+        self.terminated = False
+        self.condition = threading.Condition()
+        self._changed = Future()
+        self._cancel_hooks = {}
+        self._next_hook = 0
+        self._detached = []
+
+    def update(self, paused=None, terminated=None):
+        """应用新的控制标志，状态有变化时唤醒所有等待者；终止时执行取消回调"""
+        with self.condition:
+            previous = (self.paused, self.terminated)
+            if paused is not None:
+                self.paused = bool(paused)
+            if terminated:
+                self.terminated = True
+            if (self.paused, self.terminated) == previous:
+                return False
+            changed, self._changed = self._changed, Future()
+            hooks = list(self._cancel_hooks.values()) if self.terminated and not previous[1] else []
+            self.condition.notify_all()
+        changed.set_result((self.paused, self.terminated))
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.debug(f"任务 {self.task_id} 取消回调失败: {e}")
+        return True
+
+    def changed(self):
+        """返回在下一次状态变化时完成的 Future，可与工作线程的 Future 一起 wait"""
+        with self.condition:
+            return self._changed
+
+    def wait_while_paused(self, timeout=None):
+        """暂停期间阻塞，恢复或终止时立即返回；返回任务是否可以继续"""
+        with self.condition:
+            self.condition.wait_for(lambda: not self.paused or self.terminated, timeout)
+            return not self.terminated
+
+    def checkpoint(self):
+        """工作线程在两次模型调用之间调用：暂停时等待，终止时抛出 TaskTerminated"""
+        if not self.wait_while_paused():
+            raise TaskTerminated(f"任务 {self.task_id} 已被终止")
+
+    def on_terminate(self, callback):
+        """登记终止时执行的取消回调，返回注销函数；任务已终止时立即执行"""
+        with self.condition:
+            if not self.terminated:
+                key = self._next_hook
+                self._next_hook += 1
+                self._cancel_hooks[key] = callback
+                return lambda: self._cancel_hooks.pop(key, None)
+        callback()
+        return lambda: None
+
+    def detach_call(self, future):
+        """登记已放弃但仍在执行的调用（如落败的非流式对冲请求），任务结束时据此延后释放模型"""
+        with self.condition:
+            self._detached = [f for f in self._detached if not f.done()]
+            self._detached.append(future)
+
+    def detached_calls(self):
+        """尚未返回的已放弃调用"""
+        with self.condition:
+            return [f for f in self._detached if not f.done()]
+
+
+class CallScope(TaskControl):
+    """单次模型调用的控制对象：跟随所属任务的暂停/终止，也可以单独取消（如对冲请求中落败的一方）
+
+    调用期间绑定到执行线程，流式客户端登记的取消回调（关闭响应）在任务终止或本次调用被取消时执行。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent.task_id if parent is not None else None)
+        self.parent = parent
+        self._detach = parent.on_terminate(self.cancel) if parent is not None else (lambda: None)
+
+    def cancel(self):
+        """取消本次调用（已登记的取消回调立即执行）"""
+        self.update(terminated=True)
+
+    def wait_while_paused(self, timeout=None):
+        if self.parent is not None and not self.parent.wait_while_paused(timeout):
+            return False
+        return not self.terminated
+
+    def close(self):
+        """调用结束后从所属任务注销"""
+        self._detach()
+
+
+def current_task_control():
+    """当前线程正在执行的任务的控制对象（未绑定时为None）"""
+    return getattr(_local, 'control', None)
+
+
+@contextmanager
+def bind_task_control(control):
+    """在当前线程绑定任务控制对象，流式客户端据此登记取消回调"""
+    previous = getattr(_local, 'control', None)
+    _local.control = control
+    try:
+        yield control
+    finally:
+        _local.control = previous
+
+
+class TaskControlRegistry:
+    """本进程运行中任务的控制登记表；控制标志同时写入共享状态供其他进程查询"""
+
+    def __init__(self, store=None, poll_interval=0.25):
+        self.store = store or shared_state
+        self.poll_interval = poll_interval
+        self.tasks = {}
+        self.lock = threading.Lock()
+        self._watcher_pid = None
+
+    def start(self, task_id):
+        control = TaskControl(task_id)
+        with self.lock:
+            self.tasks[task_id] = control
+        if self.store.enabled:
+            self.store.init_task_control(task_id)
+            self._ensure_watcher()
+        return control
+
+    def get(self, task_id):
+        with self.lock:
+            return self.tasks.get(task_id)
+
+    def signal(self, task_id, **flags):
+        """设置暂停/终止标志：本进程的任务立即生效，其他进程的任务经共享状态转交"""
+        applied = False
+        if self.store.enabled:
+            applied = self.store.set_task_control(task_id, **flags)
+        control = self.get(task_id)
+        if control is not None:
+            control.update(**flags)
+            applied = True
+        return applied
+
+    def is_paused(self, task_id):
+        control = self.get(task_id)
+        if control is not None:
+            return control.paused
+        if self.store.enabled:
+            return self.store.get_task_control(task_id).get('paused', False)
+        return False
+
+    def finish(self, task_id):
+        with self.lock:
+            self.tasks.pop(task_id, None)
+        if self.store.enabled:
+            self.store.clear_task_control(task_id)
+
+    def _ensure_watcher(self):
+        with self.lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch_loop, daemon=True, name='task-control-watcher').start()
+
+    def _watch_loop(self):
+        """读取其他进程写入的控制标志；本进程没有运行中的任务时不查询"""
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                controls = dict(self.tasks)
+            if not controls:
+                continue
+            try:
+                for task_id, paused, terminated in self.store.owned_task_controls():
+                    control = controls.get(task_id)
+                    if control is not None:
+                        control.update(paused=paused, terminated=terminated)
+            except Exception as e:
+                logger.warning(f"读取任务控制标志失败: {e}")
+
+
+# 全局任务控制登记表
+task_controls = TaskControlRegistry()
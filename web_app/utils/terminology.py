@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+航空术语检查
+将英→中术语表一次性编译为（按单词的）Aho-Corasick自动机，单次线性扫描找出原文中的术语，
+再检查译文是否使用了期望的中文术语；check_batch 对整批译文只做一次自动机扫描，
+并在任务范围内由 TerminologyStats 汇总每个术语的命中统计。
+
+术语表格式（JSON）：{"landing gear": "起落架", "hydraulic": ["液压", "液压的"]}
+或 [{"source": "landing gear", "target": ["起落架"]}, ...]，也支持两列CSV/TSV。
+"""
+
+import re
+import csv
+import json
+import hashlib
+import logging
+import threading
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'[a-z0-9]+')
+# 批量扫描时相邻文本之间的分隔符：不会出现在任何术语中，自动机在此回到根状态，术语不会跨文本匹配
+_BOUNDARY = None
+
+
+def tokenize_words(text):
+    """小写单词切分（原文与术语表使用同一切分，天然满足整词匹配）"""
+    return _WORD.findall((text or '').lower())
+
+
+class AhoCorasick:
+    """Aho-Corasick多模式匹配自动机，模式与文本均为序列（此处为单词序列）
+
+    按单词构建使状态数约等于术语中不同单词前缀的数量，10万级术语表也能保持较小内存。
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]  # 状态 -> ((模式编号, 模式长度), ...)
+        self.built = False
+
+    def add(self, pattern, pattern_id):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] = self.output[state] + ((pattern_id, len(pattern)),)
+        self.built = False
+
+    def build(self):
+        """广度优先计算失配指针，并合并输出"""
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        self.built = True
+
+    def iter_matches(self, text):
+        """返回 (结束位置, 模式编号, 模式长度) 迭代器，单次线性扫描"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id, length in output[state]:
+                yield index, pattern_id, length
+
+
+class TerminologyChecker:
+    """基于编译术语表的术语检查器"""
+
+    def __init__(self):
+        self.terms = []  # 模式编号 -> (英文术语, [期望中文译法, ...])
+        self.automaton = AhoCorasick()
+        self.source = None
+        self.digest = None  # 术语表内容摘要（写入增量重评估的评估指纹），未加载时为None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def load_glossary(self, path):
+        """加载术语表文件并编译自动机，返回术语数量"""
+        path = Path(path)
+        entries = []
+        if path.suffix.lower() == '.json':
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                entries = list(data.items())
+            else:
+                entries = [(item['source'], item['target']) for item in data]
+        else:
+            delimiter = '\t' if path.suffix.lower() in ('.tsv', '.txt') else ','
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                entries = [(row[0], row[1:]) for row in csv.reader(f, delimiter=delimiter) if len(row) >= 2]
+        self.build(entries)
+        self.source = str(path)
+        logger.info(f"术语表已加载: {path} ({len(self.terms)} 条)")
+        return len(self.terms)
+
+    def build(self, entries):
+        """由 (英文术语, 中文译法或译法列表) 编译自动机"""
+        automaton = AhoCorasick()
+        terms = []
+        seen = {}
+        for source, targets in entries:
+            words = tuple(tokenize_words(str(source)))
+            if isinstance(targets, str):
+                targets = targets.split('|')
+            targets = [t.strip() for t in targets if t and t.strip()]
+            if not words or not targets:
+                continue
+            if words in seen:
+                terms[seen[words]][1].extend(t for t in targets if t not in terms[seen[words]][1])
+                continue
+            seen[words] = len(terms)
+            automaton.add(words, len(terms))
+            terms.append((' '.join(str(source).split()), targets))
+        automaton.build()
+        digest = hashlib.sha1(json.dumps(sorted(terms), ensure_ascii=False).encode('utf-8')).hexdigest() if terms else None
+        with self.lock:
+            self.automaton = automaton
+            self.terms = terms
+            self.digest = digest
+
+    @staticmethod
+    def _select(matches):
+        """按起点排序，长匹配优先，去掉与已选术语重叠的短术语；matches 为 [(起点, 终点, 模式编号), ...]"""
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        selected, covered_until = [], -1
+        for start, end, pattern_id in matches:
+            if start > covered_until:
+                selected.append(pattern_id)
+                covered_until = end
+        return selected
+
+    def find_terms(self, source_text):
+        """在原文中查找术语（整词匹配，重叠时保留最长匹配），返回模式编号列表"""
+        return self._select([(end - length + 1, end, pattern_id)
+                             for end, pattern_id, length in self.automaton.iter_matches(tokenize_words(source_text))])
+
+    def _judge(self, pattern_ids, candidate):
+        candidate = candidate or ''
+        hits, misses = [], []
+        for pattern_id in pattern_ids:
+            source, targets = self.terms[pattern_id]
+            (hits if any(t in candidate for t in targets) else misses).append(source)
+        total = len(hits) + len(misses)
+        return {
+            'expected': total,
+            'hits': hits,
+            'missing': misses,
+            'hit_rate': round(len(hits) / total, 4) if total else 1.0
+        }
+
+    def check(self, source_text, candidate):
+        """检查单条译文，返回命中/缺失的术语"""
+        return self._judge(self.find_terms(source_text), candidate)
+
+    def check_batch(self, items, stats=None, counts=None):
+        """批量检查 [(原文, 译文), ...]：全部原文拼接后只做一次自动机扫描，按文本分拣匹配结果
+
+        counts 为各条结果代表的翻译对数量（默认1）；结果累加到 stats（未传入时新建）并返回该 TerminologyStats。
+        """
+        stats = stats if stats is not None else TerminologyStats()
+        if not items or not self.terms:
+            return stats
+        # 相同原文只扫描一次（同一组翻译对在各模型间共用原文）
+        sources = {}
+        for source_text, _ in items:
+            sources.setdefault(source_text, len(sources))
+        words, starts = [], []
+        for source_text in sources:
+            starts.append(len(words))
+            words.extend(tokenize_words(source_text))
+            words.append(_BOUNDARY)
+        found = [[] for _ in sources]
+        for end, pattern_id, length in self.automaton.iter_matches(words):
+            start = end - length + 1
+            index = bisect_right(starts, start) - 1
+            found[index].append((start, end, pattern_id))
+        selected = [self._select(matches) for matches in found]
+        for position, (source_text, candidate) in enumerate(items):
+            stats.update(self._judge(selected[sources[source_text]], candidate),
+                         count=counts[position] if counts is not None else 1)
+        return stats
+
+
+class TerminologyStats:
+    """任务范围内按术语汇总的命中统计"""
+
+    def __init__(self):
+        self.terms = {}  # 术语 -> {'occurrences', 'hits'}
+        self.lock = threading.Lock()
+
+    def update(self, result, count=1):
+        """累加一条检查结果；count 为共用该结果的翻译对数量"""
+        with self.lock:
+            for term in result['hits']:
+                entry = self.terms.setdefault(term, {'occurrences': 0, 'hits': 0})
+                entry['occurrences'] += count
+                entry['hits'] += count
+            for term in result['missing']:
+                entry = self.terms.setdefault(term, {'occurrences': 0, 'hits': 0})
+                entry['occurrences'] += count
+
+    def summary(self, top=50):
+        """返回总体命中率及缺失最多的术语"""
+        with self.lock:
+            occurrences = sum(e['occurrences'] for e in self.terms.values())
+            hits = sum(e['hits'] for e in self.terms.values())
+            worst = sorted(self.terms.items(), key=lambda kv: -(kv[1]['occurrences'] - kv[1]['hits']))[:top]
+        return {
+            'distinct_terms': len(self.terms),
+            'occurrences': occurrences,
+            'hit_rate': round(hits / occurrences, 4) if occurrences else 1.0,
+            'most_missed': [{
+                'term': term,
+                'occurrences': entry['occurrences'],
+                'hits': entry['hits'],
+                'hit_rate': round(entry['hits'] / entry['occurrences'], 4)
+            } for term, entry in worst if entry['occurrences'] > entry['hits']]
+        }
+
+
+# 全局术语检查器实例（术语表在初始化时加载）
+terminology_checker = TerminologyChecker()
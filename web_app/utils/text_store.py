@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果库文本去重存储
+原文、参考译文与模型译文按内容SHA1写入文本表，结果行只保存文本id；同一原文在各模型、各次重跑之间只存一份。
+evaluation_details 压缩后保存（安装 zstandard 时用 zstd，否则用 zlib），读取时按帧头自动识别。
+"""
+
+import zlib
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+try:
+    import zstandard as _zstd
+except ImportError:
+    _zstd = None
+
+
+def text_digest(text):
+    """文本内容键（原样文本的SHA1，不做规范化）"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def compress_text(text, level=6):
+    """压缩 JSON 等长文本，空值原样返回"""
+    if text is None:
+        return None
+    data = text.encode('utf-8')
+    if _zstd is not None:
+        return _zstd.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level)
+
+
+def decompress_text(blob):
+    """解压 compress_text 的输出；兼容旧数据中未压缩的字符串"""
+    if blob is None:
+        return None
+    if isinstance(blob, str):
+        return blob
+    blob = bytes(blob)
+    if blob[:4] == _ZSTD_MAGIC:
+        if _zstd is None:
+            raise RuntimeError('evaluation_details 使用 zstd 压缩，需要安装 zstandard')
+        return _zstd.ZstdDecompressor().decompress(blob).decode('utf-8')
+    return zlib.decompress(blob).decode('utf-8')
+
+
+class TextInterner:
+    """文本驻留：按内容键查找或写入文本表并返回id，进程内缓存 内容键 -> id
+
+    使用独立连接读写文本表：结果写入所在的会话可能已持有写锁（SQLite），不能在同一会话中穿插查询。
+    """
+
+    def __init__(self, max_cache=100000, batch_size=500):
+        self.max_cache = max_cache
+        self.batch_size = batch_size
+        self.engine = None
+        self.table = None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def configure(self, engine, table):
+        self.engine = engine
+        self.table = table
+        with self._lock:
+            self._cache = {}
+
+    def intern(self, texts):
+        """返回 {文本: 文本id}（None 不参与），不存在的文本先写入"""
+        digests = {text: text_digest(text) for text in set(texts) if text is not None}
+        with self._lock:
+            ids = {digest: self._cache[digest] for digest in digests.values() if digest in self._cache}
+        missing = {digest: text for text, digest in digests.items() if digest not in ids}
+        if missing:
+            ids.update(self._resolve(missing))
+            with self._lock:
+                if len(self._cache) + len(missing) > self.max_cache:
+                    self._cache = {}
+                self._cache.update((digest, ids[digest]) for digest in missing)
+        return {text: ids[digest] for text, digest in digests.items()}
+
+    def _select(self, conn, digests):
+        table = self.table
+        found = {}
+        for start in range(0, len(digests), self.batch_size):
+            chunk = digests[start:start + self.batch_size]
+            found.update(conn.execute(table.select().with_only_columns(table.c.digest, table.c.id)
+                                      .where(table.c.digest.in_(chunk))).fetchall())
+        return found
+
+    def _resolve(self, missing, attempts=3):
+        from sqlalchemy.exc import IntegrityError
+
+        found = {}
+        pending = list(missing)
+        for _ in range(attempts):
+            with self.engine.connect() as conn:
+                found.update(self._select(conn, pending))
+            pending = [digest for digest in pending if digest not in found]
+            if not pending:
+                break
+            try:
+                with self.engine.begin() as conn:
+                    # SQLite 下并发写入相同文本时忽略冲突；其他数据库冲突时整批回滚，重新查询后只写入仍缺失的文本
+                    conn.execute(self.table.insert().prefix_with('OR IGNORE', dialect='sqlite'),
+                                 [{'digest': digest, 'text': missing[digest]} for digest in pending])
+            except IntegrityError:
+                logger.debug('文本表写入冲突，重新查询')
+        if pending:
+            with self.engine.connect() as conn:
+                found.update(self._select(conn, pending))
+        return found
+
+
+# 全局文本驻留实例（在 app 中绑定数据库引擎与文本表）
+text_interner = TextInterner()
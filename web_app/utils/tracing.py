@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热路径追踪与采样剖析
+Tracer 在评估流程各阶段（数据加载、提示构建、HTTP等待、响应解析、数据库写入等）记录耗时span，
+启用时给 requests/httpx 的发送方法套上 http.wait span，翻译/评估调用按其中的HTTP区间拆出提示构建与响应解析，
+格式与 OpenTelemetry OTLP/JSON 一致，批量写入本地 JSONL 文件或 POST 到 OTLP/HTTP 收集器。
+关闭时 span() 返回共享的空上下文，开销只有一次属性判断。
+SamplingProfiler 按需对本进程所有线程采样若干秒，输出 flamegraph.pl / speedscope 可直接读取的折叠栈。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+def _attribute_value(value):
+    """转换为 OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    """一个计时区间（字段对应 OTLP Span）"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'status', 'thread')
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.thread = threading.current_thread().name
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or time.time_ns()),
+            'attributes': [{'key': key, 'value': _attribute_value(value)}
+                           for key, value in self.attributes.items() if value is not None]
+                          + [{'key': 'thread.name', 'value': {'stringValue': self.thread}}],
+            'status': {'code': self.status}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """关闭追踪时使用的空span"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """span 记录器：同一线程内自动嵌套，跨线程时用 current()/attach() 传递父span"""
+
+    def __init__(self, service_name='aviation-translation-web', enabled=False, export_path=None,
+                 otlp_endpoint=None, flush_interval=2.0, max_buffer=10000):
+        self.service_name = service_name
+        self.enabled = enabled
+        self.export_path = export_path
+        self.otlp_endpoint = otlp_endpoint
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._local = threading.local()
+        self._buffer = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def configure(self, enabled=None, export_path=None, otlp_endpoint=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if export_path is not None:
+            self.export_path = export_path
+        if otlp_endpoint is not None:
+            self.otlp_endpoint = otlp_endpoint.rstrip('/') or None
+        if self.enabled:
+            instrument_http(self)
+        logger.info(f"追踪: enabled={self.enabled}, file={self.export_path}, otlp={self.otlp_endpoint}")
+
+    def span(self, name, **attributes):
+        """返回一个span上下文；关闭时为空操作"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name, attributes):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.trace_id if parent else '%032x' % random.getrandbits(128),
+                    parent.span_id if parent else None, attributes)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = STATUS_ERROR
+            span.set_attribute('exception.type', type(e).__name__)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            stack.pop()
+            self._export(span)
+            http_spans = getattr(self._local, 'http_spans', None)
+            if http_spans is not None and name.startswith('http.'):
+                http_spans.append(span)
+
+    @contextmanager
+    def phased(self, name, **attributes):
+        """记录一次模型调用：结束时以其中第一个/最后一个HTTP span为界补记 prompt.build 与 response.parse 子span"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        saved, self._local.http_spans = getattr(self._local, 'http_spans', None), []
+        try:
+            with self._span(name, attributes) as span:
+                try:
+                    yield span
+                finally:
+                    http_spans = self._local.http_spans
+                    if http_spans:
+                        end_ns = time.time_ns()
+                        for phase, start, end in (('prompt.build', span.start_ns, http_spans[0].start_ns),
+                                                  ('response.parse', http_spans[-1].end_ns, end_ns)):
+                            child = Span(phase, span.trace_id, span.span_id)
+                            child.start_ns, child.end_ns = start, end
+                            self._export(child)
+        finally:
+            self._local.http_spans = saved
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self):
+        """当前线程最内层的span（传给工作线程作为父span）"""
+        if not self.enabled:
+            return None
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def attach(self, parent):
+        """在工作线程中以 parent 为父span 继续记录"""
+        if parent is None or not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        saved, self._local.stack = stack, [parent]
+        try:
+            yield
+        finally:
+            self._local.stack = saved
+
+    # ---- 导出 ----
+
+    def _export(self, span):
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._dropped += 1
+                return
+            self._buffer.append(span)
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_loop, daemon=True, name='trace-exporter').start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"导出追踪数据失败: {e}")
+
+    def flush(self):
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning(f"追踪缓冲已满，丢弃 {dropped} 个span")
+        if not spans:
+            return 0
+        payload = self.to_otlp(spans)
+        if self.export_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.export_path)), exist_ok=True)
+            with open(self.export_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + '\n')
+        if self.otlp_endpoint:
+            import requests
+            requests.post(f"{self.otlp_endpoint}/v1/traces", json=payload, timeout=5).raise_for_status()
+        return len(spans)
+
+    def to_otlp(self, spans):
+        """OTLP/JSON ExportTraceServiceRequest（文件导出时每行一个）"""
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': self.service_name}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}}
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': 'web_app.utils.tracing'},
+                'spans': [span.to_otlp() for span in spans]
+            }]
+        }]}
+
+
+_http_instrumented = False
+
+
+def instrument_http(tracer):
+    """给 requests.Session.send 与 httpx.Client.send（openai SDK 使用）套上 http.wait span，只在已有父span的线程中记录"""
+    global _http_instrumented
+    if _http_instrumented:
+        return
+    _http_instrumented = True
+
+    def wrap(cls, host_of):
+        original = cls.send
+
+        def send(self, request, *args, **kwargs):
+            if tracer.current() is None:
+                return original(self, request, *args, **kwargs)
+            with tracer.span('http.wait', method=request.method, host=host_of(request)) as span:
+                response = original(self, request, *args, **kwargs)
+                span.set_attribute('status_code', response.status_code)
+                return response
+
+        cls.send = send
+
+    try:
+        import requests
+        from urllib.parse import urlsplit
+        wrap(requests.Session, lambda request: urlsplit(request.url).netloc)
+    except ImportError:
+        pass
+    try:
+        import httpx
+        wrap(httpx.Client, lambda request: request.url.netloc.decode('ascii', 'replace'))
+    except ImportError:
+        pass
+
+
+class SamplingProfiler:
+    """按固定间隔采样本进程所有线程的调用栈，聚合为折叠栈（frame;frame;frame count）"""
+
+    def __init__(self, max_seconds=60):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    def capture(self, seconds=5.0, interval=0.01, include_idle=False):
+        """采样 seconds 秒，返回 (折叠栈Counter, 采样次数)；已有采样在进行时抛出 RuntimeError"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError('已有采样正在进行')
+        try:
+            seconds = min(max(seconds, interval), self.max_seconds)
+            own = threading.get_ident()
+            stacks = Counter()
+            samples = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own:
+                        continue
+                    stack = self._fold(frame)
+                    if include_idle or not self._idle(frame):
+                        stacks[stack] += 1
+                samples += 1
+                time.sleep(interval)
+            return stacks, samples
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _fold(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    @staticmethod
+    def _idle(frame):
+        """线程当前停在等待/休眠上（空闲工作线程、监控线程）"""
+        return frame.f_code.co_name in ('wait', 'sleep', '_wait_for_tstate_lock', 'select', 'poll', 'accept',
+                                        'wait_for', '_flush_loop', '_watch_loop', '_monitor_loop')
+
+    @staticmethod
+    def folded(stacks):
+        """flamegraph.pl / speedscope / inferno 可读取的折叠栈文本"""
+        return '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common()) + '\n'
+
+
+# 全局追踪器与采样器实例
+tracer = Tracer()
+sampling_profiler = SamplingProfiler()
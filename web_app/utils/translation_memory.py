@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译记忆索引
+基于MinHash/LSH的近似重复检索：对历史评估过的原文建立索引，为新原文返回最相近的条目及相似度。
+件号、ATA参考号、数值等视为占位符，检索按占位符模板进行，复用时将占位符替换为新原文中的值。
+只保存评分不低于 min_score 的译文；词汇集中的语料中 LSH 桶会很大，检索时每个桶只取最近加入的
+max_bucket_candidates 个模板，再按命中的桶数取前 max_candidates 个计算精确相似度，单次检索的代价与索引规模无关。
+"""
+
+import re
+import zlib
+import threading
+import logging
+from collections import Counter
+
+from .dedup import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 占位符：ATA参考号、件号/面板号（含数字的字母数字串）、数值
+_PLACEHOLDER = re.compile(
+    r'ATA\s*\d{2}(?:-\d{2}){0,2}'
+    r'|\b(?=[A-Z0-9-]*\d)(?=[A-Z0-9-]*[A-Z])[A-Z0-9]+(?:-[A-Z0-9]+)*\b'
+    r'|\d+(?:[.,:-]\d+)*'
+)
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def extract_placeholders(text):
+    """返回 (模板文本, 占位符列表)，模板中占位符统一替换为 #"""
+    tokens = []
+
+    def _sub(match):
+        tokens.append(match.group(0))
+        return '#'
+
+    template = _PLACEHOLDER.sub(_sub, normalize_text(text))
+    return template.lower(), tokens
+
+
+def shingles(template, n=3):
+    """字符n-gram集合（短文本整体作为一个shingle）"""
+    if len(template) <= n:
+        return frozenset([template])
+    return frozenset(template[i:i + n] for i in range(len(template) - n + 1))
+
+
+def substitute_placeholders(translation, old_tokens, new_tokens):
+    """将译文中的旧占位符替换为新原文中的对应值；无法安全替换时返回None"""
+    if len(old_tokens) != len(new_tokens):
+        return None
+    result = translation
+    # 先替换为哨兵再替换为新值，避免新旧值相互覆盖；长的优先，避免"06"误替换"06-10"的一部分
+    order = sorted(range(len(old_tokens)), key=lambda i: -len(old_tokens[i]))
+    for i in order:
+        if old_tokens[i] == new_tokens[i]:
+            continue
+        if old_tokens[i] not in result:
+            return None
+        result = result.replace(old_tokens[i], f"\x00{i}\x00", 1)
+    for i in order:
+        result = result.replace(f"\x00{i}\x00", new_tokens[i])
+    return result
+
+
+class _Document:
+    """索引中的一条原文及其各模型译文"""
+
+    __slots__ = ('source_text', 'template', 'tokens', 'translations')
+
+    def __init__(self, source_text, template, tokens):
+        self.source_text = source_text
+        self.template = template
+        self.tokens = tokens
+        self.translations = {}  # model_name -> {'translated_text', 'score'}
+
+
+class TranslationMemoryIndex:
+    """MinHash/LSH 翻译记忆索引（内存索引，持久化由调用方负责）"""
+
+    def __init__(self, num_perm=64, bands=16, ngram=3, seed=1, min_score=0.0,
+                 max_bucket_candidates=32, max_candidates=64):
+        assert num_perm % bands == 0
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.seed = seed
+        self.min_score = min_score
+        self.max_bucket_candidates = max_bucket_candidates
+        self.max_candidates = max_candidates
+        self.documents = {}  # 规范化原文 -> _Document
+        # 仅差占位符的原文共享同一模板，LSH与相似度计算都以模板为单位
+        self.templates = {}  # 模板 -> [规范化原文, ...]
+        self.template_shingles = {}  # 模板 -> shingle集合
+        self.buckets = {}  # (band, band_bytes) -> [模板, ...]（按加入顺序）
+        self.lock = threading.Lock()
+        self.loaded = False
+        self._perm = None
+
+    def configure(self, min_score=None, max_bucket_candidates=None, max_candidates=None):
+        if min_score is not None:
+            self.min_score = min_score
+        if max_bucket_candidates is not None:
+            self.max_bucket_candidates = max_bucket_candidates
+        if max_candidates is not None:
+            self.max_candidates = max_candidates
+        logger.info(f"翻译记忆: 最低评分 {self.min_score}，每桶候选上限 {self.max_bucket_candidates}，"
+                    f"候选上限 {self.max_candidates}")
+
+    def accepts(self, score):
+        """评分是否达到写入翻译记忆的最低要求（评分缺失或为0视为评估失败）"""
+        return bool(score) and score >= self.min_score
+
+    def _permutations(self):
+        if self._perm is None:
+            import numpy as np
+            rng = np.random.RandomState(self.seed)
+            a = rng.randint(1, 1 << 31, size=self.num_perm, dtype=np.uint64)
+            b = rng.randint(0, 1 << 31, size=self.num_perm, dtype=np.uint64)
+            self._perm = (a, b)
+        return self._perm
+
+    def _signature(self, shingle_set):
+        """计算MinHash签名（NumPy向量化）"""
+        import numpy as np
+        a, b = self._permutations()
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+                             dtype=np.uint64, count=len(shingle_set))
+        values = (a[:, None] * hashes[None, :] + b[:, None]) % np.uint64(_MERSENNE_PRIME)
+        return values.min(axis=1)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, source_text, model_name, translated_text, score=None):
+        """增量加入一条译文；同一原文同一模型保留得分更高的译文，评分低于 min_score 的忽略"""
+        if not source_text or not translated_text or not self.accepts(score):
+            return
+        key = normalize_text(source_text)
+        with self.lock:
+            doc = self.documents.get(key)
+            if doc is None:
+                template, tokens = extract_placeholders(source_text)
+                doc = _Document(source_text, template, tokens)
+                self.documents[key] = doc
+                if template not in self.templates:
+                    self.templates[template] = []
+                    shingle_set = shingles(template, self.ngram)
+                    self.template_shingles[template] = shingle_set
+                    for band_key in self._band_keys(self._signature(shingle_set)):
+                        self.buckets.setdefault(band_key, []).append(template)
+                self.templates[template].append(key)
+            existing = doc.translations.get(model_name)
+            if existing is None or (score or 0) >= (existing['score'] or 0):
+                doc.translations[model_name] = {'translated_text': translated_text, 'score': score}
+
+    def load(self, entries):
+        """从持久化条目 (source_text, model_name, translated_text, score) 重建索引"""
+        count = 0
+        for source_text, model_name, translated_text, score in entries:
+            self.add(source_text, model_name, translated_text, score)
+            count += 1
+        self.loaded = True
+        logger.info(f"翻译记忆索引已加载 {count} 条译文，{len(self.documents)} 条唯一原文")
+
+    def query(self, text, k=5, model_name=None, min_similarity=0.0):
+        """返回最相近的k条原文及相似度（模板字符n-gram的Jaccard相似度）"""
+        template, tokens = extract_placeholders(text)
+        query_shingles = shingles(template, self.ngram)
+        with self.lock:
+            if not self.documents:
+                return []
+            # 按命中的桶数排序候选（命中越多估计相似度越高），每桶只取最近加入的模板
+            hits = Counter()
+            for band_key in self._band_keys(self._signature(query_shingles)):
+                hits.update(self.buckets.get(band_key, ())[-self.max_bucket_candidates:])
+            candidates = [candidate for candidate, _ in hits.most_common(self.max_candidates)]
+            if template in self.templates and template not in hits:
+                candidates.append(template)
+            scored = []
+            for candidate in candidates:
+                candidate_shingles = self.template_shingles[candidate]
+                common = len(query_shingles & candidate_shingles)
+                union = len(query_shingles) + len(candidate_shingles) - common
+                similarity = common / union if union else 0.0
+                if similarity >= min_similarity:
+                    scored.append((similarity, candidate))
+            scored.sort(key=lambda item: -item[0])
+            neighbors = []
+            for similarity, candidate in scored:
+                # 同一模板下优先返回最近加入的原文
+                for key in reversed(self.templates[candidate]):
+                    doc = self.documents[key]
+                    if model_name and model_name not in doc.translations:
+                        continue
+                    neighbors.append((similarity, doc))
+                    if len(neighbors) >= k:
+                        break
+                if len(neighbors) >= k:
+                    break
+        return [{
+            'source_text': doc.source_text,
+            'similarity': round(similarity, 4),
+            'same_template': doc.template == template,
+            'placeholders': {'query': tokens, 'match': list(doc.tokens)},
+            'translations': dict(doc.translations)
+        } for similarity, doc in neighbors[:k]]
+
+    def find_reusable(self, text, model_name, threshold):
+        """查找可复用的译文：相似度不低于阈值且占位符可安全替换，返回 (译文, 邻居信息) 或 None"""
+        for neighbor in self.query(text, k=3, model_name=model_name, min_similarity=threshold):
+            translation = neighbor['translations'][model_name]['translated_text']
+            adapted = substitute_placeholders(translation, neighbor['placeholders']['match'],
+                                              neighbor['placeholders']['query'])
+            if adapted is not None:
+                return adapted, neighbor
+        return None
+
+
+class ReusedTranslation:
+    """从翻译记忆复用的译文，字段与翻译引擎返回的结果保持一致"""
+
+    def __init__(self, pair, model_name, translated_text, neighbor):
+        self.pair_id = pair.id
+        self.model_name = model_name
+        self.source_text = pair.source_text
+        self.translated_text = translated_text
+        self.processing_time = 0.0
+        self.tokens_used = 0
+        self.error_message = None
+        self.reused_from = neighbor['source_text']
+        self.similarity = neighbor['similarity']
+
+
+# 全局翻译记忆索引实例
+translation_memory = TranslationMemoryIndex()
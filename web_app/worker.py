@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式评估工作节点
+向协调者（EVALUATION_MODE=coordinator 的Web服务）注册后循环拉取分片，在本机调用翻译/评估模型，
+结果分批回传协调者。工作节点使用本机的 translation_config.json 与 .env 配置模型。
+
+用法:
+    python web_app/worker.py --coordinator http://10.0.0.5:5001 --threads 4
+    python web_app/worker.py --coordinator http://127.0.0.1:5001 --exit-when-idle 30
+"""
+
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 添加当前目录到路径以便导入app模块
+sys.path.insert(0, str(Path(__file__).parent))
+
+logger = logging.getLogger(__name__)
+
+
+class CoordinatorClient:
+    """协调者HTTP客户端"""
+
+    def __init__(self, base_url, token='', timeout=30):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        if token:
+            self.session.headers['X-Worker-Token'] = token
+        self.timeout = timeout
+        self.worker_id = None
+
+    def _post(self, path, payload):
+        response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        if response.status_code == 403:
+            raise RuntimeError('协调者拒绝了工作节点令牌')
+        return response
+
+    def register(self, worker_id, info):
+        response = self._post('/api/workers/register', {'worker_id': worker_id, 'info': info})
+        response.raise_for_status()
+        self.worker_id = response.json()['worker_id']
+        return self.worker_id
+
+    def lease(self):
+        """拉取一个分片，暂无分片时返回None"""
+        response = self._post('/api/shards/lease', {'worker_id': self.worker_id})
+        if response.status_code == 204:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def upload(self, shard_id, results, progress):
+        """回传一批结果；分片已被取消或转交其他节点时返回False"""
+        response = self._post(f"/api/shards/{shard_id}/results",
+                              {'worker_id': self.worker_id, 'results': results, 'progress': progress})
+        if response.status_code == 409:
+            return False
+        response.raise_for_status()
+        return True
+
+    def complete(self, shard_id, error=None):
+        response = self._post(f"/api/shards/{shard_id}/complete", {'worker_id': self.worker_id, 'error': error})
+        return response.status_code == 200
+
+
+class ProgressBuffer:
+    """收集各模型完成的单元数与耗时，随结果一起回传协调者"""
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, model_key, units, seconds):
+        self.entries.append({'model': model_key, 'units': units, 'seconds': seconds})
+
+    def skip(self, model_key, units, reason=None):
+        self.entries.append({'model': model_key, 'units': units, 'seconds': 0.0, 'skipped': reason})
+
+    def drain(self):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def _report(call, shard_id, *args):
+    """调用协调者回传接口；网络或服务端出错时记录日志并返回False，放弃该分片（租约到期后由协调者重新分派）"""
+    try:
+        return call(shard_id, *args)
+    except Exception as e:
+        logger.error(f"分片 {shard_id} 回传协调者失败，放弃该分片，等待租约到期后重新分派: {e}")
+        return False
+
+
+def process_shard(client, shard, threads=1, flush_rows=200, flush_seconds=5.0):
+    """处理一个分片，返回是否完成（分片被取消或回传失败时返回False）"""
+    import app as webapp
+
+    models = shard['models']
+    webapp.configure_translation_models(models)
+    acquired = webapp.model_lifecycle.acquire(models)
+    try:
+        evaluation_engine = webapp.create_evaluation_engine()
+        pairs = [SimpleNamespace(**pair) for pair in shard['pairs']]
+        groups = webapp.group_duplicate_pairs(pairs)
+        progress = ProgressBuffer()
+        rows, last_flush = [], time.time()
+        errors = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            # 翻译记忆索引保存在协调者的数据库中，工作节点不做复用
+            futures = [executor.submit(webapp.evaluate_group, group, models, evaluation_engine, 0, progress)
+                       for group in groups]
+            for future in as_completed(futures):
+                outcomes, error = future.result()
+                rows.extend(webapp.outcome_rows(shard['task_id'], outcomes))
+                if error is not None:
+                    errors += 1
+                    logger.error(f"分片 {shard['shard_id']} 处理翻译对出错: {error}")
+                if len(rows) >= flush_rows or time.time() - last_flush >= flush_seconds:
+                    if not _report(client.upload, shard['shard_id'], rows, progress.drain()):
+                        logger.warning(f"分片 {shard['shard_id']} 已取消、已转交其他节点或回传失败，停止处理")
+                        for pending in futures:
+                            pending.cancel()
+                        return False
+                    rows, last_flush = [], time.time()
+
+        if (rows or progress.entries) and not _report(client.upload, shard['shard_id'], rows, progress.drain()):
+            return False
+        return _report(client.complete, shard['shard_id'], f"{errors} 组翻译对处理失败" if errors else None)
+    finally:
+        webapp.model_lifecycle.release(acquired)
+
+
+def run_worker(client, worker_id=None, threads=1, poll_interval=2.0, exit_when_idle=None):
+    """注册并循环拉取分片；exit_when_idle 秒内没有分片时退出（None 表示一直运行）"""
+    worker_id = client.register(worker_id or f"{socket.gethostname()}-{os.getpid()}",
+                                {'host': socket.gethostname(), 'pid': os.getpid(), 'threads': threads})
+    logger.info(f"工作节点 {worker_id} 已注册到 {client.base_url}")
+    idle_since = time.time()
+    processed = 0
+    while True:
+        try:
+            shard = client.lease()
+        except Exception as e:
+            logger.warning(f"拉取分片失败: {e}")
+            shard = None
+        if shard is None:
+            if exit_when_idle is not None and time.time() - idle_since >= exit_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+        logger.info(f"开始处理分片 {shard['shard_id']}（{len(shard['pairs'])} 条翻译对）")
+        try:
+            if process_shard(client, shard, threads):
+                processed += 1
+        except Exception as e:
+            # 其他错误（如模型配置失败）同样只放弃该分片，工作节点继续拉取
+            logger.error(f"处理分片 {shard['shard_id']} 失败，等待租约到期后重新分派: {e}")
+        idle_since = time.time()
+    logger.info(f"工作节点 {worker_id} 退出，共完成 {processed} 个分片")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分布式评估工作节点')
+    parser.add_argument('--coordinator', default=os.getenv('COORDINATOR_URL', 'http://127.0.0.1:5001'))
+    parser.add_argument('--worker-id', default=None)
+    parser.add_argument('--threads', type=int, default=int(os.getenv('EVALUATION_WORKERS', '1')),
+                        help='分片内并发处理的线程数')
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--exit-when-idle', type=float, default=None, help='空闲指定秒数后退出')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    from app import initialize_system
+    if not initialize_system():
+        print("❌ 系统初始化失败")
+        sys.exit(1)
+
+    client = CoordinatorClient(args.coordinator, token=os.getenv('WORKER_TOKEN', ''))
+    run_worker(client, args.worker_id, args.threads, args.poll_interval, args.exit_when_idle)
+
+
+if __name__ == '__main__':
+    main()